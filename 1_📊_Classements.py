@@ -1,12 +1,29 @@
 import streamlit as st
-import yfinance as yf
+import sys, os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(__file__))
+from cache_donnees import cached
+from univers import MARKETS
+from chargement_concurrent import DEFAULT_DEADLINE, complete_in_background, iter_batches
+from donnees_marche import fetch_stock_row
+from service_notation import get_client
+from snapshot_univers import load_latest_snapshot, snapshot_ranking
+from metriques import RANKING_LATE, render_timer, start_exporters_from_env
+from profilage import finish_profiling, start_profiling
+from budget_rendu import fetch_within_budget, finish_render_budget, render_deadline, start_render_budget
+from ordonnanceur import VISIBLE, set_fetch_priority
+from enregistrements import RankingTable, StockRecord
 
 st.set_page_config(page_title="📊 Classements Boursiers", page_icon="📊", layout="wide")
 
+# Profilage de cet affichage (admin : PROFILING_ENABLED=1, puis ?profile=1 ou barre latérale)
+profiler = start_profiling('classements')
+
 # Navigation sidebar
 st.sidebar.title("📊 Navigation")
 st.sidebar.success("📊 Page des Classements")
@@ -15,23 +32,7 @@ st.title("📊 Classements Boursiers")
 st.markdown("*Style CoinMarketCap - Les meilleures actions en temps réel*")
 
 # Liste des principales actions par marché
-MAJOR_STOCKS = {
-    "🇺🇸 Tech US": ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "NFLX", "AMD", "INTC",
-                     "ADBE", "CRM", "ORCL", "CSCO", "AVGO", "QCOM", "TXN", "INTU", "NOW", "SNOW"],
-    
-    "🇺🇸 Finance & Industrie": ["JPM", "BAC", "WFC", "GS", "MS", "V", "MA", "AXP", "C", "BLK",
-                                  "UNH", "JNJ", "PFE", "LLY", "ABBV", "MRK", "TMO", "ABT", "DHR", "BMY"],
-    
-    "🇺🇸 Consommation": ["WMT", "HD", "MCD", "NKE", "SBUX", "DIS", "COST", "TGT", "LOW", "TJX",
-                          "PG", "KO", "PEP", "PM", "MO", "CL", "KMB", "GIS", "K", "CAG"],
-    
-    "🇪🇺 Europe": ["ASML", "SAP", "LVMH.PA", "OR.PA", "SAN.PA", "AIR.PA", "MC.PA", "SU.PA", "TTE.PA", "BN.PA",
-                    "SIE.DE", "VOW3.DE", "BAS.DE", "ALV.DE", "DTE.DE"],
-    
-    "🇯🇵 Japon": ["7203.T", "6758.T", "9984.T", "6861.T", "8306.T", "7974.T", "9433.T", "4063.T", "6902.T", "8035.T"],
-    
-    "🌏 Asie-Pacifique": ["TSM", "BABA", "TCEHY", "005930.KS", "000660.KS", "2330.TW", "1810.HK", "0700.HK"]
-}
+MAJOR_STOCKS = MARKETS
 
 # Récupérer toutes les actions
 ALL_STOCKS = []
@@ -39,60 +40,51 @@ for stocks in MAJOR_STOCKS.values():
     ALL_STOCKS.extend(stocks)
 ALL_STOCKS = list(set(ALL_STOCKS))  # Supprimer les doublons
 
-@st.cache_data(ttl=300)  # Cache de 5 minutes
+# Âge (en secondes) au-delà duquel le bouton "Actualiser" recharge une entrée
+REFRESH_MAX_AGE = 60
+
+# Service de notation partagé (SCORING_SERVICE_URL), sinon appels Yahoo directs
+scoring_client = get_client()
+
+# Exposition des métriques Prometheus (METRICS_PORT / METRICS_TEXTFILE), une fois par processus
+start_exporters_from_env()
+
+# Budget d'appels Yahoo et de temps de cet affichage (clos en bas de page)
+render_budget = start_render_budget('classements')
+# Appels Yahoo d'un classement affiché : priorité VISIBLE, servie à tour de rôle avec les autres sessions
+set_fetch_priority(VISIBLE, st.session_state.setdefault('fetch_session', uuid.uuid4().hex))
+
+@cached('classements', ttl=300)  # Cache de 5 minutes, partagé entre sessions
 def get_stock_data(ticker):
-    """Récupère les données d'une action"""
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        hist = stock.history(period="1y")
-        
-        if hist.empty or not info:
-            return None
-        
-        # Prix actuel
-        current_price = info.get('currentPrice') or info.get('regularMarketPrice') or (hist['Close'][-1] if not hist.empty else None)
-        
-        # Calculs de performance
-        if len(hist) >= 1:
-            perf_1d = ((hist['Close'][-1] - hist['Close'][-2]) / hist['Close'][-2] * 100) if len(hist) >= 2 else 0
-        else:
-            perf_1d = 0
-            
-        if len(hist) >= 7:
-            perf_7d = ((hist['Close'][-1] - hist['Close'][-7]) / hist['Close'][-7] * 100)
-        else:
-            perf_7d = 0
-            
-        if len(hist) >= 30:
-            perf_30d = ((hist['Close'][-1] - hist['Close'][-30]) / hist['Close'][-30] * 100)
-        else:
-            perf_30d = 0
-            
-        perf_1y = ((hist['Close'][-1] - hist['Close'][0]) / hist['Close'][0] * 100) if len(hist) > 0 else 0
-        
-        # Volume
-        volume = hist['Volume'][-1] if not hist.empty else 0
-        
-        # Capitalisation
-        market_cap = info.get('marketCap', 0)
-        
-        return {
-            'ticker': ticker,
-            'name': info.get('longName', ticker),
-            'price': current_price,
-            'market_cap': market_cap,
-            'volume': volume,
-            'perf_1d': perf_1d,
-            'perf_7d': perf_7d,
-            'perf_30d': perf_30d,
-            'perf_1y': perf_1y,
-            'sector': info.get('sector', 'N/A'),
-            'pe_ratio': info.get('trailingPE', 0),
-            'dividend_yield': info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0
-        }
-    except Exception as e:
-        return None
+    """Récupère les données d'une action (enregistrement compact et immuable, partagé tel quel par le cache)"""
+    row = scoring_client.snapshot([ticker])[0] if scoring_client else fetch_stock_row(ticker)
+    return StockRecord.from_row(row) if row else None
+
+def get_stock_row(ticker):
+    """(enregistrement, périmé) d'une action dans la limite du budget de l'affichage, ou None"""
+    record, stale = fetch_within_budget(get_stock_data, ticker)
+    return (record, stale) if record else None
+
+LATE_POLL_SECONDS = 2
+LATE_WAIT_SECONDS = 60
+
+@st.fragment(run_every=LATE_POLL_SECONDS)
+def watch_late_rows(late, since):
+    """
+    Relance l'affichage dès que les actions en retard à l'échéance sont arrivées dans le cache
+
+    Passé LATE_WAIT_SECONDS, un dernier rerun complet affiche les actions indisponibles
+    sans rappeler le fragment, qui cesse alors de se relancer.
+    """
+    missing = [t for t in late if not get_stock_data.is_cached(t)]
+    if not missing or time.monotonic() - since >= LATE_WAIT_SECONDS:
+        st.rerun()
+    st.caption(f"⏳ {len(missing)} actions en retard, chargées en arrière-plan : "
+               f"le classement se complétera automatiquement")
+
+def ticker_label(row):
+    """Ticker en gras, suivi de 🕒 si la ligne vient du cache périmé"""
+    return f"**{row['ticker']}**" + (" 🕒" if row.get('stale', False) else "")
 
 def format_large_number(num):
     """Formate les grands nombres (Milliards, Millions)"""
@@ -107,6 +99,8 @@ def format_large_number(num):
 
 def format_percentage(value, decimals=2):
     """Formate un pourcentage avec couleur"""
+    if pd.isna(value):
+        return '<span style="color: #888888;">N/A</span>'
     if value > 0:
         return f'<span style="color: #00CC00;">▲ {value:.{decimals}f}%</span>'
     elif value < 0:
@@ -114,414 +108,419 @@ def format_percentage(value, decimals=2):
     else:
         return f'<span style="color: #888888;">• {value:.{decimals}f}%</span>'
 
-# Tabs pour différents classements
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "🏆 Top 100 Capitalisation",
-    "📈 Meilleures Performances 1Y",
-    "📉 Pires Performances 1Y",
-    "💰 Meilleurs Dividendes",
-    "🔥 Plus Gros Volumes"
-])
-
-with tab1:
-    st.subheader("🏆 Top 100 des Actions par Capitalisation Boursière")
-    st.markdown("*Les entreprises les plus valorisées au monde*")
-    
-    if st.button("🔄 Actualiser les données", key="refresh_mcap"):
-        st.cache_data.clear()
+def refresh_button(key):
+    """Bouton d'actualisation : ne recharge que les entrées plus vieilles que REFRESH_MAX_AGE"""
+    if st.button("🔄 Actualiser les données", key=key, help=f"Recharge les données de plus de {REFRESH_MAX_AGE} s"):
+        st.session_state.live_data = True  # Quitte le snapshot nocturne pour cette session
+        get_stock_data.refresh_older_than(REFRESH_MAX_AGE)
         st.rerun()
+
+PARTIAL_COLUMNS = {'ticker': 'Ticker', 'name': 'Nom', 'price': 'Prix', 'market_cap': 'Cap. Boursière',
+                   'perf_1d': '24h', 'perf_1y': '1an', 'volume': 'Volume (24h)', 'dividend_yield': 'Dividende'}
+
+# Classement de l'univers chargé une fois par exécution du script, partagé par les onglets
+loaded_tables = {}
+
+def load_stock_data(tickers, sort_col, ascending=False):
+    """
+    Lignes des tickers demandés, extraites du classement de tout l'univers
+
+    L'univers n'est chargé qu'une fois par exécution (premier onglet affiché) : les
+    onglets suivants trient la même table au lieu de relancer chacun un chargement.
+
+    Returns:
+        RankingTable: Lignes des tickers demandés
+    """
+    if 'univers' not in loaded_tables:
+        loaded_tables['univers'] = load_universe(ALL_STOCKS, sort_col, ascending)
+    table = loaded_tables['univers']
+    return table if tickers == ALL_STOCKS else table.with_tickers(tickers)
+
+def load_universe(tickers, sort_col, ascending=False):
+    """
+    Charge les actions en parallèle en affichant un classement partiel au fil de l'eau
+
+    Le tableau partiel (trié sur sort_col) est remplacé à chaque lot reçu, puis
+    effacé une fois le chargement terminé au profit du classement complet.
+    Tant que l'utilisateur n'a pas demandé d'actualisation, le snapshot nocturne
+    est utilisé s'il existe (aucun appel réseau). Au-delà du budget de l'affichage,
+    les actions restantes sont servies depuis le cache périmé (colonne 'stale') ; celles
+    qui n'ont pas répondu à l'échéance sont terminées en arrière-plan puis affichées.
+
+    Returns:
+        RankingTable: Lignes chargées, triées ensuite par colonne sans DataFrame intermédiaire
+    """
+    snapshot = None if st.session_state.get('live_data') else load_latest_snapshot()
+    if snapshot is not None:
+        table = snapshot_ranking(snapshot, tickers)
+        if not table.empty:
+            return table
     
-    with st.spinner("📊 Chargement des données en cours..."):
-        # Récupérer les données
-        stock_data = []
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for idx, ticker in enumerate(ALL_STOCKS[:100]):  # Limiter à 100
-            status_text.text(f"Chargement: {ticker} ({idx+1}/{min(100, len(ALL_STOCKS))})")
-            data = get_stock_data(ticker)
-            if data and data['market_cap'] > 0:
-                stock_data.append(data)
-            progress_bar.progress((idx + 1) / min(100, len(ALL_STOCKS)))
-            time.sleep(0.1)  # Éviter le rate limiting
-        
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Créer le DataFrame
-        df = pd.DataFrame(stock_data)
-        df = df.sort_values('market_cap', ascending=False).reset_index(drop=True)
-        df.index = df.index + 1  # Commencer à 1
+    records, stale, late = [], [], []
+    progress_bar = st.progress(0)
+    placeholder = st.empty()
+    loaded = 0
+    
+    # Au-delà de l'échéance (comptée depuis le début de l'affichage), les actions en retard
+    # sont terminées en arrière-plan
+    for batch in iter_batches(get_stock_row, tickers, deadline=render_deadline(DEFAULT_DEADLINE), late=late):
+        loaded += len(batch)
+        for _, item in batch:
+            if item:
+                records.append(item[0])
+                stale.append(item[1])
+        progress_bar.progress(loaded / len(tickers), text=f"Chargement: {loaded}/{len(tickers)}")
+        if records and loaded < len(tickers):
+            partial = RankingTable.from_records(records).top_frame(sort_col, 20, ascending)
+            placeholder.dataframe(partial[list(PARTIAL_COLUMNS)].rename(columns=PARTIAL_COLUMNS),
+                                  hide_index=True, use_container_width=True)
+    
+    progress_bar.empty()
+    placeholder.empty()
+    table = RankingTable.from_records(records, stale)
+    if table.stale.any():
+        st.caption(f"🕒 {int(table.stale.sum())} actions affichées depuis le cache (données antérieures) : "
+                   f"budget d'appels de cet affichage atteint ou Yahoo indisponible")
+    if late:
+        RANKING_LATE.labels('classements').inc(len(late))
+        complete_in_background(get_stock_data, late)
+        # Fenêtre d'attente ouverte au premier retard, refermée dès qu'un affichage est complet
+        since = st.session_state.setdefault('classements_late_since', time.monotonic())
+        if time.monotonic() - since < LATE_WAIT_SECONDS:
+            watch_late_rows(late, since)
+        else:
+            st.caption(f"⚠️ {len(late)} actions indisponibles pour le moment")
+    else:
+        st.session_state.pop('classements_late_since', None)
+    return table
+
+# Budget clos même si un st.rerun() (actualisation, actions en retard arrivées) interrompt l'affichage
+try:
+    # Tabs pour différents classements
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "🏆 Top 100 Capitalisation",
+        "📈 Meilleures Performances 1Y",
+        "📉 Pires Performances 1Y",
+        "💰 Meilleurs Dividendes",
+        "🔥 Plus Gros Volumes"
+    ])
+
+    with tab1, render_timer('classements', 'capitalisation'):
+        st.subheader("🏆 Top 100 des Actions par Capitalisation Boursière")
+        st.markdown("*Les entreprises les plus valorisées au monde*")
+    
+        refresh_button("refresh_mcap")
+    
+        with st.spinner("📊 Chargement des données en cours..."):
+            # Récupérer les données (Limiter à 100)
+            table = load_stock_data(ALL_STOCKS[:100], 'market_cap')
+            table = table.filter(table['market_cap'] > 0)
+            df = table.top_frame('market_cap', 100)  # Rangs à partir de 1
         
-        # Affichage du tableau
-        st.markdown("---")
+            # Affichage du tableau
+            st.markdown("---")
         
-        # Header du tableau
-        col_rank, col_name, col_price, col_mcap, col_1d, col_7d, col_30d, col_1y, col_volume = st.columns([0.5, 2, 1, 1.5, 1, 1, 1, 1, 1.5])
+            # Header du tableau
+            col_rank, col_name, col_price, col_mcap, col_1d, col_7d, col_30d, col_1y, col_volume = st.columns([0.5, 2, 1, 1.5, 1, 1, 1, 1, 1.5])
         
-        with col_rank:
-            st.markdown("**#**")
-        with col_name:
-            st.markdown("**Nom**")
-        with col_price:
-            st.markdown("**Prix**")
-        with col_mcap:
-            st.markdown("**Cap. Boursière**")
-        with col_1d:
-            st.markdown("**24h**")
-        with col_7d:
-            st.markdown("**7j**")
-        with col_30d:
-            st.markdown("**30j**")
-        with col_1y:
-            st.markdown("**1an**")
-        with col_volume:
-            st.markdown("**Volume (24h)**")
+            with col_rank:
+                st.markdown("**#**")
+            with col_name:
+                st.markdown("**Nom**")
+            with col_price:
+                st.markdown("**Prix**")
+            with col_mcap:
+                st.markdown("**Cap. Boursière**")
+            with col_1d:
+                st.markdown("**24h**")
+            with col_7d:
+                st.markdown("**7j**")
+            with col_30d:
+                st.markdown("**30j**")
+            with col_1y:
+                st.markdown("**1an**")
+            with col_volume:
+                st.markdown("**Volume (24h)**")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        # Afficher les 100 premières
-        for idx, row in df.head(100).iterrows():
-            col_rank, col_name, col_price, col_mcap, col_1d, col_7d, col_30d, col_1y, col_volume = st.columns([0.5, 2, 1, 1.5, 1, 1, 1, 1, 1.5])
+            # Afficher les 100 premières
+            for idx, row in df.head(100).iterrows():
+                col_rank, col_name, col_price, col_mcap, col_1d, col_7d, col_30d, col_1y, col_volume = st.columns([0.5, 2, 1, 1.5, 1, 1, 1, 1, 1.5])
             
-            with col_rank:
-                st.markdown(f"**{idx}**")
+                with col_rank:
+                    st.markdown(f"**{idx}**")
             
-            with col_name:
-                st.markdown(f"**{row['ticker']}**")
-                st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
+                with col_name:
+                    st.markdown(ticker_label(row))
+                    st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
             
-            with col_price:
-                st.markdown(f"${row['price']:.2f}")
+                with col_price:
+                    st.markdown(f"${row['price']:.2f}")
             
-            with col_mcap:
-                st.markdown(format_large_number(row['market_cap']))
+                with col_mcap:
+                    st.markdown(format_large_number(row['market_cap']))
             
-            with col_1d:
-                st.markdown(format_percentage(row['perf_1d']), unsafe_allow_html=True)
+                with col_1d:
+                    st.markdown(format_percentage(row['perf_1d']), unsafe_allow_html=True)
             
-            with col_7d:
-                st.markdown(format_percentage(row['perf_7d']), unsafe_allow_html=True)
+                with col_7d:
+                    st.markdown(format_percentage(row['perf_7d']), unsafe_allow_html=True)
             
-            with col_30d:
-                st.markdown(format_percentage(row['perf_30d']), unsafe_allow_html=True)
+                with col_30d:
+                    st.markdown(format_percentage(row['perf_30d']), unsafe_allow_html=True)
             
-            with col_1y:
-                st.markdown(format_percentage(row['perf_1y']), unsafe_allow_html=True)
+                with col_1y:
+                    st.markdown(format_percentage(row['perf_1y']), unsafe_allow_html=True)
             
-            with col_volume:
-                st.markdown(format_large_number(row['volume']))
+                with col_volume:
+                    st.markdown(format_large_number(row['volume']))
             
-            st.markdown("---")
+                st.markdown("---")
 
-with tab2:
-    st.subheader("📈 Top 50 Meilleures Performances sur 1 an")
-    st.markdown("*Les actions qui ont le plus progressé*")
+    with tab2, render_timer('classements', 'meilleures_perf'):
+        st.subheader("📈 Top 50 Meilleures Performances sur 1 an")
+        st.markdown("*Les actions qui ont le plus progressé*")
     
-    if st.button("🔄 Actualiser les données", key="refresh_perf_pos"):
-        st.cache_data.clear()
-        st.rerun()
+        refresh_button("refresh_perf_pos")
     
-    with st.spinner("📊 Chargement des données..."):
-        if 'df' not in locals() or df.empty:
-            stock_data = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for idx, ticker in enumerate(ALL_STOCKS):
-                status_text.text(f"Chargement: {ticker} ({idx+1}/{len(ALL_STOCKS)})")
-                data = get_stock_data(ticker)
-                if data:
-                    stock_data.append(data)
-                progress_bar.progress((idx + 1) / len(ALL_STOCKS))
-                time.sleep(0.1)
-            
-            progress_bar.empty()
-            status_text.empty()
-            df = pd.DataFrame(stock_data)
+        with st.spinner("📊 Chargement des données..."):
+            if 'table' not in locals() or table.empty:
+                table = load_stock_data(ALL_STOCKS, 'perf_1y')
         
-        df_sorted = df.sort_values('perf_1y', ascending=False).reset_index(drop=True)
-        df_sorted.index = df_sorted.index + 1
+            df_sorted = table.top_frame('perf_1y', 50)
         
-        # Affichage
-        st.markdown("---")
+            # Affichage
+            st.markdown("---")
         
-        col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
+            col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
         
-        with col_rank:
-            st.markdown("**#**")
-        with col_name:
-            st.markdown("**Nom**")
-        with col_price:
-            st.markdown("**Prix**")
-        with col_mcap:
-            st.markdown("**Cap. Boursière**")
-        with col_1y:
-            st.markdown("**Performance 1an**")
-        with col_sector:
-            st.markdown("**Secteur**")
+            with col_rank:
+                st.markdown("**#**")
+            with col_name:
+                st.markdown("**Nom**")
+            with col_price:
+                st.markdown("**Prix**")
+            with col_mcap:
+                st.markdown("**Cap. Boursière**")
+            with col_1y:
+                st.markdown("**Performance 1an**")
+            with col_sector:
+                st.markdown("**Secteur**")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        for idx, row in df_sorted.head(50).iterrows():
-            col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
+            for idx, row in df_sorted.head(50).iterrows():
+                col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
             
-            with col_rank:
-                if idx == 1:
-                    st.markdown("🥇")
-                elif idx == 2:
-                    st.markdown("🥈")
-                elif idx == 3:
-                    st.markdown("🥉")
-                else:
-                    st.markdown(f"**{idx}**")
+                with col_rank:
+                    if idx == 1:
+                        st.markdown("🥇")
+                    elif idx == 2:
+                        st.markdown("🥈")
+                    elif idx == 3:
+                        st.markdown("🥉")
+                    else:
+                        st.markdown(f"**{idx}**")
             
-            with col_name:
-                st.markdown(f"**{row['ticker']}**")
-                st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
+                with col_name:
+                    st.markdown(ticker_label(row))
+                    st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
             
-            with col_price:
-                st.markdown(f"${row['price']:.2f}")
+                with col_price:
+                    st.markdown(f"${row['price']:.2f}")
             
-            with col_mcap:
-                st.markdown(format_large_number(row['market_cap']))
+                with col_mcap:
+                    st.markdown(format_large_number(row['market_cap']))
             
-            with col_1y:
-                st.markdown(f'<span style="color: #00CC00; font-size: 18px; font-weight: bold;">▲ {row["perf_1y"]:.2f}%</span>', unsafe_allow_html=True)
+                with col_1y:
+                    st.markdown(f'<span style="color: #00CC00; font-size: 18px; font-weight: bold;">▲ {row["perf_1y"]:.2f}%</span>', unsafe_allow_html=True)
             
-            with col_sector:
-                st.markdown(row['sector'])
+                with col_sector:
+                    st.markdown(row['sector'])
             
-            st.markdown("---")
+                st.markdown("---")
 
-with tab3:
-    st.subheader("📉 Top 50 Pires Performances sur 1 an")
-    st.markdown("*Les actions qui ont le plus baissé*")
+    with tab3, render_timer('classements', 'pires_perf'):
+        st.subheader("📉 Top 50 Pires Performances sur 1 an")
+        st.markdown("*Les actions qui ont le plus baissé*")
     
-    if st.button("🔄 Actualiser les données", key="refresh_perf_neg"):
-        st.cache_data.clear()
-        st.rerun()
+        refresh_button("refresh_perf_neg")
     
-    with st.spinner("📊 Chargement des données..."):
-        if 'df' not in locals() or df.empty:
-            stock_data = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for idx, ticker in enumerate(ALL_STOCKS):
-                status_text.text(f"Chargement: {ticker} ({idx+1}/{len(ALL_STOCKS)})")
-                data = get_stock_data(ticker)
-                if data:
-                    stock_data.append(data)
-                progress_bar.progress((idx + 1) / len(ALL_STOCKS))
-                time.sleep(0.1)
-            
-            progress_bar.empty()
-            status_text.empty()
-            df = pd.DataFrame(stock_data)
+        with st.spinner("📊 Chargement des données..."):
+            if 'table' not in locals() or table.empty:
+                table = load_stock_data(ALL_STOCKS, 'perf_1y', ascending=True)
         
-        df_sorted = df.sort_values('perf_1y', ascending=True).reset_index(drop=True)
-        df_sorted.index = df_sorted.index + 1
+            df_sorted = table.top_frame('perf_1y', 50, ascending=True)
         
-        # Affichage
-        st.markdown("---")
+            # Affichage
+            st.markdown("---")
         
-        col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
+            col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
         
-        with col_rank:
-            st.markdown("**#**")
-        with col_name:
-            st.markdown("**Nom**")
-        with col_price:
-            st.markdown("**Prix**")
-        with col_mcap:
-            st.markdown("**Cap. Boursière**")
-        with col_1y:
-            st.markdown("**Performance 1an**")
-        with col_sector:
-            st.markdown("**Secteur**")
+            with col_rank:
+                st.markdown("**#**")
+            with col_name:
+                st.markdown("**Nom**")
+            with col_price:
+                st.markdown("**Prix**")
+            with col_mcap:
+                st.markdown("**Cap. Boursière**")
+            with col_1y:
+                st.markdown("**Performance 1an**")
+            with col_sector:
+                st.markdown("**Secteur**")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        for idx, row in df_sorted.head(50).iterrows():
-            col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
+            for idx, row in df_sorted.head(50).iterrows():
+                col_rank, col_name, col_price, col_mcap, col_1y, col_sector = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
             
-            with col_rank:
-                st.markdown(f"**{idx}**")
+                with col_rank:
+                    st.markdown(f"**{idx}**")
             
-            with col_name:
-                st.markdown(f"**{row['ticker']}**")
-                st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
+                with col_name:
+                    st.markdown(ticker_label(row))
+                    st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
             
-            with col_price:
-                st.markdown(f"${row['price']:.2f}")
+                with col_price:
+                    st.markdown(f"${row['price']:.2f}")
             
-            with col_mcap:
-                st.markdown(format_large_number(row['market_cap']))
+                with col_mcap:
+                    st.markdown(format_large_number(row['market_cap']))
             
-            with col_1y:
-                st.markdown(f'<span style="color: #FF4B4B; font-size: 18px; font-weight: bold;">▼ {abs(row["perf_1y"]):.2f}%</span>', unsafe_allow_html=True)
+                with col_1y:
+                    st.markdown(f'<span style="color: #FF4B4B; font-size: 18px; font-weight: bold;">▼ {abs(row["perf_1y"]):.2f}%</span>', unsafe_allow_html=True)
             
-            with col_sector:
-                st.markdown(row['sector'])
+                with col_sector:
+                    st.markdown(row['sector'])
             
-            st.markdown("---")
+                st.markdown("---")
 
-with tab4:
-    st.subheader("💰 Top 50 Meilleurs Dividendes")
-    st.markdown("*Les actions avec les meilleurs rendements de dividende*")
+    with tab4, render_timer('classements', 'dividendes'):
+        st.subheader("💰 Top 50 Meilleurs Dividendes")
+        st.markdown("*Les actions avec les meilleurs rendements de dividende*")
     
-    if st.button("🔄 Actualiser les données", key="refresh_div"):
-        st.cache_data.clear()
-        st.rerun()
+        refresh_button("refresh_div")
     
-    with st.spinner("📊 Chargement des données..."):
-        if 'df' not in locals() or df.empty:
-            stock_data = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for idx, ticker in enumerate(ALL_STOCKS):
-                status_text.text(f"Chargement: {ticker} ({idx+1}/{len(ALL_STOCKS)})")
-                data = get_stock_data(ticker)
-                if data:
-                    stock_data.append(data)
-                progress_bar.progress((idx + 1) / len(ALL_STOCKS))
-                time.sleep(0.1)
-            
-            progress_bar.empty()
-            status_text.empty()
-            df = pd.DataFrame(stock_data)
+        with st.spinner("📊 Chargement des données..."):
+            if 'table' not in locals() or table.empty:
+                table = load_stock_data(ALL_STOCKS, 'dividend_yield')
         
-        df_sorted = df[df['dividend_yield'] > 0].sort_values('dividend_yield', ascending=False).reset_index(drop=True)
-        df_sorted.index = df_sorted.index + 1
+            df_sorted = table.filter(table['dividend_yield'] > 0).top_frame('dividend_yield', 50)
         
-        # Affichage
-        st.markdown("---")
+            # Affichage
+            st.markdown("---")
         
-        col_rank, col_name, col_price, col_div, col_pe, col_sector = st.columns([0.5, 2, 1, 1.5, 1, 1.5])
+            col_rank, col_name, col_price, col_div, col_pe, col_sector = st.columns([0.5, 2, 1, 1.5, 1, 1.5])
         
-        with col_rank:
-            st.markdown("**#**")
-        with col_name:
-            st.markdown("**Nom**")
-        with col_price:
-            st.markdown("**Prix**")
-        with col_div:
-            st.markdown("**Rendement Dividende**")
-        with col_pe:
-            st.markdown("**P/E**")
-        with col_sector:
-            st.markdown("**Secteur**")
+            with col_rank:
+                st.markdown("**#**")
+            with col_name:
+                st.markdown("**Nom**")
+            with col_price:
+                st.markdown("**Prix**")
+            with col_div:
+                st.markdown("**Rendement Dividende**")
+            with col_pe:
+                st.markdown("**P/E**")
+            with col_sector:
+                st.markdown("**Secteur**")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        for idx, row in df_sorted.head(50).iterrows():
-            col_rank, col_name, col_price, col_div, col_pe, col_sector = st.columns([0.5, 2, 1, 1.5, 1, 1.5])
+            for idx, row in df_sorted.head(50).iterrows():
+                col_rank, col_name, col_price, col_div, col_pe, col_sector = st.columns([0.5, 2, 1, 1.5, 1, 1.5])
             
-            with col_rank:
-                if idx == 1:
-                    st.markdown("🥇")
-                elif idx == 2:
-                    st.markdown("🥈")
-                elif idx == 3:
-                    st.markdown("🥉")
-                else:
-                    st.markdown(f"**{idx}**")
+                with col_rank:
+                    if idx == 1:
+                        st.markdown("🥇")
+                    elif idx == 2:
+                        st.markdown("🥈")
+                    elif idx == 3:
+                        st.markdown("🥉")
+                    else:
+                        st.markdown(f"**{idx}**")
             
-            with col_name:
-                st.markdown(f"**{row['ticker']}**")
-                st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
+                with col_name:
+                    st.markdown(ticker_label(row))
+                    st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
             
-            with col_price:
-                st.markdown(f"${row['price']:.2f}")
+                with col_price:
+                    st.markdown(f"${row['price']:.2f}")
             
-            with col_div:
-                st.markdown(f'<span style="color: #00CC00; font-size: 18px; font-weight: bold;">{row["dividend_yield"]:.2f}%</span>', unsafe_allow_html=True)
+                with col_div:
+                    st.markdown(f'<span style="color: #00CC00; font-size: 18px; font-weight: bold;">{row["dividend_yield"]:.2f}%</span>', unsafe_allow_html=True)
             
-            with col_pe:
-                if row['pe_ratio'] > 0:
-                    st.markdown(f"{row['pe_ratio']:.2f}")
-                else:
-                    st.markdown("N/A")
+                with col_pe:
+                    if row['pe_ratio'] > 0:
+                        st.markdown(f"{row['pe_ratio']:.2f}")
+                    else:
+                        st.markdown("N/A")
             
-            with col_sector:
-                st.markdown(row['sector'])
+                with col_sector:
+                    st.markdown(row['sector'])
             
-            st.markdown("---")
+                st.markdown("---")
 
-with tab5:
-    st.subheader("🔥 Top 50 Plus Gros Volumes")
-    st.markdown("*Les actions les plus échangées*")
+    with tab5, render_timer('classements', 'volumes'):
+        st.subheader("🔥 Top 50 Plus Gros Volumes")
+        st.markdown("*Les actions les plus échangées*")
     
-    if st.button("🔄 Actualiser les données", key="refresh_vol"):
-        st.cache_data.clear()
-        st.rerun()
+        refresh_button("refresh_vol")
     
-    with st.spinner("📊 Chargement des données..."):
-        if 'df' not in locals() or df.empty:
-            stock_data = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for idx, ticker in enumerate(ALL_STOCKS):
-                status_text.text(f"Chargement: {ticker} ({idx+1}/{len(ALL_STOCKS)})")
-                data = get_stock_data(ticker)
-                if data:
-                    stock_data.append(data)
-                progress_bar.progress((idx + 1) / len(ALL_STOCKS))
-                time.sleep(0.1)
-            
-            progress_bar.empty()
-            status_text.empty()
-            df = pd.DataFrame(stock_data)
+        with st.spinner("📊 Chargement des données..."):
+            if 'table' not in locals() or table.empty:
+                table = load_stock_data(ALL_STOCKS, 'volume')
         
-        df_sorted = df.sort_values('volume', ascending=False).reset_index(drop=True)
-        df_sorted.index = df_sorted.index + 1
+            df_sorted = table.top_frame('volume', 50)
         
-        # Affichage
-        st.markdown("---")
+            # Affichage
+            st.markdown("---")
         
-        col_rank, col_name, col_price, col_volume, col_1d, col_mcap = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
+            col_rank, col_name, col_price, col_volume, col_1d, col_mcap = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
         
-        with col_rank:
-            st.markdown("**#**")
-        with col_name:
-            st.markdown("**Nom**")
-        with col_price:
-            st.markdown("**Prix**")
-        with col_volume:
-            st.markdown("**Volume (24h)**")
-        with col_1d:
-            st.markdown("**24h**")
-        with col_mcap:
-            st.markdown("**Cap. Boursière**")
+            with col_rank:
+                st.markdown("**#**")
+            with col_name:
+                st.markdown("**Nom**")
+            with col_price:
+                st.markdown("**Prix**")
+            with col_volume:
+                st.markdown("**Volume (24h)**")
+            with col_1d:
+                st.markdown("**24h**")
+            with col_mcap:
+                st.markdown("**Cap. Boursière**")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        for idx, row in df_sorted.head(50).iterrows():
-            col_rank, col_name, col_price, col_volume, col_1d, col_mcap = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
+            for idx, row in df_sorted.head(50).iterrows():
+                col_rank, col_name, col_price, col_volume, col_1d, col_mcap = st.columns([0.5, 2, 1, 1.5, 1.5, 1.5])
             
-            with col_rank:
-                st.markdown(f"**{idx}**")
+                with col_rank:
+                    st.markdown(f"**{idx}**")
             
-            with col_name:
-                st.markdown(f"**{row['ticker']}**")
-                st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
+                with col_name:
+                    st.markdown(ticker_label(row))
+                    st.caption(row['name'][:30] + "..." if len(row['name']) > 30 else row['name'])
             
-            with col_price:
-                st.markdown(f"${row['price']:.2f}")
+                with col_price:
+                    st.markdown(f"${row['price']:.2f}")
             
-            with col_volume:
-                st.markdown(f'<span style="font-size: 16px; font-weight: bold;">{format_large_number(row["volume"])}</span>', unsafe_allow_html=True)
+                with col_volume:
+                    st.markdown(f'<span style="font-size: 16px; font-weight: bold;">{format_large_number(row["volume"])}</span>', unsafe_allow_html=True)
             
-            with col_1d:
-                st.markdown(format_percentage(row['perf_1d']), unsafe_allow_html=True)
+                with col_1d:
+                    st.markdown(format_percentage(row['perf_1d']), unsafe_allow_html=True)
             
-            with col_mcap:
-                st.markdown(format_large_number(row['market_cap']))
+                with col_mcap:
+                    st.markdown(format_large_number(row['market_cap']))
             
-            st.markdown("---")
+                st.markdown("---")
+finally:
+    # Consommation du budget publiée dans les métriques et le journal
+    finish_render_budget(render_budget)
 
 # Footer
 st.markdown("---")
@@ -553,3 +552,6 @@ st.markdown("""
     }
 </style>
 """, unsafe_allow_html=True)
+
+# Fin du profilage : tableau des fonctions coûteuses et profil téléchargeable
+finish_profiling(profiler)
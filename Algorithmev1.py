@@ -3,71 +3,242 @@ Algorithme de notation des entreprises cotées en bourse
 Analyse automatique selon le secteur et l'horizon d'investissement
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import logging
+import threading
+import time
 import warnings
+from functools import wraps
 warnings.filterwarnings('ignore')
 
+from fournisseurs import get_provider
+from journalisation import configure_cli_logging, get_logger, log_event
+from metriques import STALE_SERVED
+from resilience import UpstreamUnavailable, revalidate
+from schema_info import is_quoted
+
+logger = get_logger('scorer')
+
+class ScorerTimings:
+    """
+    Mesures d'un scorer : durée de chaque accès aux données et de chaque score_*,
+    avec le résultat du cache ('hit', 'memo' = déjà chargé par ce scorer, 'miss',
+    'stale' = valeur périmée servie faute de fournisseur disponible)
+    """
+    
+    def __init__(self):
+        self.records = []
+    
+    def add(self, stage, kind, duration, cache=None):
+        """
+        Enregistre une mesure
+        
+        Args:
+            stage (str): Nom de l'étape (ex: 'info', 'history:3mo', 'score_rsi')
+            kind (str): 'fetch', 'score' ou 'total'
+            duration (float): Durée en secondes
+            cache (str): 'hit', 'memo', 'miss', 'stale' ou None
+        """
+        self.records.append({'stage': stage, 'kind': kind, 'duration': duration, 'cache': cache})
+    
+    def total(self, kind):
+        """Durée cumulée des étapes d'un type"""
+        return sum(r['duration'] for r in self.records if r['kind'] == kind)
+    
+    def cache_counts(self):
+        """Nombre d'accès aux données par résultat du cache"""
+        counts = {'hit': 0, 'memo': 0, 'miss': 0, 'stale': 0}
+        for r in self.records:
+            if r['cache']:
+                counts[r['cache']] += 1
+        return counts
+
+
+class TimingsAggregate:
+    """Agrégation (thread-safe) des mesures de plusieurs scorers, pour les traitements par lots"""
+    
+    def __init__(self):
+        self._stages = {}
+        self._cache = {'hit': 0, 'memo': 0, 'miss': 0, 'stale': 0}
+        self._lock = threading.Lock()
+    
+    def add(self, timings):
+        with self._lock:
+            for r in timings.records:
+                durations = self._stages.setdefault((r['kind'], r['stage']), [])
+                durations.append(r['duration'])
+                if r['cache']:
+                    self._cache[r['cache']] += 1
+    
+    def summary(self):
+        """
+        Returns:
+            list: Une ligne par étape (kind, stage, count, total_s, mean_ms, p95_ms, max_ms), la plus coûteuse d'abord
+        """
+        with self._lock:
+            rows = []
+            for (kind, stage), durations in self._stages.items():
+                ordered = sorted(durations)
+                rows.append({'kind': kind, 'stage': stage, 'count': len(ordered),
+                             'total_s': round(sum(ordered), 3),
+                             'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+                             'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                             'max_ms': round(ordered[-1] * 1000, 2)})
+            return sorted(rows, key=lambda r: r['total_s'], reverse=True)
+    
+    def cache_counts(self):
+        with self._lock:
+            return dict(self._cache)
+
+
+def _timed(method):
+    """Mesure la durée d'une méthode score_* dans self.timings (hors chargement des données)"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        fetch_before = self.timings.total('fetch')
+        t0 = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            fetched = self.timings.total('fetch') - fetch_before
+            self.timings.add(method.__name__, 'score', time.perf_counter() - t0 - fetched)
+    return wrapper
+
 
 class StockScorer:
     """
     Classe principale pour noter les actions sur 100
     """
     
-    def __init__(self, ticker, horizon='long'):
+    def __init__(self, ticker, horizon='long', cache=None, provider=None):
         """
         Initialise le scorer
         
         Args:
             ticker (str): Symbole boursier (ex: 'AAPL', 'MSFT')
             horizon (str): 'court' (< 5 ans), 'long' (> 5 ans)
+            cache: Cache optionnel (DataCache ou DiskCache) partagé entre scorers
+            provider: Fournisseur de données (par défaut celui du processus, voir fournisseurs.py)
         """
         self.ticker = ticker.upper()
         self.horizon = horizon.lower()
-        self.stock = None
+        self.cache = cache
+        self.provider = provider or get_provider()
         self.info = None
         self.sector = None
         self.industry = None
         self.scores = {}
         self.final_score = 0
-        
+        self._history = {}
+        self._dividends = None
+        self._data_ok = False
+        self.fetch_error = None
+        self.stale = False
+        self.timings = ScorerTimings()
+    
+    def _load(self, dataset, key, fetch, stage=None):
+        """
+        Charge une donnée via le cache s'il y en a un, sinon auprès du fournisseur
+
+        Fournisseur indisponible : la dernière valeur en cache, même expirée, est utilisée
+        (self.stale passe à True) et un rechargement est planifié en arrière-plan
+        """
+        stage = stage or dataset
+        t0 = time.perf_counter()
+        if self.cache is not None:
+            found, value = self.cache.get(dataset, key)
+            if found:
+                self.timings.add(stage, 'fetch', time.perf_counter() - t0, 'hit')
+                return value
+        outcome = 'miss'
+        try:
+            value = fetch()
+        except UpstreamUnavailable:
+            found, value, _ = self.cache.get_stale(dataset, key) if self.cache is not None else (False, None, None)
+            if not found:
+                raise
+            cache = self.cache
+            revalidate((dataset,) + key, lambda: cache.set(dataset, key, fetch()))
+            STALE_SERVED.labels(dataset).inc()
+            self.stale = True
+            outcome = 'stale'
+            return value
+        finally:
+            self.timings.add(stage, 'fetch', time.perf_counter() - t0, outcome)
+        if self.cache is not None:
+            self.cache.set(dataset, key, value)
+        return value
+    
+    def get_history(self, period):
+        """Historique de prix d'une période (un seul téléchargement par période et par scorer)"""
+        if period in self._history:
+            self.timings.add(f'history:{period}', 'fetch', 0.0, 'memo')
+        else:
+            self._history[period] = self._load('history', (self.ticker, period),
+                                               lambda: self.provider.history(self.ticker, period),
+                                               stage=f'history:{period}')
+        return self._history[period]
+    
+    def get_dividends(self):
+        """Historique des dividendes"""
+        if self._dividends is not None:
+            self.timings.add('dividends', 'fetch', 0.0, 'memo')
+        else:
+            self._dividends = self._load('dividends', (self.ticker,), lambda: self.provider.dividends(self.ticker))
+        return self._dividends
+    
     def fetch_data(self):
-        """Récupère les données de l'action via Yahoo Finance"""
+        """Récupère les données de l'action auprès du fournisseur (Yahoo Finance par défaut)"""
+        t0 = time.perf_counter()
         try:
-            self.stock = yf.Ticker(self.ticker)
-            self.info = self.stock.info
+            self.info = self._load('info', (self.ticker,), lambda: self.provider.info(self.ticker))
             
-            if not self.info or len(self.info) < 5 or 'symbol' not in self.info:
-                print(f"\n✗ ERREUR: Le ticker '{self.ticker}' n'a pas été trouvé!")
-                print(f"\n💡 Suggestions:")
-                print(f"   • Vérifiez l'orthographe du ticker")
-                print(f"   • Assurez-vous que c'est une action cotée aux USA")
-                print(f"   • Exemples de tickers valides: AAPL, MSFT, TSLA, GOOGL, AMZN")
-                print(f"   • Pour les actions non-US, ajoutez le suffixe (ex: MC.PA pour LVMH à Paris)")
+            if not is_quoted(self.info):
+                log_event(logger, logging.WARNING, 'fetch',
+                          "\n✗ ERREUR: Le ticker '%s' n'a pas été trouvé!\n"
+                          "\n💡 Suggestions:\n"
+                          "   • Vérifiez l'orthographe du ticker\n"
+                          "   • Assurez-vous que c'est une action cotée aux USA\n"
+                          "   • Exemples de tickers valides: AAPL, MSFT, TSLA, GOOGL, AMZN\n"
+                          "   • Pour les actions non-US, ajoutez le suffixe (ex: MC.PA pour LVMH à Paris)",
+                          self.ticker, ticker=self.ticker, stage='info', duration_ms=(time.perf_counter() - t0) * 1000,
+                          outcome='not_found')
                 return False
             
             self.sector = self.info.get('sector', 'Unknown')
             self.industry = self.info.get('industry', 'Unknown')
             
             if self.sector == 'Unknown' and not self.info.get('currentPrice'):
-                print(f"\n✗ ERREUR: Données insuffisantes pour '{self.ticker}'")
-                print(f"   Le ticker existe peut-être mais Yahoo Finance ne retourne pas assez de données.")
+                log_event(logger, logging.WARNING, 'fetch',
+                          "\n✗ ERREUR: Données insuffisantes pour '%s'\n"
+                          "   Le ticker existe peut-être mais Yahoo Finance ne retourne pas assez de données.",
+                          self.ticker, ticker=self.ticker, stage='info', duration_ms=(time.perf_counter() - t0) * 1000,
+                          outcome='insufficient')
                 return False
             
-            print(f"✓ Données récupérées pour {self.ticker}")
-            print(f"  Entreprise: {self.info.get('longName', 'N/A')}")
-            print(f"  Secteur: {self.sector}")
-            print(f"  Industrie: {self.industry}")
-            print(f"  Horizon: {self.horizon.upper()}\n")
+            log_event(logger, logging.INFO, 'fetch',
+                      "✓ Données récupérées pour %s\n"
+                      "  Entreprise: %s\n"
+                      "  Secteur: %s\n"
+                      "  Industrie: %s\n"
+                      "  Horizon: %s\n",
+                      self.ticker, self.info.get('longName', 'N/A'), self.sector, self.industry, self.horizon.upper(),
+                      ticker=self.ticker, stage='info', duration_ms=(time.perf_counter() - t0) * 1000,
+                      outcome='ok')
             
+            self._data_ok = True
             return True
             
         except Exception as e:
-            print(f"\n✗ ERREUR lors de la récupération des données:")
-            print(f"   {str(e)}")
-            print(f"\n💡 Vérifiez votre connexion internet et que le ticker '{self.ticker}' est valide.")
+            self.fetch_error = e
+            log_event(logger, logging.ERROR, 'fetch',
+                      "\n✗ ERREUR lors de la récupération des données:\n"
+                      "   %s\n"
+                      "\n💡 Vérifiez votre connexion internet et que le ticker '%s' est valide.",
+                      e, self.ticker, ticker=self.ticker, stage='info', duration_ms=(time.perf_counter() - t0) * 1000,
+                      outcome='error', error=f"{type(e).__name__}: {e}")
             return False
     
     def search_ticker(self, company_name):
@@ -200,17 +371,21 @@ class StockScorer:
         
         if normalized_name in common_names:
             ticker = common_names[normalized_name]
-            print(f"✓ '{company_name}' trouvé → Ticker: {ticker}")
+            log_event(logger, logging.INFO, 'search', "✓ '%s' trouvé → Ticker: %s", company_name, ticker,
+                      query=company_name, ticker=ticker, outcome='alias')
             return ticker
         
         # Si c'est déjà un ticker (court et en majuscules ou contient un point pour les marchés étrangers)
         if len(company_name) <= 6 and (company_name.isupper() or '.' in company_name):
-            print(f"✓ '{company_name}' semble être un ticker → Utilisation directe")
+            log_event(logger, logging.INFO, 'search', "✓ '%s' semble être un ticker → Utilisation directe", company_name,
+                      query=company_name, ticker=company_name.upper(), outcome='ticker')
             return company_name.upper()
         
         # Sinon, on essaie de chercher via yfinance (optionnel, peut être lent)
-        print(f"⚠️ '{company_name}' non reconnu dans la base de données.")
-        print(f"💡 Essayez d'entrer directement le ticker (ex: AAPL pour Apple)")
+        log_event(logger, logging.WARNING, 'search',
+                  "⚠️ '%s' non reconnu dans la base de données.\n"
+                  "💡 Essayez d'entrer directement le ticker (ex: AAPL pour Apple)", company_name,
+                  query=company_name, outcome='unknown')
         return None
     
     def safe_get(self, key, default='N/A'):
@@ -218,10 +393,11 @@ class StockScorer:
         value = self.info.get(key, default)
         return value if value is not None else default
     
+    @_timed
     def score_momentum_6m(self):
         """Score basé sur la performance des 6 derniers mois"""
         try:
-            hist = self.stock.history(period="6mo")
+            hist = self.get_history("6mo")
             if hist.empty or len(hist) < 2:
                 return 5.0
             
@@ -247,13 +423,14 @@ class StockScorer:
                 return 2.5
             else:
                 return 1.0
-        except:
+        except Exception:
             return 5.0
     
+    @_timed
     def score_momentum_3m(self):
         """Score basé sur la performance des 3 derniers mois"""
         try:
-            hist = self.stock.history(period="3mo")
+            hist = self.get_history("3mo")
             if hist.empty or len(hist) < 2:
                 return 5.0
             
@@ -277,13 +454,14 @@ class StockScorer:
                 return 3.0
             else:
                 return 1.5
-        except:
+        except Exception:
             return 5.0
     
+    @_timed
     def score_rsi(self):
         """Score basé sur le RSI (14 jours)"""
         try:
-            hist = self.stock.history(period="3mo")
+            hist = self.get_history("3mo")
             if hist.empty or len(hist) < 15:
                 return 5.0
             
@@ -310,13 +488,14 @@ class StockScorer:
                 return 4.0 - (current_rsi - 60) / 10
             else:
                 return max(0, 3.0 - (current_rsi - 70) / 10)
-        except:
+        except Exception:
             return 5.0
     
+    @_timed
     def score_volume_trend(self):
         """Score basé sur la tendance de volume"""
         try:
-            hist = self.stock.history(period="3mo")
+            hist = self.get_history("3mo")
             if hist.empty or len(hist) < 20:
                 return 5.0
             
@@ -342,9 +521,10 @@ class StockScorer:
                 return 4.0
             else:
                 return 3.0
-        except:
+        except Exception:
             return 5.0
     
+    @_timed
     def score_pe_ratio(self):
         """Score basé sur le Price-to-Earnings Ratio"""
         pe = self.safe_get('trailingPE') or self.safe_get('forwardPE')
@@ -367,6 +547,7 @@ class StockScorer:
         else:
             return 1.0
     
+    @_timed
     def score_peg_ratio(self):
         """Score basé sur le PEG Ratio"""
         peg = self.safe_get('pegRatio')
@@ -387,6 +568,7 @@ class StockScorer:
         else:
             return 1.5
     
+    @_timed
     def score_revenue_growth(self):
         """Score basé sur la croissance du chiffre d'affaires"""
         growth = self.safe_get('revenueGrowth')
@@ -413,6 +595,7 @@ class StockScorer:
         else:
             return 1.0
     
+    @_timed
     def score_profit_margins(self):
         """Score basé sur les marges bénéficiaires"""
         margin = self.safe_get('profitMargins')
@@ -437,6 +620,7 @@ class StockScorer:
         else:
             return 2.0
     
+    @_timed
     def score_operating_margin(self):
         """Score basé sur la marge opérationnelle"""
         margin = self.safe_get('operatingMargins')
@@ -461,6 +645,7 @@ class StockScorer:
         else:
             return 2.5
     
+    @_timed
     def score_roe(self):
         """Score basé sur le Return on Equity"""
         roe = self.safe_get('returnOnEquity')
@@ -485,6 +670,7 @@ class StockScorer:
         else:
             return 2.0
     
+    @_timed
     def score_roa(self):
         """Score basé sur le Return on Assets"""
         roa = self.safe_get('returnOnAssets')
@@ -509,6 +695,7 @@ class StockScorer:
         else:
             return 2.0
     
+    @_timed
     def score_debt_to_equity(self):
         """Score basé sur le ratio Dette/Capitaux Propres"""
         debt_to_equity = self.safe_get('debtToEquity')
@@ -533,6 +720,7 @@ class StockScorer:
         else:
             return 1.5
     
+    @_timed
     def score_debt_to_assets(self):
         """Score basé sur le ratio Dette/Actifs"""
         try:
@@ -558,9 +746,10 @@ class StockScorer:
                 return 4.5
             else:
                 return 2.5
-        except:
+        except Exception:
             return 5.0
     
+    @_timed
     def score_current_ratio(self):
         """Score basé sur le ratio de liquidité (Current Ratio)"""
         current_ratio = self.safe_get('currentRatio')
@@ -583,6 +772,7 @@ class StockScorer:
         else:
             return 2.0
     
+    @_timed
     def score_free_cash_flow(self):
         """Score basé sur le Free Cash Flow"""
         fcf = self.safe_get('freeCashflow')
@@ -605,6 +795,7 @@ class StockScorer:
         else:
             return 2.0
     
+    @_timed
     def score_dividend_yield(self):
         """Score basé sur le rendement du dividende"""
         div_yield = self.safe_get('dividendYield')
@@ -627,10 +818,11 @@ class StockScorer:
         else:
             return 5.0
     
+    @_timed
     def score_dividend_growth(self):
         """Score basé sur la croissance du dividende (5 ans)"""
         try:
-            dividends = self.stock.dividends
+            dividends = self.get_dividends()
             if dividends.empty or len(dividends) < 2:
                 return 5.0
             
@@ -656,9 +848,10 @@ class StockScorer:
                 return 5.5
             else:
                 return 3.0
-        except:
+        except Exception:
             return 5.0
     
+    @_timed
     def score_price_to_book(self):
         """Score basé sur le Price-to-Book Ratio"""
         pb = self.safe_get('priceToBook')
@@ -681,6 +874,7 @@ class StockScorer:
         else:
             return 2.5
     
+    @_timed
     def score_beta(self):
         """Score basé sur le Beta (volatilité par rapport au marché)"""
         beta = self.safe_get('beta')
@@ -707,7 +901,20 @@ class StockScorer:
         """
         Calcule le score final en fonction du secteur et de l'horizon
         """
-        if not self.fetch_data():
+        t0 = time.perf_counter()
+        score = None
+        try:
+            score = self._calculate_score()
+            return score
+        finally:
+            duration = time.perf_counter() - t0
+            self.timings.add('calculate_score', 'total', duration)
+            log_event(logger, logging.DEBUG, 'score', ticker=self.ticker, stage='calculate_score',
+                      duration_ms=duration * 1000, horizon=self.horizon,
+                      outcome='ok' if score is not None else ('error' if self.fetch_error else 'not_found'))
+    
+    def _calculate_score(self):
+        if not self._data_ok and not self.fetch_data():
             return None
         
         weighted_scores = []
@@ -1031,6 +1238,8 @@ class StockScorer:
 def main():
     """Fonction principale pour tester l'algorithme"""
     
+    configure_cli_logging()
+    
     print("\n" + "="*70)
     print(" ALGORITHME DE NOTATION DES ACTIONS BOURSIÈRES ".center(70))
     print(" Échelle: 0-40 (Nul) | 40-70 (Moyen) | 70-100 (Bon) ".center(70))
@@ -1081,4 +1290,9 @@ def main():
 
 
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        # Mode non interactif : python Algorithmev1.py batch -i tickers.txt ...
+        from notation_lot import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
     main()
@@ -1,16 +1,35 @@
 import streamlit as st
 import sys, os
-import yfinance as yf
 import pandas as pd
 import time
+import uuid
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
 sys.path.insert(0, os.path.dirname(__file__))
 from Algorithmev1 import StockScorer
+from cache_donnees import cached
+from univers import TOP_STOCKS
+from chargement_concurrent import DEFAULT_DEADLINE, complete_in_background, iter_batches
+from donnees_marche import fetch_stock_row
+from historique_prix import get_chart_series
+from service_notation import get_client
+from snapshot_univers import load_latest_snapshot, snapshot_ranking
+from metriques import RANKING_LATE, render_timer, start_exporters_from_env
+from profilage import finish_profiling, start_profiling
+from budget_rendu import (clear_render_budget, fetch_within_budget, finish_render_budget, render_deadline,
+                          start_render_budget)
+from enregistrements import RankingTable, StockRecord
+from ordonnanceur import INTERACTIVE, VISIBLE, set_fetch_priority
+from screener import ALIASES, ScreenerError, load_screener, screen
 
 st.set_page_config(page_title="Analyseur Actions Boursières", page_icon="📈", layout="wide")
 
+# Profilage de cet affichage (admin : PROFILING_ENABLED=1, puis ?profile=1 ou barre latérale)
+profiler = start_profiling('onglets')
+# Budget laissé par un affichage interrompu (st.rerun) : la page d'analyse ne doit pas le consommer
+clear_render_budget()
+
 # --- GESTION DE L'ÉTAT ---
 if 'selected_stock' not in st.session_state: st.session_state.selected_stock = None
 if 'selected_horizon' not in st.session_state: st.session_state.selected_horizon = 'long'
@@ -27,38 +46,34 @@ st.title("📈 Analyseur d'Actions Boursières")
 # ---------------------------------------------------------
 # DONNÉES ET UTILITAIRES
 # ---------------------------------------------------------
-MAJOR_STOCKS = [
-    "AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "NFLX", "AMD", "INTC",
-    "ADBE", "CRM", "ORCL", "CSCO", "AVGO", "QCOM", "TXN", "INTU", "NOW", "SNOW",
-    "PLTR", "UBER", "ABNB", "CRWD", "PANW", "JPM", "BAC", "WFC", "GS", "MS",
-    "V", "MA", "AXP", "C", "BLK", "UNH", "JNJ", "LLY", "ABBV", "MRK",
-    "TMO", "ABT", "DHR", "PFE", "BMY", "WMT", "HD", "MCD", "NKE", "SBUX",
-    "DIS", "COST", "TGT", "LOW", "PG", "KO", "PEP", "XOM", "CVX", "COP",
-    "BA", "CAT", "GE", "HON", "UPS", "T", "VZ", "TMUS", "TSM", "ASML"
-]
-
-@st.cache_data(ttl=300)
+MAJOR_STOCKS = TOP_STOCKS
+
+# Service de notation partagé (SCORING_SERVICE_URL), sinon appels Yahoo directs
+scoring_client = get_client()
+
+# Exposition des métriques Prometheus (METRICS_PORT / METRICS_TEXTFILE), une fois par processus
+start_exporters_from_env()
+
+@cached('onglets', ttl=300)
 def get_stock_data(ticker):
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        hist = stock.history(period="3mo")
-        if hist.empty or not info: return None
-        current_price = info.get('currentPrice') or info.get('regularMarketPrice') or (hist['Close'][-1] if not hist.empty else None)
-        market_cap = info.get('marketCap', 0)
-        if not current_price or current_price <= 0: return None
-        
-        perf_1d = ((hist['Close'][-1] - hist['Close'][-2]) / hist['Close'][-2] * 100) if len(hist) >= 2 else 0
-        perf_7d = ((hist['Close'][-1] - hist['Close'][-6]) / hist['Close'][-6] * 100) if len(hist) >= 6 else 0
-        perf_30d = ((hist['Close'][-1] - hist['Close'][-22]) / hist['Close'][-22] * 100) if len(hist) >= 22 else 0
-        perf_1y = info.get('52WeekChange', 0) * 100
-        
-        return {
-            'ticker': ticker, 'name': info.get('longName', ticker), 'price': current_price,
-            'market_cap': market_cap, 'perf_1d': perf_1d, 'perf_7d': perf_7d,
-            'perf_30d': perf_30d, 'perf_1y': perf_1y
-        }
-    except: return None
+    # Même ligne que la page Classements (donnees_marche) : enregistrement compact et immuable, partagé sans copie par le cache
+    row = scoring_client.snapshot([ticker])[0] if scoring_client else fetch_stock_row(ticker)
+    return StockRecord.from_row(row) if row and (row['price'] or 0) > 0 else None
+
+def get_stock_row(ticker):
+    # (enregistrement, périmé) dans la limite du budget de l'affichage
+    record, stale = fetch_within_budget(get_stock_data, ticker)
+    return (record, stale) if record else None
+
+LATE_WAIT_SECONDS = 60
+
+@st.fragment(run_every=2)
+def watch_late_rows(late, since):
+    # Relance l'affichage dès que les actions en retard sont arrivées dans le cache, ou à la fin
+    # de l'attente : le rerun complet n'appelle plus le fragment, qui cesse alors de se relancer
+    missing = [t for t in late if not get_stock_data.is_cached(t)]
+    if not missing or time.monotonic() - since >= LATE_WAIT_SECONDS: st.rerun()
+    st.caption(f"⏳ {len(missing)} actions en retard, chargées en arrière-plan : le classement se complétera automatiquement")
 
 def format_large_number(num):
     if num >= 1e12: return f"${num/1e12:.2f}T"
@@ -67,7 +82,7 @@ def format_large_number(num):
     else: return f"${num:,.0f}"
 
 def format_percentage(value):
-    if value is None: return "N/A"
+    if value is None or pd.isna(value): return "N/A"
     if value > 0: return f'<span style="color: #00CC00;">▲ {value:.2f}%</span>'
     elif value < 0: return f'<span style="color: #FF4B4B;">▼ {abs(value):.2f}%</span>'
     else: return f'<span style="color: #888888;">• {value:.2f}%</span>'
@@ -105,10 +120,10 @@ def get_calculation_details(scorer, indicator_name, score_val):
     info = scorer.info
     def fmt_pct(v): 
         try: return f"{float(v)*100:.2f}%" if v is not None else "N/A"
-        except: return "N/A"
+        except (TypeError, ValueError): return "N/A"
     def fmt_num(v):
         try: return f"{float(v):,.2f}" if v is not None else "N/A"
-        except: return "N/A"
+        except (TypeError, ValueError): return "N/A"
 
     base_details = {
         "Momentum 6M": f"**Momentum 6 Mois ({score_val:.1f}/10)**\n- Prix actuel : ${info.get('currentPrice', 'N/A')}\n- Plus haut 52s : ${info.get('fiftyTwoWeekHigh', 'N/A')}",
@@ -131,6 +146,70 @@ def get_calculation_details(scorer, indicator_name, score_val):
     }
     return base_details.get(indicator_name, "Détails non disponibles.")
 
+# --- GRAPHIQUE DE PRIX ---
+PERIOD_OPTIONS = [("1S","5d"),("1M","1mo"),("3M","3mo"),("6M","6mo"),("1A","1y"),("5A","5y"), ("MAX", "max")]
+CHART_TARGET_POINTS = 1000   # ~ largeur du graphique en pixels
+WEBGL_MIN_POINTS = 2000      # au-delà, rendu WebGL (Scattergl)
+
+@st.fragment
+def render_price_chart(ticker):
+    """
+    Graphique de prix isolé : un changement de période ne relance que ce fragment (ni scoring, ni .info)
+    Toutes les périodes sont découpées dans le même historique complet en cache
+    """
+    col_title, col_btns_spacer, col_btns = st.columns([1.5, 3.5, 3])
+    with col_title:
+        st.markdown("### 📈 Évolution Prix")
+    
+    if 'sel_per' not in st.session_state: st.session_state.sel_per = "1A"
+    
+    with col_btns:
+        cols_btns_inner = st.columns(len(PERIOD_OPTIONS), gap="small")
+        for i, (l, c) in enumerate(PERIOD_OPTIONS):
+            with cols_btns_inner[i]:
+                if st.button(l, key=f"p_{l}", type="primary" if st.session_state.sel_per==l else "secondary", use_container_width=True):
+                    st.session_state.sel_per = l
+                    st.rerun(scope="fragment")
+            
+    sel_code = dict(PERIOD_OPTIONS)[st.session_state.sel_per]
+    close = get_chart_series(ticker, sel_code, CHART_TARGET_POINTS)
+    
+    if not close.empty:
+        y_min = close.min()
+        y_max = close.max()
+        margin = (y_max - y_min) * 0.05
+        y_range = [y_min - margin, y_max + margin]
+
+        perf = ((close.iloc[-1] - close.iloc[0])/close.iloc[0])*100
+        if perf > 0:
+            line_col = '#00CC00'
+            fill_col = 'rgba(0, 204, 0, 0.1)'
+        else:
+            line_col = '#FF4B4B'
+            fill_col = 'rgba(255, 75, 75, 0.1)'
+            
+        fig = go.Figure()
+        trace = go.Scattergl if len(close) > WEBGL_MIN_POINTS else go.Scatter
+        fig.add_trace(trace(x=close.index, y=close, mode='lines', line=dict(color=line_col, width=2), fill='tozeroy', fillcolor=fill_col))
+        fig.update_layout(height=400, margin=dict(l=0,r=0,t=10,b=0), showlegend=False, yaxis=dict(range=y_range))
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
+def render_timings_panel(scorer):
+    """Panneau de debug : durée de chaque accès aux données et de chaque score, hits/miss du cache"""
+    timings = getattr(scorer, 'timings', None)
+    if timings is None: return
+    with st.expander("🐞 Mesures de performance", expanded=True):
+        counts = timings.cache_counts()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Données", f"{timings.total('fetch')*1000:.0f} ms")
+        c2.metric("Scores", f"{timings.total('score')*1000:.0f} ms")
+        c3.metric("Cache", f"{counts['hit'] + counts['memo']} hit / {counts['miss']} miss")
+        df = pd.DataFrame(timings.records)
+        if not df.empty:
+            df['duration'] = (df['duration'] * 1000).round(2)
+            st.dataframe(df.rename(columns={'stage': 'Étape', 'kind': 'Type', 'duration': 'Durée (ms)', 'cache': 'Cache'}),
+                         hide_index=True, use_container_width=True)
+
 # --- PAGE D'ANALYSE ---
 def show_analysis_page(company_ticker, horizon_code):
     if st.session_state.origin == 'ranking':
@@ -142,7 +221,7 @@ def show_analysis_page(company_ticker, horizon_code):
 
     with st.spinner(f"Analyse de {company_ticker}..."):
         try:
-            scorer = StockScorer(company_ticker, horizon_code)
+            scorer = scoring_client.scorer(company_ticker, horizon_code) if scoring_client else StockScorer(company_ticker, horizon_code)
             if not scorer.fetch_data():
                 st.error(f"❌ Ticker '{company_ticker}' introuvable.")
                 return
@@ -240,42 +319,11 @@ def show_analysis_page(company_ticker, horizon_code):
             
             st.markdown("---")
             
-            col_title, col_btns_spacer, col_btns = st.columns([1.5, 3.5, 3])
-            with col_title:
-                st.markdown("### 📈 Évolution Prix")
-            
-            per_opts = [("1S","5d"),("1M","1mo"),("3M","3mo"),("6M","6mo"),("1A","1y"),("5A","5y"), ("MAX", "max")]
-            if 'sel_per' not in st.session_state: st.session_state.sel_per = "1A"
-            
-            with col_btns:
-                cols_btns_inner = st.columns(len(per_opts), gap="small")
-                for i, (l, c) in enumerate(per_opts):
-                    with cols_btns_inner[i]:
-                        if st.button(l, key=f"p_{l}", type="primary" if st.session_state.sel_per==l else "secondary", use_container_width=True):
-                            st.session_state.sel_per = l
-                            st.rerun()
-                    
-            sel_code = dict(per_opts)[st.session_state.sel_per]
-            hist = final.stock.history(period=sel_code)
-            
-            if not hist.empty:
-                y_min = hist['Close'].min()
-                y_max = hist['Close'].max()
-                margin = (y_max - y_min) * 0.05
-                y_range = [y_min - margin, y_max + margin]
-
-                perf = ((hist['Close'][-1] - hist['Close'][0])/hist['Close'][0])*100
-                if perf > 0:
-                    line_col = '#00CC00'
-                    fill_col = 'rgba(0, 204, 0, 0.1)'
-                else:
-                    line_col = '#FF4B4B'
-                    fill_col = 'rgba(255, 75, 75, 0.1)'
-                    
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(x=hist.index, y=hist['Close'], mode='lines', line=dict(color=line_col, width=2), fill='tozeroy', fillcolor=fill_col))
-                fig.update_layout(height=400, margin=dict(l=0,r=0,t=10,b=0), showlegend=False, yaxis=dict(range=y_range))
-                st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+            if st.query_params.get('debug') == '1' or st.sidebar.toggle("🐞 Mesures de performance", key='debug_timings'):
+                render_timings_panel(final)
+                st.markdown("---")
+
+            render_price_chart(company_ticker)
 
         except Exception as e:
             st.error(f"Erreur: {e}")
@@ -283,7 +331,7 @@ def show_analysis_page(company_ticker, horizon_code):
 # ---------------------------------------------------------
 # FONCTION D'AFFICHAGE LIGNE
 # ---------------------------------------------------------
-def display_row(rank, ticker, name, price, mcap, p1d, p7d, p30d, p1y, is_header=False, list_suffix=""):
+def display_row(rank, ticker, name, price, mcap, p1d, p7d, p30d, p1y, is_header=False, list_suffix="", stale=False):
     cols = st.columns([0.4, 0.8, 2, 1, 1.2, 1, 1, 1, 1])
     
     if is_header:
@@ -305,7 +353,7 @@ def display_row(rank, ticker, name, price, mcap, p1d, p7d, p30d, p1y, is_header=
             st.session_state.origin = 'ranking'
             st.rerun()
             
-        cols[2].markdown(f"<span class='row-text' style='color:#555;'>{name[:20]}</span>", unsafe_allow_html=True)
+        cols[2].markdown(f"<span class='row-text' style='color:#555;'>{name[:20]}{' 🕒' if stale else ''}</span>", unsafe_allow_html=True)
         cols[3].markdown(f"<span class='row-text'>${price:.2f}</span>", unsafe_allow_html=True)
         cols[4].markdown(f"<span class='row-text'>{format_large_number(mcap)}</span>", unsafe_allow_html=True)
         cols[5].markdown(f"<span class='row-text'>{format_percentage(p1d)}</span>", unsafe_allow_html=True)
@@ -314,98 +362,187 @@ def display_row(rank, ticker, name, price, mcap, p1d, p7d, p30d, p1y, is_header=
         cols[8].markdown(f"<span class='row-text'>{format_percentage(p1y)}</span>", unsafe_allow_html=True)
         st.markdown("<hr class='row-divider'>", unsafe_allow_html=True)
 
-def render_ranking(sort_col, ascending, list_name):
-    with st.spinner("Chargement..."):
-        data = []
-        prog = st.progress(0)
-        for i, t in enumerate(MAJOR_STOCKS):
-            d = get_stock_data(t)
-            if d: data.append(d)
-            prog.progress((i+1)/len(MAJOR_STOCKS))
-        prog.empty()
-        
-        df = pd.DataFrame(data)
-        if not df.empty:
-            df = df.sort_values(sort_col, ascending=ascending).reset_index(drop=True)
-            display_row(0,0,0,0,0,0,0,0,0, is_header=True, list_suffix=list_name)
-            for i, r in df.head(50).iterrows():
-                display_row(i+1, r['ticker'], r['name'], r['price'], r['market_cap'], r['perf_1d'], r['perf_7d'], r['perf_30d'], r['perf_1y'], list_suffix=list_name)
+PARTIAL_COLUMNS = {'ticker': 'Ticker', 'name': 'Nom', 'price': 'Prix', 'market_cap': 'Cap.',
+                   'perf_1d': '24h', 'perf_7d': '1 Sem', 'perf_30d': '1 Mois', 'perf_1y': '1 An'}
+
+def load_ranking_data(sort_col, ascending):
+    # Chargé une fois par exécution, puis trié pour chaque onglet
+    # Snapshot nocturne mappé en mémoire s'il existe : aucun appel réseau
+    snapshot = load_latest_snapshot()
+    if snapshot is not None:
+        table = snapshot_ranking(snapshot, MAJOR_STOCKS)
+        if not table.empty: return table
+    
+    # Sinon classement partiel affiché au fil des lots, remplacé par les lignes cliquables à la fin
+    records, stale, late = [], [], []
+    prog = st.progress(0)
+    partial = st.empty()
+    loaded = 0
+    # Au-delà de l'échéance (comptée depuis le début de l'affichage), les actions en retard sont terminées en arrière-plan
+    for batch in iter_batches(get_stock_row, MAJOR_STOCKS, deadline=render_deadline(DEFAULT_DEADLINE), late=late):
+        loaded += len(batch)
+        for _, item in batch:
+            if item: records.append(item[0]); stale.append(item[1])
+        prog.progress(loaded/len(MAJOR_STOCKS))
+        if records and loaded < len(MAJOR_STOCKS):
+            pdf = RankingTable.from_records(records).top_frame(sort_col, 50, ascending)
+            partial.dataframe(pdf[list(PARTIAL_COLUMNS)].rename(columns=PARTIAL_COLUMNS), hide_index=True, use_container_width=True)
+    prog.empty()
+    partial.empty()
+    table = RankingTable.from_records(records, stale)
+    if table.stale.any(): st.caption(f"🕒 {int(table.stale.sum())} actions affichées depuis le cache (données antérieures) : budget d'appels atteint ou Yahoo indisponible")
+    if late:
+        RANKING_LATE.labels('onglets').inc(len(late))
+        complete_in_background(get_stock_data, late)
+        # Fenêtre d'attente ouverte au premier retard, refermée dès qu'un affichage est complet
+        since = st.session_state.setdefault('late_since', time.monotonic())
+        if time.monotonic() - since < LATE_WAIT_SECONDS: watch_late_rows(late, since)
+        else: st.caption(f"⚠️ {len(late)} actions indisponibles pour le moment")
+    else: st.session_state.pop('late_since', None)
+    return table
+
+def render_ranking(table, sort_col, ascending, list_name):
+    if not table.empty:
+        # Tri sur la colonne NumPy ; seules les 50 lignes affichées deviennent un DataFrame (rangs 1..50)
+        df = table.top_frame(sort_col, 50, ascending)
+        display_row(0,0,0,0,0,0,0,0,0, is_header=True, list_suffix=list_name)
+        for i, r in df.iterrows():
+            display_row(i, r['ticker'], r['name'], r['price'], r['market_cap'], r['perf_1d'], r['perf_7d'], r['perf_30d'], r['perf_1y'], list_suffix=list_name, stale=r.get('stale', False))
+
+# ---------------------------------------------------------
+# SCREENER (snapshot de l'univers, sans appel Yahoo)
+# ---------------------------------------------------------
+SCREENER_EXAMPLES = {
+    "💶 Value rentable en Europe": "pe < 15 and roe > 20% and debt_equity < 50 and region == 'Europe'",
+    "🚀 Croissance rentable": "growth > 15% and margin > 10% and peg < 2",
+    "💰 Rendement défensif": "div_yield > 3 and beta < 1 and current_ratio > 1",
+    "📈 Momentum": "perf_1y > 20 and perf_30d > 0 and score_court > 60",
+    "✏️ Vide": "",
+}
+
+def render_screener():
+    index = load_screener()
+    if index is None:
+        st.info("Aucun snapshot de l'univers : lancer `python snapshot_univers.py` pour activer le screener.")
+        return
+    example = st.selectbox("Exemples", list(SCREENER_EXAMPLES))
+    # La clé suit l'exemple : en choisir un autre remplace le filtre saisi
+    expression = st.text_input("Filtre", value=SCREENER_EXAMPLES[example], key=f"screen_{example}",
+                               help="Ex: pe < 15 and roe > 20% and sector in ['Technology', 'Healthcare']")
+    numeric = sorted(index.numeric)
+    c_sort, c_order, c_k = st.columns([2, 1, 1])
+    sort_by = c_sort.selectbox("Trier par", numeric, index=numeric.index('score_long') if 'score_long' in numeric else 0)
+    ascending = c_order.radio("Ordre", ["Décroissant", "Croissant"], horizontal=True) == "Croissant"
+    k = c_k.number_input("Résultats", min_value=1, max_value=1000, value=50, step=10)
+    try:
+        frame, total, elapsed = screen(index, expression, sort_by, int(k), ascending)
+    except ScreenerError as e:
+        st.error(f"❌ {e}")
+        return
+    st.caption(f"{total} actions sur {index.size} retenues en {elapsed * 1000:.1f} ms")
+    st.dataframe(frame, use_container_width=True)
+    if not frame.empty:
+        c_pick, c_btn = st.columns([3, 1], vertical_alignment="bottom")
+        pick = c_pick.selectbox("Analyser une action", frame['ticker'])
+        if c_btn.button("🚀 Analyser", use_container_width=True):
+            st.session_state.selected_stock = pick
+            st.session_state.origin = 'ranking'
+            st.rerun()
+    with st.expander("ℹ️ Champs disponibles"):
+        st.markdown("**Alias** : " + ", ".join(f"`{a}` ({c})" for a, c in ALIASES.items()))
+        st.markdown("**Champs** : " + ", ".join(f"`{f}`" for f in index.fields))
+        st.markdown("Régions : `Amérique du Nord`, `Europe`, `Asie-Pacifique`, `Autre` · `20%` vaut 0.20 · "
+                    "une valeur manquante écarte l'action")
 
 # ============================
 # ORCHESTRATION PRINCIPALE
 # ============================
 
+# Une analyse demandée passe devant les classements et les traitements de fond (ordonnanceur)
+fetch_session = st.session_state.setdefault('fetch_session', uuid.uuid4().hex)
 if st.session_state.selected_stock:
-    show_analysis_page(st.session_state.selected_stock, st.session_state.selected_horizon)
+    set_fetch_priority(INTERACTIVE, fetch_session)
+    with render_timer('onglets', 'analyse_detail'):
+        show_analysis_page(st.session_state.selected_stock, st.session_state.selected_horizon)
 else:
-    tab_analyse, tab_top100, tab_perf_pos, tab_perf_neg = st.tabs([
-        "🔍 Analyse Complète", "🏆 Top 100", "📈 Top Hausses", "📉 Top Baisses"
-    ])
+    # Budget d'appels Yahoo et de temps des classements de cet affichage
+    render_budget = start_render_budget('onglets')
+    # Clos même si un st.rerun() interrompt l'affichage
+    try:
+        set_fetch_priority(VISIBLE, fetch_session)
+        tab_analyse, tab_top100, tab_perf_pos, tab_perf_neg, tab_screener = st.tabs([
+            "🔍 Analyse Complète", "🏆 Top 100", "📈 Top Hausses", "📉 Top Baisses", "🧮 Screener"
+        ])
 
-    with tab_analyse:
-        # Centrage du titre de recherche avec style
-        st.markdown("<h2 style='text-align: center;'>🔍 Démarrez l'Analyse</h2>", unsafe_allow_html=True)
-        st.write("") # Espace
+        with tab_analyse, render_timer('onglets', 'analyse'):
+            # Centrage du titre de recherche avec style
+            st.markdown("<h2 style='text-align: center;'>🔍 Démarrez l'Analyse</h2>", unsafe_allow_html=True)
+            st.write("") # Espace
 
-        # 1. Centrage du bloc avec des colonnes
-        _, c_main, _ = st.columns([1, 6, 1])
+            # 1. Centrage du bloc avec des colonnes
+            _, c_main, _ = st.columns([1, 6, 1])
         
-        with c_main:
-            # Pas de bordure Streamlit st.container(border=True) pour éviter le double cadre
-            # Seul le form aura une bordure
-            with st.form(key='search_form', clear_on_submit=False):
+            with c_main:
+                # Pas de bordure Streamlit st.container(border=True) pour éviter le double cadre
+                # Seul le form aura une bordure
+                with st.form(key='search_form', clear_on_submit=False):
                 
-                # LIGNE 1: Input Texte (Label visible)
-                ticker_input = st.text_input("Ticker de l'action", placeholder="Ex: AAPL, NVIDIA, Total...", help="Entrez le symbole")
+                    # LIGNE 1: Input Texte (Label visible)
+                    ticker_input = st.text_input("Ticker de l'action", placeholder="Ex: AAPL, NVIDIA, Total...", help="Entrez le symbole")
                 
-                st.write("") # Petit espace
+                    st.write("") # Petit espace
                 
-                # LIGNE 2: Horizon (Gauche) + Bouton (Droite)
-                # 50/50 pour que le bouton ait de la place
-                c_opt, c_btn = st.columns([1, 1], vertical_alignment="bottom")
+                    # LIGNE 2: Horizon (Gauche) + Bouton (Droite)
+                    # 50/50 pour que le bouton ait de la place
+                    c_opt, c_btn = st.columns([1, 1], vertical_alignment="bottom")
                 
-                with c_opt:
-                    horizon = st.radio("Horizon d'investissement", ["Court terme", "Long terme"], index=1, horizontal=True)
+                    with c_opt:
+                        horizon = st.radio("Horizon d'investissement", ["Court terme", "Long terme"], index=1, horizontal=True)
                     
-                with c_btn:
-                    submit_search = st.form_submit_button("🚀 Lancer l'analyse", type="primary", use_container_width=True)
+                    with c_btn:
+                        submit_search = st.form_submit_button("🚀 Lancer l'analyse", type="primary", use_container_width=True)
                 
-                if submit_search and ticker_input:
-                    st.session_state.selected_stock = ticker_input.strip().upper()
-                    st.session_state.selected_horizon = 'court' if 'Court' in horizon else 'long'
-                    st.session_state.origin = 'search'
-                    st.rerun()
-
-        st.markdown("---")
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            st.header("ℹ️ Comment ça marche ?")
-            st.markdown("""
-            **L'Analyseur** évalue la santé financière selon :
-            1. 🏢 **Secteur**
-            2. ⏰ **Horizon**
-            3. 📊 **100+ Indicateurs**
-            """)
-            ca, cb, cc = st.columns(3)
-            ca.success("**70-100**\n\n🟢 Bon")
-            cb.warning("**40-70**\n\n🟡 Moyen")
-            cc.error("**0-40**\n\n🔴 Éviter")
-        with col2:
-            st.header("💡 Exemples")
-            st.info("🍎 **AAPL** (Apple)")
-            st.info("⚡ **TSLA** (Tesla)")
-            st.info("🛢️ **TTE** (TotalEnergies)")
-            st.info("🏦 **JPM** (JPMorgan)")
+                    if submit_search and ticker_input:
+                        st.session_state.selected_stock = ticker_input.strip().upper()
+                        st.session_state.selected_horizon = 'court' if 'Court' in horizon else 'long'
+                        st.session_state.origin = 'search'
+                        st.rerun()
+
+            st.markdown("---")
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                st.header("ℹ️ Comment ça marche ?")
+                st.markdown("""
+                **L'Analyseur** évalue la santé financière selon :
+                1. 🏢 **Secteur**
+                2. ⏰ **Horizon**
+                3. 📊 **100+ Indicateurs**
+                """)
+                ca, cb, cc = st.columns(3)
+                ca.success("**70-100**\n\n🟢 Bon")
+                cb.warning("**40-70**\n\n🟡 Moyen")
+                cc.error("**0-40**\n\n🔴 Éviter")
+            with col2:
+                st.header("💡 Exemples")
+                st.info("🍎 **AAPL** (Apple)")
+                st.info("⚡ **TSLA** (Tesla)")
+                st.info("🛢️ **TTE** (TotalEnergies)")
+                st.info("🏦 **JPM** (JPMorgan)")
         
-        st.markdown("---")
-        c1, c2, c3 = st.columns(3)
-        c1.metric("📊 Indicateurs", "100+")
-        c2.metric("🌍 Couverture", "Global")
-        c3.metric("⚡ Vitesse", "< 5 sec")
+            st.markdown("---")
+            c1, c2, c3 = st.columns(3)
+            c1.metric("📊 Indicateurs", "100+")
+            c2.metric("🌍 Couverture", "Global")
+            c3.metric("⚡ Vitesse", "< 5 sec")
 
-    with tab_top100: render_ranking('market_cap', False, "top100")
-    with tab_perf_pos: render_ranking('perf_1y', False, "gainers")
-    with tab_perf_neg: render_ranking('perf_1y', True, "losers")
+        with tab_top100, render_timer('onglets', 'top100'):
+            ranking = load_ranking_data('market_cap', False)
+            render_ranking(ranking, 'market_cap', False, "top100")
+        with tab_perf_pos, render_timer('onglets', 'hausses'): render_ranking(ranking, 'perf_1y', False, "gainers")
+        with tab_perf_neg, render_timer('onglets', 'baisses'): render_ranking(ranking, 'perf_1y', True, "losers")
+        with tab_screener, render_timer('onglets', 'screener'): render_screener()
+    finally:
+        finish_render_budget(render_budget)
 
 # ---------------------------------------------------------
 # CSS
@@ -442,3 +579,6 @@ st.markdown("""
     /* label[for^="st-radio"] div[data-testid="stWidgetLabel"] { display: none; } */
 </style>
 """, unsafe_allow_html=True)
+
+# Fin du profilage : tableau des fonctions coûteuses et profil téléchargeable
+finish_profiling(profiler)
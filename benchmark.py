@@ -0,0 +1,260 @@
+"""
+Benchmarks hors ligne
+Mesure la notation (un ticker, lots de 100 / 1 000 / 10 000), la construction du snapshot,
+la recherche de ticker et la préparation des tableaux de classement, sans réseau :
+données synthétiques déterministes (défaut) ou enregistrements rejoués
+
+Exemples:
+    python benchmark.py -o bench.json
+    python benchmark.py --baseline bench.json --threshold 0.2        # code de sortie 1 si régression
+    python benchmark.py --provider replay:fixtures -i univers.txt --sizes 100
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from Algorithmev1 import StockScorer
+from cache_donnees import DataCache
+from donnees_marche import fetch_stock_row
+from enregistrements import RankingTable, StockRecord
+from fournisseurs import SyntheticProvider, provider_from_env, set_provider
+from notation_lot import read_tickers, score_one
+from snapshot_univers import build_snapshot, open_snapshot, snapshot_ranking, write_snapshot
+
+# Seuils de régression propres à certains benchmarks (les autres utilisent --threshold) ;
+# les mesures très courtes sont plus bruitées
+THRESHOLDS = {
+    'search_ticker': 0.5,
+    'ranking_snapshot': 0.5,
+}
+
+# Colonnes de tri des onglets de classement (pages Classements et onglets)
+RANKING_SORTS = [('market_cap', False), ('perf_1y', False), ('perf_1y', True),
+                 ('dividend_yield', False), ('volume', False)]
+
+SEARCH_QUERIES = ['apple', 'Microsoft', 'google', 'AAPL', 'MC.PA', 'tesla', 'nvidia', 'Entreprise Inconnue',
+                  'berkshire', 'jpm', 'coca-cola', 'xyz corp']
+
+
+def _stats(durations):
+    """Statistiques d'une série de durées (secondes) en millisecondes"""
+    ms = sorted(d * 1000 for d in durations)
+    return {'runs': len(ms), 'min_ms': round(ms[0], 3), 'median_ms': round(statistics.median(ms), 3),
+            'p95_ms': round(ms[min(len(ms) - 1, int(0.95 * len(ms)))], 3), 'max_ms': round(ms[-1], 3)}
+
+
+def _measure(func, repeat, warmup=1):
+    """Exécute func warmup + repeat fois et renvoie les statistiques des mesures"""
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - t0)
+    return _stats(durations)
+
+
+# ---------------------------------------------------------
+# BENCHMARKS
+# ---------------------------------------------------------
+def bench_score_single(tickers, repeat):
+    """Latence de calculate_score pour un ticker, sans cache (données relues à chaque fois)"""
+    sample = tickers[:50]
+    state = {'i': 0}
+
+    def run():
+        ticker = sample[state['i'] % len(sample)]
+        state['i'] += 1
+        StockScorer(ticker, 'long').calculate_score()
+    return _measure(run, repeat * 20, warmup=5)
+
+
+def bench_batch(tickers, size, workers, repeat):
+    """Notation par lots (comme notation_lot) de size tickers, cache mémoire neuf à chaque passage"""
+    jobs = tickers[:size]
+
+    def run():
+        cache = DataCache(max_entries=50000)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda t: score_one(t, 'long', cache), jobs))
+    result = _measure(run, repeat, warmup=0)
+    result.update(tickers=len(jobs), tickers_per_s=round(len(jobs) / (result['median_ms'] / 1000), 1))
+    return result
+
+
+def bench_snapshot_build(tickers, size, workers, repeat):
+    """Construction, écriture et ouverture (mappage mémoire) d'un snapshot de size tickers"""
+    jobs = tickers[:size]
+    with tempfile.TemporaryDirectory() as directory:
+        def run():
+            table = build_snapshot(jobs, workers=workers)
+            open_snapshot(write_snapshot(table, directory, keep=1))
+        result = _measure(run, repeat, warmup=0)
+    result['tickers'] = len(jobs)
+    return result
+
+
+def bench_search_ticker(repeat):
+    """1 000 recherches de ticker par nom d'entreprise ou symbole"""
+    scorer = StockScorer('AAPL')
+    queries = (SEARCH_QUERIES * (1000 // len(SEARCH_QUERIES) + 1))[:1000]
+    return _measure(lambda: [scorer.search_ticker(q) for q in queries], repeat)
+
+
+def _sort_tables(table):
+    return [table.top_frame(col, 100, asc) for col, asc in RANKING_SORTS]
+
+
+def bench_ranking_rows(tickers, size, repeat):
+    """Préparation des classements depuis les enregistrements en cache (RankingTable + tris des onglets)"""
+    records = [StockRecord.from_row(r) for r in (fetch_stock_row(t) for t in tickers[:size]) if r]
+    result = _measure(lambda: _sort_tables(RankingTable.from_records(records)), repeat * 5)
+    result['tickers'] = len(records)
+    return result
+
+
+def bench_ranking_snapshot(tickers, size, repeat):
+    """Préparation des classements depuis un snapshot mappé en mémoire"""
+    jobs = tickers[:size]
+    with tempfile.TemporaryDirectory() as directory:
+        table = open_snapshot(write_snapshot(build_snapshot(jobs), directory, keep=1))
+        result = _measure(lambda: _sort_tables(snapshot_ranking(table, jobs)), repeat * 5)
+    result['tickers'] = len(jobs)
+    return result
+
+
+def run_benchmarks(tickers, sizes, workers=8, repeat=3, snapshot_size=500, only=None):
+    """
+    Exécute la suite
+
+    Args:
+        tickers (list): Univers de tickers disponibles chez le fournisseur courant
+        sizes (list): Tailles des lots de notation
+        only (set): Noms des benchmarks à exécuter (None = tous)
+
+    Returns:
+        dict: {nom: statistiques}
+    """
+    suite = [('score_single', lambda: bench_score_single(tickers, repeat))]
+    for size in sizes:
+        # Les gros lots ne sont mesurés qu'une fois
+        suite.append((f'batch_{size}', lambda size=size: bench_batch(tickers, size, workers,
+                                                                   repeat if size <= 1000 else 1)))
+    suite += [
+        ('snapshot_build', lambda: bench_snapshot_build(tickers, snapshot_size, workers, repeat)),
+        ('search_ticker', lambda: bench_search_ticker(repeat)),
+        ('ranking_rows', lambda: bench_ranking_rows(tickers, snapshot_size, repeat)),
+        ('ranking_snapshot', lambda: bench_ranking_snapshot(tickers, snapshot_size, repeat)),
+    ]
+    results = {}
+    for name, func in suite:
+        if only and name not in only:
+            continue
+        results[name] = func()
+        print(f"{name:<20}{results[name]['median_ms']:>12.2f} ms (médiane, {results[name]['runs']} mesures)",
+              file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Compare les médianes à celles d'un fichier de référence
+
+    Returns:
+        dict: {nom: {'baseline_ms', 'current_ms', 'ratio', 'threshold', 'regression'}}
+    """
+    comparison = {}
+    for name, current in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if not reference:
+            continue
+        limit = THRESHOLDS.get(name, threshold)
+        ratio = current['median_ms'] / reference['median_ms'] if reference['median_ms'] else 1.0
+        comparison[name] = {'baseline_ms': reference['median_ms'], 'current_ms': current['median_ms'],
+                            'ratio': round(ratio, 3), 'threshold': limit, 'regression': ratio > 1 + limit}
+    return comparison
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmark', description="Benchmarks hors ligne de l'analyseur")
+    parser.add_argument('--provider', default='synthetic',
+                        help="Fournisseur: synthetic[:GRAINE] (défaut) ou replay:DOSSIER")
+    parser.add_argument('-i', '--input', help="Fichier de tickers (obligatoire hors fournisseur synthétique)")
+    parser.add_argument('--sizes', default='100,1000,10000', help="Tailles des lots de notation (défaut: 100,1000,10000)")
+    parser.add_argument('--snapshot-size', type=int, default=500, help="Tickers du snapshot et des classements (défaut: 500)")
+    parser.add_argument('-w', '--workers', type=int, default=8, help="Threads de notation (défaut: 8)")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Nombre de mesures par benchmark (défaut: 3)")
+    parser.add_argument('--only', help="Benchmarks à exécuter, séparés par des virgules")
+    parser.add_argument('-o', '--output', default='-', help="Fichier JSON des résultats, '-' pour la sortie standard")
+    parser.add_argument('--baseline', help="Résultats de référence (JSON) à comparer")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Ralentissement toléré par rapport à la référence, ex: 0.25 = +25%% (défaut)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Point d'entrée ; renvoie 1 si une régression est détectée"""
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    provider = provider_from_env(args.provider)
+    set_provider(provider)
+
+    if args.input:
+        with open(args.input, encoding='utf-8') as f:
+            tickers = read_tickers(f)
+    elif isinstance(provider, SyntheticProvider):
+        tickers = [f'SYN{i:05d}' for i in range(max(sizes + [args.snapshot_size, 50]))]
+    else:
+        print("--input est obligatoire avec un fournisseur d'enregistrements", file=sys.stderr)
+        return 2
+
+    results = run_benchmarks(tickers, sizes, workers=args.workers, repeat=args.repeat,
+                             snapshot_size=args.snapshot_size,
+                             only=set(args.only.split(',')) if args.only else None)
+    report = {
+        'meta': {'commit': _git_commit(), 'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                 'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                 'provider': args.provider, 'workers': args.workers, 'repeat': args.repeat},
+        'results': results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report['comparison'] = compare(results, json.load(f), args.threshold)
+        for name, c in report['comparison'].items():
+            flag = '  RÉGRESSION' if c['regression'] else ''
+            print(f"{name:<20}{c['baseline_ms']:>12.2f} -> {c['current_ms']:>10.2f} ms  x{c['ratio']:.2f}{flag}",
+                  file=sys.stderr)
+            if c['regression']:
+                regressions.append(name)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Budget d'appels Yahoo par affichage de page
+Un classement peut déclencher des centaines d'appels (info + historique par ticker) : chaque
+affichage reçoit un budget d'appels et de temps, au-delà duquel les tickers restants sont
+servis depuis le cache périmé (et signalés comme tels) au lieu de bloquer la page
+
+Réglage par variables d'environnement:
+    RENDER_BUDGET_CALLS=60      appels Yahoo par affichage
+    RENDER_BUDGET_SECONDS=8     temps par affichage (secondes)
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from journalisation import get_logger, log_event
+from metriques import RENDER_BUDGET_CALLS, RENDER_BUDGET_EXHAUSTED, RENDER_DEGRADED_ROWS, STALE_SERVED
+from resilience import DEFAULT_TIMEOUT, UpstreamUnavailable, revalidate
+
+DEFAULT_MAX_CALLS = int(os.environ.get('RENDER_BUDGET_CALLS', 60))
+DEFAULT_MAX_SECONDS = float(os.environ.get('RENDER_BUDGET_SECONDS', 8))
+
+logger = get_logger('budget')
+
+_current = contextvars.ContextVar('render_budget', default=None)
+
+
+class BudgetExhausted(RuntimeError):
+    """Budget d'appels ou de temps épuisé pour l'affichage en cours"""
+
+
+class RenderBudget:
+    """Compteur d'appels et échéance d'un affichage, partagé par ses threads de chargement"""
+
+    def __init__(self, page, max_calls=DEFAULT_MAX_CALLS, max_seconds=DEFAULT_MAX_SECONDS):
+        """
+        Args:
+            page (str): Nom de la page (label des métriques)
+            max_calls (int): Nombre maximal d'appels Yahoo
+            max_seconds (float): Durée au-delà de laquelle plus aucun appel n'est lancé
+        """
+        self.page = page
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.started = time.monotonic()
+        self.calls = 0
+        self.denied = 0
+        self.stale_rows = 0
+        self.missing_rows = 0
+        self.reason = None
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def _check(self):
+        if self.calls >= self.max_calls:
+            self.reason = self.reason or 'calls'
+        elif self.elapsed >= self.max_seconds:
+            self.reason = self.reason or 'time'
+        return self.reason is None
+
+    @property
+    def remaining(self):
+        """Temps restant avant l'échéance de l'affichage (secondes)"""
+        return self.max_seconds - self.elapsed
+
+    @property
+    def exhausted(self):
+        with self._lock:
+            return not self._check()
+
+    def charge(self, calls=1):
+        """Réserve des appels ; lève BudgetExhausted si le budget est épuisé"""
+        with self._lock:
+            if not self._check():
+                self.denied += calls
+                raise BudgetExhausted(f"Budget de la page '{self.page}' épuisé ({self.reason})")
+            self.calls += calls
+
+    def note_degraded(self, stale):
+        """Compte une ligne servie périmée (stale=True) ou absente faute de donnée en cache"""
+        with self._lock:
+            if stale:
+                self.stale_rows += 1
+            else:
+                self.missing_rows += 1
+
+    def usage(self):
+        """Consommation du budget (pour l'instrumentation et l'affichage)"""
+        with self._lock:
+            self._check()
+            return {'page': self.page, 'calls': self.calls, 'max_calls': self.max_calls,
+                    'elapsed_s': round(self.elapsed, 3), 'max_seconds': self.max_seconds,
+                    'denied_calls': self.denied, 'stale_rows': self.stale_rows,
+                    'missing_rows': self.missing_rows, 'exhausted': self.reason}
+
+
+def start_render_budget(page, max_calls=DEFAULT_MAX_CALLS, max_seconds=DEFAULT_MAX_SECONDS):
+    """
+    Ouvre le budget de l'affichage en cours (à appeler en haut du script de la page)
+
+    Le budget est porté par une variable de contexte : il suit les chargements lancés
+    par iter_batches, qui recopient le contexte dans leurs threads.
+    """
+    clear_render_budget()
+    budget = RenderBudget(page, max_calls, max_seconds)
+    _current.set(budget)
+    return budget
+
+
+def clear_render_budget():
+    """
+    Retire le budget resté dans le contexte du thread de script
+
+    Un st.rerun() interrompt le script avant finish_render_budget : le budget orphelin
+    (épuisé ou presque) limiterait les appels de l'affichage suivant. Il est publié puis
+    retiré ; à appeler en haut de chaque affichage sans budget propre (page d'analyse).
+    """
+    orphan = _current.get()
+    if orphan is not None:
+        finish_render_budget(orphan)
+
+
+def current_budget():
+    """Budget de l'affichage en cours, ou None hors d'un affichage budgété"""
+    return _current.get()
+
+
+def charge_upstream(calls=1):
+    """Décompte un appel Yahoo du budget courant s'il y en a un (appelé par le fournisseur)"""
+    budget = _current.get()
+    if budget is not None:
+        budget.charge(calls)
+
+
+def call_timeout(default):
+    """Délai d'un appel Yahoo : default, réduit au temps restant de l'affichage en cours"""
+    budget = _current.get()
+    if budget is None:
+        return default
+    return max(0.05, min(default, budget.remaining))
+
+
+def render_deadline(seconds):
+    """
+    Temps restant avant l'échéance commune des chargements de l'affichage en cours
+
+    L'échéance part du début de l'affichage : les chargements successifs d'une même
+    page se partagent ces secondes au lieu d'en recevoir chacun autant.
+    """
+    budget = _current.get()
+    if budget is None:
+        return seconds
+    return max(0.0, budget.started + seconds - time.monotonic())
+
+
+def finish_render_budget(budget):
+    """Clôt le budget : publie sa consommation (métriques et journal) et la renvoie"""
+    _current.set(None)
+    usage = budget.usage()
+    RENDER_BUDGET_CALLS.labels(budget.page).observe(usage['calls'])
+    if usage['exhausted']:
+        RENDER_BUDGET_EXHAUSTED.labels(budget.page, usage['exhausted']).inc()
+    if usage['stale_rows']:
+        RENDER_DEGRADED_ROWS.labels(budget.page, 'stale').inc(usage['stale_rows'])
+    if usage['missing_rows']:
+        RENDER_DEGRADED_ROWS.labels(budget.page, 'missing').inc(usage['missing_rows'])
+    log_event(logger, logging.WARNING if usage['exhausted'] else logging.INFO, 'render_budget', **usage)
+    return usage
+
+
+def fetch_within_budget(func, *args):
+    """
+    Appelle une fonction décorée par @cached en respectant le budget courant
+
+    Une fois le budget épuisé, aucune requête n'est lancée : la valeur fraîche du
+    cache est utilisée si elle existe, sinon la dernière valeur périmée. Si la source
+    est indisponible (UpstreamUnavailable), la dernière valeur périmée est servie et
+    un rechargement est planifié en arrière-plan. L'attente d'un chargement déjà lancé
+    par un autre thread est bornée par call_timeout : au-delà, la valeur périmée est
+    servie et ce chargement remplira le cache.
+
+    Returns:
+        tuple: (valeur ou None, périmée)
+    """
+    budget = _current.get()
+    if budget is not None and budget.exhausted:
+        found, value = func.cache.get(func.dataset, args, func.ttl)
+        if found:
+            return value, False
+    else:
+        try:
+            return func.get_or_wait(call_timeout(DEFAULT_TIMEOUT), *args), False
+        except (BudgetExhausted, TimeoutError):
+            pass
+        except UpstreamUnavailable:
+            revalidate((func.dataset,) + args, lambda: func(*args))
+    found, value, _ = func.get_stale(*args)
+    if found and value is not None:
+        STALE_SERVED.labels(func.dataset).inc()
+    if budget is not None:
+        budget.note_degraded(stale=found and value is not None)
+    return (value if found else None), True
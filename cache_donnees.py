@@ -0,0 +1,304 @@
+"""
+Cache partagé des données de marché
+Invalidation ciblée par ticker ou par jeu de données (au lieu de st.cache_data.clear())
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from metriques import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES
+
+
+class _Entry:
+    """Valeur mise en cache avec son horodatage (expired : invalidée mais conservée comme donnée périmée)"""
+
+    __slots__ = ('value', 'stored_at', 'expired')
+
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+        self.expired = False
+
+
+class _InFlight:
+    """Chargement en cours, partagé par les appelants concurrents d'une même clé"""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class DataCache:
+    """
+    Cache mémoire partagé par tout le processus (donc par toutes les sessions Streamlit)
+
+    Les clés sont de la forme (dataset, key) où key est un tuple dont le premier
+    élément est, par convention, le ticker. Cela permet d'invalider un ticker
+    précis ou un jeu de données entier sans toucher au reste.
+    """
+
+    def __init__(self, max_entries=5000, default_ttl=None):
+        """
+        Args:
+            max_entries (int): Nombre maximal d'entrées (les moins récemment utilisées sont évincées)
+            default_ttl (float): Âge maximal appliqué quand get() ne précise pas de ttl
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.RLock()
+
+    def get(self, dataset, key, ttl=None):
+        """
+        Récupère une valeur du cache
+
+        Args:
+            dataset (str): Nom du jeu de données (ex: 'classements')
+            key (tuple): Clé de l'entrée (premier élément = ticker)
+            ttl (float): Âge maximal accepté en secondes (None = default_ttl)
+
+        Returns:
+            tuple: (trouvé, valeur)
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get((dataset, key))
+            if entry is None or entry.expired or (ttl is not None and time.time() - entry.stored_at > ttl):
+                CACHE_MISSES.labels(dataset).inc()
+                return False, None
+            self._entries.move_to_end((dataset, key))
+        CACHE_HITS.labels(dataset).inc()
+        return True, entry.value
+
+    def set(self, dataset, key, value):
+        """Enregistre une valeur dans le cache"""
+        with self._lock:
+            self._entries[(dataset, key)] = _Entry(value, time.time())
+            self._entries.move_to_end((dataset, key))
+            while len(self._entries) > self.max_entries:
+                (evicted, _), _ = self._entries.popitem(last=False)
+                CACHE_EVICTIONS.labels(evicted).inc()
+
+    def get_or_fetch(self, dataset, key, fetch, ttl=None, wait_timeout=None):
+        """
+        Renvoie la valeur en cache ou la charge avec fetch()
+
+        Les appels concurrents sur une même clé sont regroupés : un seul appel
+        à fetch() est effectué, les autres attendent son résultat.
+
+        Args:
+            wait_timeout (float): Attente maximale du résultat d'un appel déjà en cours
+                (secondes, None = sans limite) ; lève TimeoutError à l'échéance
+        """
+        found, value = self.get(dataset, key, ttl)
+        if found:
+            return value
+        with self._lock:
+            flight = self._inflight.get((dataset, key))
+            leader = flight is None
+            if leader:
+                flight = self._inflight[(dataset, key)] = _InFlight()
+        if not leader:
+            if not flight.done.wait(wait_timeout):
+                raise TimeoutError(f"Chargement en cours de {dataset}{key} non terminé après {wait_timeout} s")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = fetch()
+            self.set(dataset, key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[(dataset, key)]
+            flight.done.set()
+
+    def get_stale(self, dataset, key):
+        """
+        Récupère une valeur même expirée ou invalidée avec keep_stale (repli quand
+        on ne peut pas recharger)
+
+        Returns:
+            tuple: (trouvé, valeur, âge en secondes)
+        """
+        with self._lock:
+            entry = self._entries.get((dataset, key))
+            if entry is None:
+                return False, None, None
+            return True, entry.value, time.time() - entry.stored_at
+
+    def age(self, dataset, key):
+        """Âge en secondes d'une entrée (None si absente)"""
+        with self._lock:
+            entry = self._entries.get((dataset, key))
+            return None if entry is None else time.time() - entry.stored_at
+
+    def invalidate(self, dataset=None, ticker=None, older_than=None, keep_stale=False):
+        """
+        Supprime les entrées correspondant aux critères
+
+        Args:
+            dataset (str): Limite l'invalidation à un jeu de données (None = tous)
+            ticker (str): Limite l'invalidation à un ticker (None = tous)
+            older_than (float): Ne supprime que les entrées plus vieilles que ce nombre de secondes
+            keep_stale (bool): Marque les entrées comme expirées au lieu de les supprimer
+                (get() les ignore, get_stale() les renvoie encore)
+
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        now = time.time()
+        with self._lock:
+            to_delete = [
+                k for k, entry in self._entries.items()
+                if (dataset is None or k[0] == dataset)
+                and (ticker is None or (k[1] and k[1][0] == ticker))
+                and (older_than is None or now - entry.stored_at > older_than)
+            ]
+            for k in to_delete:
+                if keep_stale:
+                    self._entries[k].expired = True
+                else:
+                    del self._entries[k]
+            return len(to_delete)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+# Cache unique du processus : les modules importés survivent aux reruns Streamlit
+shared_cache = DataCache()
+
+
+def cached(dataset, ttl=300, cache=None):
+    """
+    Décorateur de mise en cache par jeu de données
+
+    La fonction décorée gagne les méthodes invalidate(ticker=None) et
+    refresh_older_than(seconds) pour une invalidation ciblée, get_stale(*args)
+    pour relire une valeur expirée (refresh_older_than conserve les anciennes valeurs)
+    et is_cached(*args) pour savoir si une valeur valide est disponible sans la charger.
+    get_or_wait(wait_timeout, *args) borne l'attente d'un chargement déjà en cours.
+
+    Args:
+        dataset (str): Nom du jeu de données
+        ttl (float): Durée de validité en secondes
+        cache (DataCache): Cache à utiliser (par défaut le cache partagé)
+    """
+    def decorator(func):
+        store = cache or shared_cache
+
+        @wraps(func)
+        def wrapper(*args):
+            return store.get_or_fetch(dataset, args, lambda: func(*args), ttl)
+
+        wrapper.get_or_wait = lambda wait_timeout, *args: store.get_or_fetch(
+            dataset, args, lambda: func(*args), ttl, wait_timeout)
+        wrapper.invalidate = lambda ticker=None: store.invalidate(dataset, ticker)
+        wrapper.refresh_older_than = lambda seconds: store.invalidate(dataset, older_than=seconds, keep_stale=True)
+        wrapper.get_stale = lambda *args: store.get_stale(dataset, args)
+        wrapper.is_cached = lambda *args: store.get(dataset, args, ttl)[0]
+        wrapper.cache = store
+        wrapper.dataset = dataset
+        wrapper.ttl = ttl
+        return wrapper
+
+    return decorator
+
+
+class DiskCache:
+    """
+    Cache sur disque (un fichier pickle par entrée), même interface get/set que DataCache
+
+    Utilisé par les traitements par lots : un relancement après crash ou un
+    second passage réutilise les données déjà téléchargées.
+    """
+
+    def __init__(self, directory, ttl=None):
+        """
+        Args:
+            directory (str): Dossier racine du cache
+            ttl (float): Âge maximal par défaut des entrées en secondes (None = pas de limite)
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, dataset, key):
+        name = '_'.join(str(k) for k in key)
+        name = ''.join(c if c.isalnum() or c in '.-_^=' else '_' for c in name)
+        return os.path.join(self.directory, dataset, name + '.pkl')
+
+    def get(self, dataset, key, ttl=None):
+        """Récupère une valeur ; renvoie (trouvé, valeur)"""
+        path = self._path(dataset, key)
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            mtime = os.path.getmtime(path)
+            # mtime 0 : fichier invalidé avec keep_stale
+            if mtime == 0 or (ttl is not None and time.time() - mtime > ttl):
+                CACHE_MISSES.labels(dataset).inc()
+                return False, None
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            CACHE_MISSES.labels(dataset).inc()
+            return False, None
+        CACHE_HITS.labels(dataset).inc()
+        return True, value
+
+    def set(self, dataset, key, value):
+        """Enregistre une valeur (écriture atomique par renommage)"""
+        path = self._path(dataset, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def get_stale(self, dataset, key):
+        """Récupère une valeur quel que soit son âge ; renvoie (trouvé, valeur, âge)"""
+        path = self._path(dataset, key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            with open(path, 'rb') as f:
+                return True, pickle.load(f), age
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None, None
+
+    def invalidate(self, dataset=None, ticker=None, older_than=None, keep_stale=False):
+        """
+        Supprime les fichiers correspondant aux critères ; renvoie le nombre supprimé
+        (keep_stale : les fichiers sont seulement vieillis, ils restent lisibles par get_stale)
+        """
+        count = 0
+        now = time.time()
+        datasets = [dataset] if dataset else os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        for ds in datasets:
+            folder = os.path.join(self.directory, ds)
+            if not os.path.isdir(folder):
+                continue
+            prefix = os.path.basename(self._path(ds, (ticker,)))[:-4] if ticker is not None else None
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                if prefix is not None and name != prefix + '.pkl' and not name.startswith(prefix + '_'):
+                    continue
+                if older_than is not None and now - os.path.getmtime(path) <= older_than:
+                    continue
+                if keep_stale:
+                    os.utime(path, (0, 0))
+                else:
+                    os.remove(path)
+                count += 1
+        return count
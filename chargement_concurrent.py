@@ -0,0 +1,145 @@
+"""
+Chargement concurrent des données de marché
+Les résultats sont restitués par lots, au fur et à mesure qu'ils arrivent, jusqu'à une
+échéance globale (RANKING_DEADLINE_SECONDS, 6 s par défaut) au-delà de laquelle les tickers
+en retard sont rendus à l'appelant au lieu de bloquer l'affichage
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from metriques import RATE_LIMIT_WAIT
+from resilience import revalidate
+
+
+class RateLimiter:
+    """
+    Limiteur de débit (seau à jetons) partagé entre les threads
+
+    Remplace les time.sleep(0.1) des boucles séquentielles : avec des appels
+    concurrents, c'est le débit global vers Yahoo qu'il faut borner.
+    """
+
+    def __init__(self, rate=10.0, burst=5):
+        """
+        Args:
+            rate (float): Nombre d'appels autorisés par seconde
+            burst (int): Nombre d'appels pouvant partir d'un coup
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """
+        Prend un jeton s'il y en a un
+
+        Returns:
+            float: 0 si le jeton est pris, sinon l'attente avant le prochain jeton (secondes)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def wait(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible"""
+        t0 = time.perf_counter()
+        while True:
+            delay = self.try_acquire()
+            if delay <= 0:
+                RATE_LIMIT_WAIT.observe(time.perf_counter() - t0)
+                return
+            time.sleep(delay)
+
+
+# Limiteur unique du processus pour tous les appels vers Yahoo Finance
+# (distribué par priorité par ordonnanceur.upstream_scheduler)
+upstream_limiter = RateLimiter()
+
+# Échéance d'un classement complet (secondes)
+DEFAULT_DEADLINE = float(os.environ.get('RANKING_DEADLINE_SECONDS', 6))
+
+
+def iter_batches(fetch, tickers, max_workers=8, batch_size=10, flush_interval=0.25, deadline=None, late=None):
+    """
+    Exécute fetch(ticker) en parallèle et renvoie les résultats par lots
+
+    Un lot est émis dès que batch_size résultats sont prêts ou que
+    flush_interval secondes se sont écoulées depuis le dernier lot, ce qui
+    permet d'afficher les premières lignes sans attendre les tickers lents.
+
+    À l'échéance, l'itération s'arrête : les chargements en cours se terminent
+    en arrière-plan (leur résultat reste dans le cache de fetch), ceux qui n'ont
+    pas commencé sont annulés. Les tickers concernés sont ajoutés à late.
+
+    Args:
+        fetch (callable): Fonction de chargement d'un ticker
+        tickers (list): Tickers à charger
+        max_workers (int): Nombre de threads
+        batch_size (int): Taille maximale d'un lot
+        flush_interval (float): Délai maximal entre deux lots (secondes)
+        deadline (float): Durée maximale de l'itération (secondes, None = sans limite)
+        late (list): Complétée avec les tickers non chargés à l'échéance
+
+    Yields:
+        list: Liste de tuples (ticker, résultat) ; résultat vaut None en cas d'erreur
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    end = None if deadline is None else time.monotonic() + deadline
+    try:
+        # Chaque tâche reçoit une copie du contexte de l'appelant (budget d'affichage en cours)
+        futures = {executor.submit(contextvars.copy_context().run, fetch, t): t for t in tickers}
+        pending = set(futures)
+        batch = []
+        # Le premier résultat part immédiatement pour afficher une ligne au plus vite
+        last_flush = time.monotonic() - flush_interval
+        while pending:
+            now = time.monotonic()
+            expired = end is not None and now >= end
+            timeout = max(0.0, flush_interval - (now - last_flush)) if batch else None
+            if end is not None:
+                left = max(0.0, end - now)
+                timeout = left if timeout is None else min(timeout, left)
+            # À l'échéance (timeout nul), on ramasse encore les résultats déjà arrivés avant d'arrêter
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    batch.append((futures[future], future.result()))
+                except Exception:
+                    batch.append((futures[future], None))
+            if batch and (len(batch) >= batch_size or not pending
+                          or time.monotonic() - last_flush >= flush_interval):
+                yield batch
+                batch = []
+                last_flush = time.monotonic()
+            if expired:
+                break
+        if late is not None:
+            late.extend(t for f, t in futures.items() if f in pending)
+        if batch:
+            yield batch
+    finally:
+        # Si le rerun Streamlit interrompt l'affichage, on n'attend pas les threads restants
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def complete_in_background(func, tickers):
+    """
+    Termine en arrière-plan, hors budget de l'affichage, le chargement des tickers en retard
+
+    Args:
+        func (callable): Fonction décorée par @cached (le résultat arrive dans son cache)
+        tickers (list): Tickers rendus par iter_batches(..., late=...)
+    """
+    for ticker in tickers:
+        revalidate((func.dataset, ticker), lambda ticker=ticker: func(ticker))
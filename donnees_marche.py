@@ -0,0 +1,65 @@
+"""
+Données de marché pour les classements
+Construction d'une ligne de classement (prix, capitalisation, performances) pour un ticker
+"""
+
+from budget_rendu import BudgetExhausted
+from fournisseurs import MissingRecording, get_provider
+from historique_prix import stored_returns
+from rendements import ticker_returns
+from resilience import UpstreamUnavailable
+
+
+def fetch_stock_row(ticker, provider=None):
+    """
+    Récupère les données d'une action pour les classements
+
+    Args:
+        ticker (str): Symbole boursier
+        provider: Fournisseur de données (par défaut celui du processus, dont les historiques
+            sont rangés dans la matrice partagée de l'univers)
+
+    Returns:
+        dict: Ligne de classement, ou None si les données sont indisponibles
+    """
+    windows = ('perf_1d', 'perf_7d', 'perf_30d', 'perf_1y')
+    try:
+        if provider is None:
+            info = get_provider().info(ticker)
+            # Fenêtres lues dans la matrice partagée, historique chargé seulement s'il manque
+            perf = stored_returns(ticker, windows) if info else None
+        else:
+            # Fournisseur injecté (service, tests) : ses données restent hors de la matrice du processus
+            info = provider.info(ticker)
+            hist = provider.history(ticker, period="1y")
+            perf = None if hist.empty else dict(ticker_returns(hist, windows), volume=hist['Volume'].iloc[-1])
+
+        # Performances sur le calendrier de cotation du ticker (NaN si l'historique est trop court)
+        if not perf or not info:
+            return None
+
+        # Prix actuel
+        current_price = info.get('currentPrice') or info.get('regularMarketPrice') or perf['price']
+
+        return {
+            'ticker': ticker,
+            'name': info.get('longName', ticker),
+            'price': current_price,
+            'market_cap': info.get('marketCap', 0),
+            'volume': perf['volume'],
+            'perf_1d': perf['perf_1d'],
+            'perf_7d': perf['perf_7d'],
+            'perf_30d': perf['perf_30d'],
+            'perf_1y': perf['perf_1y'],
+            'sector': info.get('sector', 'N/A'),
+            'pe_ratio': info.get('trailingPE', 0),
+            'dividend_yield': info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0
+        }
+    except (BudgetExhausted, UpstreamUnavailable):
+        # Pas de None en cache : l'appelant sert la valeur périmée (budget_rendu.fetch_within_budget)
+        raise
+    except MissingRecording:
+        # Enregistrement manquant : le rejeu (benchmark, tests) doit échouer, pas perdre la ligne
+        raise
+    except Exception:
+        return None
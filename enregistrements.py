@@ -0,0 +1,213 @@
+"""
+Enregistrements compacts des lignes de classement
+- StockRecord : ligne immuable d'un ticker, valeurs empaquetées en float32/int64 (56 octets)
+  et chaînes remplacées par leur code dans une table de chaînes partagée
+- RankingTable : lignes d'un classement en un seul tableau NumPy structuré ; tris et
+  filtres travaillent sur des vues des colonnes, sans reconstruire de DataFrame
+
+Les pages mettent en cache un StockRecord par ticker et ne construisent un DataFrame que
+pour les lignes affichées. Mesuré (tracemalloc, 10 000 lignes) : environ 140 octets par
+enregistrement contre ~470 pour le dict de scalaires numpy, soit un gain d'environ 3x ;
+le gain d'un ordre de grandeur (57 octets par ligne) n'existe que dans une RankingTable.
+"""
+
+import math
+import struct
+import threading
+
+import numpy as np
+import pandas as pd
+
+STRING_FIELDS = ('ticker', 'name', 'sector')
+FLOAT_FIELDS = ('price', 'perf_1d', 'perf_7d', 'perf_30d', 'perf_1y', 'pe_ratio', 'dividend_yield')
+INT_FIELDS = ('market_cap', 'volume')
+FIELDS = STRING_FIELDS + FLOAT_FIELDS + INT_FIELDS
+
+# Même disposition mémoire pour un enregistrement (struct) et une table (dtype structuré)
+_STRUCT = struct.Struct('<' + 'i' * len(STRING_FIELDS) + 'f' * len(FLOAT_FIELDS) + 'q' * len(INT_FIELDS))
+RECORD_DTYPE = np.dtype([(f, '<i4') for f in STRING_FIELDS] + [(f, '<f4') for f in FLOAT_FIELDS]
+                        + [(f, '<i8') for f in INT_FIELDS])
+_INDEX = {f: i for i, f in enumerate(FIELDS)}
+
+
+class StringTable:
+    """Table de chaînes internées : chaque ticker, nom ou secteur n'est stocké qu'une fois"""
+
+    def __init__(self):
+        self._codes = {}
+        self._strings = []
+        self._lock = threading.Lock()
+
+    def code(self, value):
+        """Code entier d'une chaîne (ajoutée au premier appel)"""
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = self._codes[value] = len(self._strings)
+                    self._strings.append(value)
+        return code
+
+    def lookup(self, code):
+        return self._strings[code]
+
+    def lookup_many(self, codes):
+        """Chaînes d'un tableau de codes"""
+        strings = self._strings
+        return [strings[c] for c in codes.tolist()]
+
+    def __len__(self):
+        return len(self._strings)
+
+
+# Table du processus : les modules importés survivent aux reruns Streamlit
+strings = StringTable()
+
+
+def _float(value):
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _int(value):
+    try:
+        return int(value) if value is not None and not math.isnan(float(value)) else 0
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+class StockRecord:
+    """
+    Ligne de classement immuable d'un ticker
+
+    Se lit comme le dict de donnees_marche.fetch_stock_row (record['price'],
+    record.get('sector')) ou par attribut (record.price).
+    """
+
+    __slots__ = ('_packed',)
+
+    def __init__(self, packed):
+        object.__setattr__(self, '_packed', packed)
+
+    @classmethod
+    def from_row(cls, row):
+        """Construit un enregistrement depuis une ligne dict (champs absents : NaN, 0 ou chaîne vide)"""
+        ticker = str(row.get('ticker') or '')
+        values = ([strings.code(ticker), strings.code(str(row.get('name') or ticker)),
+                   strings.code(str(row.get('sector') or 'N/A'))]
+                  + [_float(row.get(f)) for f in FLOAT_FIELDS] + [_int(row.get(f)) for f in INT_FIELDS])
+        return cls(_STRUCT.pack(*values))
+
+    def _values(self):
+        return _STRUCT.unpack(self._packed)
+
+    def __getitem__(self, key):
+        try:
+            value = self._values()[_INDEX[key]]
+        except KeyError:
+            raise KeyError(key) from None
+        return strings.lookup(value) if key in STRING_FIELDS else value
+
+    def __getattr__(self, key):
+        if key in _INDEX:
+            return self[key]
+        raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("StockRecord est immuable")
+
+    def get(self, key, default=None):
+        return self[key] if key in _INDEX else default
+
+    def as_dict(self):
+        values = self._values()
+        return {f: strings.lookup(v) if f in STRING_FIELDS else v for f, v in zip(FIELDS, values)}
+
+    def __reduce__(self):
+        # Les codes de chaînes sont propres au processus : on sérialise les valeurs
+        return (StockRecord.from_row, (self.as_dict(),))
+
+    def __eq__(self, other):
+        return isinstance(other, StockRecord) and self._packed == other._packed
+
+    def __hash__(self):
+        return hash(self._packed)
+
+    def __repr__(self):
+        return f"StockRecord({self.as_dict()})"
+
+
+class RankingTable:
+    """Lignes d'un classement en colonnes NumPy (float32 / int64 / codes de chaînes)"""
+
+    def __init__(self, data, stale=None):
+        """
+        Args:
+            data (np.ndarray): Tableau structuré de dtype RECORD_DTYPE
+            stale (np.ndarray): Booléens, lignes servies depuis le cache périmé
+        """
+        self.data = data
+        self.stale = np.zeros(len(data), dtype=bool) if stale is None else np.asarray(stale, dtype=bool)
+
+    @classmethod
+    def from_records(cls, records, stale=None):
+        """Table depuis des StockRecord (une seule copie d'octets, sans conversion par champ)"""
+        records = list(records)
+        data = np.frombuffer(b''.join(r._packed for r in records), dtype=RECORD_DTYPE).copy()
+        return cls(data, stale)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def empty(self):
+        return len(self.data) == 0
+
+    def __getitem__(self, column):
+        """Vue NumPy d'une colonne numérique (sans copie)"""
+        return self.data[column]
+
+    def filter(self, mask):
+        """Sous-table des lignes où mask est vrai"""
+        return RankingTable(self.data[mask], self.stale[mask])
+
+    def with_tickers(self, tickers):
+        """Sous-table des lignes des tickers donnés"""
+        codes = np.array([strings.code(t) for t in tickers], dtype=np.int32)
+        return self.filter(np.isin(self.data['ticker'], codes))
+
+    def order(self, column, ascending=False, top=None):
+        """
+        Indices des lignes triées sur une colonne (valeurs manquantes en dernier)
+
+        Args:
+            column (str): Colonne numérique
+            ascending (bool): Ordre croissant
+            top (int): Ne trie que les top premières lignes (argpartition puis tri)
+
+        Returns:
+            np.ndarray: Indices des lignes
+        """
+        values = self.data[column]
+        key = values.astype(np.float64) if ascending else -values.astype(np.float64)
+        key[np.isnan(key)] = np.inf
+        if top is not None and top < len(key):
+            idx = np.argpartition(key, top)[:top]
+            return idx[np.argsort(key[idx], kind='stable')]
+        return np.argsort(key, kind='stable')
+
+    def top_frame(self, column, n, ascending=False):
+        """DataFrame des n premières lignes triées (rang 1..n en index), pour l'affichage"""
+        idx = self.order(column, ascending, top=n)
+        rows = self.data[idx]
+        df = pd.DataFrame({f: strings.lookup_many(rows[f]) if f in STRING_FIELDS else rows[f] for f in FIELDS})
+        df['stale'] = self.stale[idx]
+        df.index = np.arange(1, len(df) + 1)
+        return df
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.stale.nbytes
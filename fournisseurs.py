@@ -0,0 +1,392 @@
+"""
+Fournisseurs de données de marché
+Interface commune (info, historique, dividendes, téléchargement groupé) avec quatre implémentations :
+- YFinanceProvider : Yahoo Finance en direct
+- RecordingProvider : enregistre sur disque les réponses d'un autre fournisseur
+- ReplayProvider : rejoue ces réponses hors ligne, avec une latence artificielle réglable
+- SyntheticProvider : données générées de façon déterministe pour n'importe quel ticker (benchmarks)
+
+Le fournisseur du processus se choisit avec la variable MARKET_DATA_PROVIDER:
+    yfinance (défaut) | record:DOSSIER | replay:DOSSIER | synthetic[:GRAINE]
+et MARKET_DATA_LATENCY (secondes par appel rejoué). Par exemple, pour enregistrer
+puis rejouer une notation par lots:
+    MARKET_DATA_PROVIDER=record:fixtures python notation_lot.py -i univers.txt -o /dev/null
+    MARKET_DATA_PROVIDER=replay:fixtures MARKET_DATA_LATENCY=0.05 python notation_lot.py -i univers.txt
+"""
+
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from budget_rendu import BudgetExhausted, call_timeout, charge_upstream
+from cache_donnees import DataCache, DiskCache
+from metriques import UPSTREAM_CALLS, UPSTREAM_LATENCY
+from ordonnanceur import upstream_scheduler
+from resilience import (DEFAULT_POLICY, DEFAULT_TIMEOUT, CallSlotsExhausted, CallTimeout, CircuitOpen, UpstreamUnavailable,
+                        breaker_for, call_with_retry, run_with_timeout)
+from schema_info import project_info
+from session_http import http_session
+
+
+class MarketDataProvider:
+    """Interface d'un fournisseur de données de marché"""
+
+    def info(self, ticker):
+        """Dictionnaire d'informations (yf.Ticker(ticker).info projeté sur schema_info.INFO_SCHEMA)"""
+        raise NotImplementedError
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        """Historique OHLCV indexé par date"""
+        raise NotImplementedError
+
+    def dividends(self, ticker):
+        """Série des dividendes versés"""
+        raise NotImplementedError
+
+    def download(self, tickers, period='1mo', interval='1d'):
+        """
+        Historiques de plusieurs tickers
+
+        Returns:
+            dict: {ticker: DataFrame}
+        """
+        return {t: self.history(t, period, interval) for t in tickers}
+
+
+YAHOO_HOST = 'finance.yahoo.com'
+# Jeu de données du pool d'objets yf.Ticker (labels des métriques de cache)
+TICKER_HANDLES = 'ticker_handles'
+
+
+class _PooledTicker:
+    """Objet yf.Ticker du pool et son verrou : yfinance remplit ses caches internes sans synchronisation"""
+
+    __slots__ = ('handle', 'lock')
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.lock = threading.Lock()
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Yahoo Finance en direct ; chaque appel passe par le limiteur de débit partagé (distribué
+    par priorité par l'ordonnanceur) et la session HTTP partagée (keep-alive), est borné
+    dans le temps, retenté sur erreur transitoire et échoue immédiatement (CircuitOpen) quand
+    Yahoo est en panne
+
+    Les objets yf.Ticker sont réutilisés d'un appel à l'autre (pool LRU de TICKER_POOL_SIZE
+    objets, 512 par défaut, gardés TICKER_POOL_TTL secondes, 60 par défaut) : fuseau horaire
+    du ticker, info et historique des dividendes déjà chargés par yfinance ne sont pas redemandés
+    quand les pages, la notation et les graphiques lisent le même ticker. Le TTL reste inférieur
+    à celui des caches de données pour qu'un rechargement reçoive des valeurs fraîches.
+    """
+
+    def __init__(self, limiter=upstream_scheduler, policy=DEFAULT_POLICY, timeout=DEFAULT_TIMEOUT, session=None,
+                 handles=None):
+        """
+        Args:
+            handles (DataCache): Pool des objets yf.Ticker (None = pool propre au fournisseur)
+        """
+        self.limiter = limiter
+        self.session = session or http_session()
+        self.handles = handles if handles is not None else DataCache(
+            max_entries=int(os.environ.get('TICKER_POOL_SIZE', 512)),
+            default_ttl=float(os.environ.get('TICKER_POOL_TTL', 60)))
+        self.policy = policy
+        self.timeout = timeout
+        self.breaker = breaker_for(YAHOO_HOST)
+
+    def _before_attempt(self):
+        # Chaque tentative est un appel Yahoo : décomptée du budget de l'affichage, puis ordonnancée
+        charge_upstream()
+        self.limiter.wait()
+
+    def _call(self, method, fetch):
+        """Appel vers Yahoo avec nouvelles tentatives et disjoncteur (UpstreamUnavailable si tout échoue)"""
+        return call_with_retry(lambda: self._attempt(method, fetch), self.breaker, self.policy,
+                               self._before_attempt, method)
+
+    def _ticker_call(self, method, ticker, read):
+        """
+        Appel read(objet yf.Ticker) sur l'objet du pool ; un objet en erreur est retiré du pool
+
+        Un objet n'est utilisé que par un thread à la fois : s'il est occupé, l'appel passe
+        par un objet temporaire plutôt que d'attendre (ni course sur ses caches, ni file d'attente).
+        """
+        def fetch():
+            pooled = self.handles.get_or_fetch(TICKER_HANDLES, (ticker,),
+                                               lambda: _PooledTicker(yf.Ticker(ticker, session=self.session)))
+            if not pooled.lock.acquire(blocking=False):
+                return read(yf.Ticker(ticker, session=self.session))
+            try:
+                return read(pooled.handle)
+            except Exception:
+                # Il peut garder un état partiel : la tentative suivante repart d'un objet neuf
+                self.handles.invalidate(TICKER_HANDLES, ticker)
+                raise
+            finally:
+                pooled.lock.release()
+        return self._call(method, fetch)
+
+    def _attempt(self, method, fetch):
+        """Une tentative, comptée et chronométrée ; CallTimeout au-delà du délai"""
+        t0 = time.perf_counter()
+        try:
+            value = run_with_timeout(fetch, call_timeout(self.timeout))
+        except Exception:
+            UPSTREAM_CALLS.labels(method, 'error').inc()
+            raise
+        finally:
+            UPSTREAM_LATENCY.labels(method).observe(time.perf_counter() - t0)
+        UPSTREAM_CALLS.labels(method, 'ok').inc()
+        return value
+
+    def info(self, ticker):
+        return project_info(self._ticker_call('info', ticker, lambda t: t.info))
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        return self._ticker_call('history', ticker, lambda t: t.history(period=period, interval=interval))
+
+    def dividends(self, ticker):
+        return self._ticker_call('dividends', ticker, lambda t: t.dividends)
+
+    def download(self, tickers, period='1mo', interval='1d'):
+        tickers = list(tickers)
+        data = self._call('download', lambda: yf.download(tickers, period=period, interval=interval, group_by='ticker',
+                                                          auto_adjust=False, progress=False, threads=True,
+                                                          session=self.session))
+        if len(tickers) == 1:
+            return {tickers[0]: data.droplevel(0, axis=1) if data.columns.nlevels > 1 else data}
+        return {t: data[t].dropna(how='all') for t in tickers if t in data.columns.get_level_values(0)}
+
+
+# Exceptions relevées avec leur propre type au rejeu (503, disjoncteur, valeur périmée servie) ;
+# les autres le sont en ReplayError
+REPLAYED_ERRORS = {cls.__name__: cls for cls in (UpstreamUnavailable, CircuitOpen, CallSlotsExhausted, CallTimeout)}
+
+
+class _RecordedError:
+    """Exception enregistrée, relevée à l'identique lors du rejeu"""
+
+    def __init__(self, error):
+        self.type_name = type(error).__name__
+        self.message = str(error)
+
+
+def _download_key(tickers, period, interval):
+    """Clé d'enregistrement d'un téléchargement groupé (liste de tickers résumée : nom de fichier court)"""
+    joined = ','.join(tickers).encode('utf-8')
+    return (f'{len(tickers)}x{zlib.crc32(joined):08x}', period, interval)
+
+
+class RecordingProvider(MarketDataProvider):
+    """Enregistre sur disque chaque réponse (ou erreur) du fournisseur sous-jacent"""
+
+    def __init__(self, inner, directory):
+        """
+        Args:
+            inner (MarketDataProvider): Fournisseur réellement interrogé
+            directory (str): Dossier des enregistrements
+        """
+        self.inner = inner
+        self.store = DiskCache(directory)
+
+    def _record(self, method, key, call):
+        try:
+            value = call()
+        except BudgetExhausted:
+            # Limite de l'affichage en cours, pas une réponse de la source
+            raise
+        except Exception as e:
+            self.store.set(method, key, _RecordedError(e))
+            raise
+        self.store.set(method, key, value)
+        return value
+
+    def info(self, ticker):
+        return self._record('info', (ticker,), lambda: self.inner.info(ticker))
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        return self._record('history', (ticker, period, interval),
+                            lambda: self.inner.history(ticker, period, interval))
+
+    def dividends(self, ticker):
+        return self._record('dividends', (ticker,), lambda: self.inner.dividends(ticker))
+
+    def download(self, tickers, period='1mo', interval='1d'):
+        tickers = list(tickers)
+        return self._record('download', _download_key(tickers, period, interval),
+                            lambda: self.inner.download(tickers, period, interval))
+
+
+class MissingRecording(LookupError):
+    """
+    Réponse absente des enregistrements rejoués
+
+    Erreur du jeu d'essai et non donnée indisponible : elle traverse les replis
+    "donnée absente" (donnees_marche.fetch_stock_row) pour qu'un rejeu incomplet échoue.
+    """
+
+
+class ReplayError(RuntimeError):
+    """Erreur enregistrée d'un type absent de REPLAYED_ERRORS, relevée lors du rejeu"""
+
+
+class ReplayProvider(MarketDataProvider):
+    """Rejoue des réponses enregistrées, de façon déterministe et sans réseau"""
+
+    def __init__(self, directory, latency=0.0):
+        """
+        Args:
+            directory (str): Dossier des enregistrements (RecordingProvider)
+            latency (float ou dict): Latence artificielle par appel en secondes,
+                éventuellement par méthode (ex: {'info': 0.3, 'history': 0.1})
+        """
+        self.store = DiskCache(directory)
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _replay(self, method, key):
+        with self._lock:
+            self.calls += 1
+        delay = self.latency.get(method, 0.0) if isinstance(self.latency, dict) else self.latency
+        if delay:
+            time.sleep(delay)
+        found, value = self.store.get(method, key)
+        if not found:
+            raise MissingRecording(f"{method}{key} absent des enregistrements")
+        if isinstance(value, _RecordedError):
+            if value.type_name in REPLAYED_ERRORS:
+                raise REPLAYED_ERRORS[value.type_name](value.message)
+            raise ReplayError(f"{value.type_name}: {value.message}")
+        return value
+
+    def info(self, ticker):
+        # Les enregistrements antérieurs au schéma contiennent la réponse complète
+        return project_info(self._replay('info', (ticker,)))
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        return self._replay('history', (ticker, period, interval))
+
+    def dividends(self, ticker):
+        return self._replay('dividends', (ticker,))
+
+    def download(self, tickers, period='1mo', interval='1d'):
+        # Téléchargement groupé enregistré tel quel, sinon historiques enregistrés ticker par ticker
+        tickers = list(tickers)
+        key = _download_key(tickers, period, interval)
+        if self.store.get('download', key)[0]:
+            return self._replay('download', key)
+        return super().download(tickers, period, interval)
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Données factices mais plausibles, identiques d'une exécution à l'autre pour un
+    même ticker et une même graine : permet de mesurer des univers de 10 000 tickers
+    sans réseau ni enregistrements
+    """
+
+    SECTORS = ['Technology', 'Healthcare', 'Financial Services', 'Consumer Cyclical', 'Consumer Defensive',
+               'Energy', 'Industrials', 'Real Estate', 'Utilities', 'Basic Materials', 'Communication Services']
+    # Périodes calendaires (comme yfinance) ; les autres sont en nombre de séances
+    PERIOD_OFFSETS = {'1mo': pd.DateOffset(months=1), '3mo': pd.DateOffset(months=3), '6mo': pd.DateOffset(months=6),
+                      '1y': pd.DateOffset(years=1), '2y': pd.DateOffset(years=2), '5y': pd.DateOffset(years=5),
+                      '10y': pd.DateOffset(years=10)}
+    PERIOD_DAYS = {'1d': 1, '5d': 5, 'max': 5000}
+
+    def __init__(self, seed=0, latency=0.0, end='2024-12-31'):
+        """
+        Args:
+            seed (int): Graine commune à tous les tickers
+            latency (float): Latence artificielle par appel en secondes
+            end (str): Dernière date des historiques générés
+        """
+        self.seed = seed
+        self.latency = latency
+        self.end = pd.Timestamp(end)
+        self.period_days = dict(self.PERIOD_DAYS, ytd=len(pd.bdate_range(self.end.replace(month=1, day=1), self.end)))
+        self.period_days.update({p: len(pd.bdate_range(self.end - o, self.end)) for p, o in self.PERIOD_OFFSETS.items()})
+        # Calendriers calculés une fois : chaque historique est une vue de fin de self._dates
+        self._dates = pd.bdate_range(end=self.end, periods=max(self.period_days.values()))
+        self._dividend_dates = pd.date_range(end=self.end, periods=20, freq='QS')
+
+    def _rng(self, ticker, salt):
+        if self.latency:
+            time.sleep(self.latency)
+        return np.random.default_rng([self.seed, zlib.crc32(f'{ticker}:{salt}'.encode())])
+
+    def info(self, ticker):
+        rng = self._rng(ticker, 'info')
+        price = float(rng.uniform(5, 500))
+        return project_info({
+            'symbol': ticker, 'longName': f'{ticker} Corp', 'shortName': ticker,
+            'sector': self.SECTORS[zlib.crc32(ticker.encode()) % len(self.SECTORS)], 'industry': 'Synthetic',
+            'country': 'United States', 'currency': 'USD',
+            'currentPrice': price, 'regularMarketPrice': price, 'marketCap': float(rng.uniform(1e8, 3e12)),
+            'averageVolume': float(rng.uniform(1e4, 5e7)), 'beta': float(rng.uniform(0.3, 2.0)),
+            'trailingPE': float(rng.uniform(5, 60)), 'forwardPE': float(rng.uniform(5, 50)),
+            'pegRatio': float(rng.uniform(0.5, 3)), 'priceToBook': float(rng.uniform(0.5, 15)),
+            'returnOnEquity': float(rng.uniform(-0.1, 0.4)), 'returnOnAssets': float(rng.uniform(-0.05, 0.2)),
+            'profitMargins': float(rng.uniform(-0.1, 0.4)), 'operatingMargins': float(rng.uniform(-0.1, 0.5)),
+            'revenueGrowth': float(rng.uniform(-0.2, 0.5)), 'debtToEquity': float(rng.uniform(0, 250)),
+            'currentRatio': float(rng.uniform(0.5, 3)), 'freeCashflow': float(rng.uniform(-1e9, 2e10)),
+            'dividendYield': float(rng.uniform(0, 0.06)), 'totalDebt': float(rng.uniform(0, 1e11)),
+            'totalAssets': float(rng.uniform(1e9, 5e11)),
+            'fiftyTwoWeekHigh': price * float(rng.uniform(1.0, 1.5)), 'fiftyTwoWeekLow': price * float(rng.uniform(0.5, 1.0)),
+        })
+
+    def history(self, ticker, period='1mo', interval='1d'):
+        rng = self._rng(ticker, 'history')
+        n = self.period_days.get(period, self.period_days['1y'])
+        close = float(rng.uniform(5, 500)) * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+        return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                             'Volume': rng.integers(10_000, 50_000_000, n).astype(float)},
+                            index=self._dates[-n:])
+
+    def dividends(self, ticker):
+        rng = self._rng(ticker, 'dividends')
+        return pd.Series(np.round(rng.uniform(0.1, 1.0) * np.linspace(0.8, 1.2, 20), 4), index=self._dividend_dates)
+
+
+def provider_from_env(spec=None):
+    """Construit le fournisseur décrit par MARKET_DATA_PROVIDER (ou spec) / MARKET_DATA_LATENCY"""
+    spec = spec or os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+    kind, _, directory = spec.partition(':')
+    if kind == 'yfinance':
+        return YFinanceProvider()
+    if kind == 'record' and directory:
+        return RecordingProvider(YFinanceProvider(), directory)
+    if kind == 'replay' and directory:
+        return ReplayProvider(directory, latency=float(os.environ.get('MARKET_DATA_LATENCY', 0)))
+    if kind == 'synthetic':
+        return SyntheticProvider(seed=int(directory or 0), latency=float(os.environ.get('MARKET_DATA_LATENCY', 0)))
+    raise ValueError(f"MARKET_DATA_PROVIDER invalide: {spec}")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Fournisseur partagé du processus"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = provider_from_env()
+        return _provider
+
+
+def set_provider(provider):
+    """Remplace le fournisseur du processus (tests, benchmarks) ; renvoie l'ancien"""
+    global _provider
+    with _provider_lock:
+        previous, _provider = _provider, provider
+        return previous
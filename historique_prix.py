@@ -0,0 +1,143 @@
+"""
+Historique de prix partagé
+Un seul téléchargement de l'historique complet par ticker, découpé par dates pour chaque période ;
+les clôtures et volumes sont rangés dans la matrice partagée de l'univers (prix_univers)
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache_donnees import cached
+from fournisseurs import get_provider
+from prix_univers import price_store
+from rendements import universe_returns
+from sous_echantillonnage import downsample_series
+
+# Décalages calendaires équivalents aux périodes de yfinance
+PERIOD_OFFSETS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+_PERIOD_ORDER = ['5d', '1mo', '3mo', '6mo', 'ytd', '1y', '2y', '5y', '10y', 'max']
+
+# Période la plus longue chargée dans la matrice partagée, par ticker
+_coverage = {}
+
+
+@cached('historique_max', ttl=300)
+def get_full_history(ticker):
+    """Historique journalier complet (period='max') d'un ticker, mis en cache"""
+    return get_provider().history(ticker, period='max')
+
+
+def slice_period(hist, period):
+    """
+    Extrait une période d'un historique journalier
+
+    Args:
+        hist (DataFrame): Historique complet indexé par date
+        period (str): Code de période yfinance ('5d', '1mo', ..., 'ytd', 'max')
+
+    Returns:
+        DataFrame: Sous-ensemble de l'historique (vue, sans nouvel appel réseau)
+    """
+    if hist.empty or period == 'max':
+        return hist
+    if period.endswith('d') and period != 'ytd':
+        # yfinance compte les périodes en jours comme des séances de bourse
+        return hist.iloc[-int(period[:-1]):]
+    last = hist.index[-1]
+    if period == 'ytd':
+        start = last.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        start = last - PERIOD_OFFSETS[period]
+    return hist.loc[start:]
+
+
+def get_period_history(ticker, period):
+    """Historique d'une période, dérivé de l'historique complet en cache"""
+    return slice_period(get_full_history(ticker), period)
+
+
+def _is_fresh(store, ticker, ttl, period):
+    """La matrice contient-elle un historique récent du ticker couvrant la période ?"""
+    loaded = store.loaded_at(ticker)
+    covered = _PERIOD_ORDER.index(_coverage.get(ticker, '5d')) >= _PERIOD_ORDER.index(period)
+    return loaded is not None and covered and time.monotonic() - loaded < ttl
+
+
+def stored_close(ticker):
+    """
+    Clôtures d'un ticker lues dans la matrice partagée (chargée depuis l'historique complet
+    en cache si elle est absente ou plus vieille que le TTL de ce cache)
+
+    Returns:
+        Series: Clôtures float32 indexées par date, sans les séances des autres calendriers
+    """
+    store = price_store()
+    if not _is_fresh(store, ticker, get_full_history.ttl, 'max'):
+        store.add_history(ticker, get_full_history(ticker))
+        _coverage[ticker] = 'max'
+    return store.series(ticker) if ticker in store else pd.Series(dtype='float32')
+
+
+def stored_returns(ticker, windows, ttl=300):
+    """
+    Performances d'un ticker lues dans la matrice partagée (fenêtres calculées sur des vues)
+
+    L'historique 1 an n'est demandé au fournisseur que s'il manque dans la matrice ou est
+    plus vieux que ttl : les classements réutilisent ce que graphiques et snapshot ont chargé.
+
+    Returns:
+        dict: {fenêtre: performance en %}, plus 'price', 'last_date' et 'volume' (dernière
+            séance), ou None sans historique
+    """
+    store = price_store()
+    if not _is_fresh(store, ticker, ttl, '1y'):
+        hist = get_provider().history(ticker, period='1y')
+        if hist is None or hist.empty:
+            return None
+        store.add_history(ticker, hist)
+        _coverage[ticker] = max('1y', _coverage.get(ticker, '5d'), key=_PERIOD_ORDER.index)
+    if ticker not in store:
+        return None
+    perf = universe_returns(store, [ticker], windows).iloc[0].to_dict()
+    volume = store.series(ticker, 'volume')
+    perf['volume'] = float(volume.iloc[-1]) if len(volume) else np.nan
+    return perf
+
+
+def load_universe_prices(tickers, period='1y', ttl=300):
+    """
+    Charge en un téléchargement groupé les historiques manquants ou périmés de l'univers
+
+    Returns:
+        PriceStore: Matrice partagée (les lecteurs en prennent des vues)
+    """
+    store = price_store()
+    stale = [t for t in tickers if not _is_fresh(store, t, ttl, period)]
+    if stale:
+        store.add_histories(get_provider().download(stale, period=period))
+        _coverage.update({t: max(period, _coverage.get(t, '5d'), key=_PERIOD_ORDER.index) for t in stale})
+    return store
+
+
+@cached('graphique', ttl=300)
+def get_chart_series(ticker, period, target_points):
+    """
+    Série de clôtures prête à tracer : découpée sur la période puis sous-échantillonnée (LTTB)
+
+    Returns:
+        Series: Au plus target_points points, pics et creux conservés
+    """
+    close = stored_close(ticker)
+    if close.empty:
+        return close
+    return downsample_series(slice_period(close, period), target_points)
@@ -0,0 +1,126 @@
+"""
+Journalisation structurée
+Silencieuse par défaut (usage en bibliothèque : Streamlit, service, lots), avec deux formats au choix :
+- HumanFormatter : les messages de la console interactive (bannières ✓ / ✗ / 💡)
+- KeyValueFormatter : une ligne clé=valeur par événement (ticker, stage, duration_ms, outcome)
+et un échantillonnage des événements de faible niveau pour les gros traitements par lots
+"""
+
+import itertools
+import logging
+import sys
+
+ROOT_LOGGER = 'analyseur'
+
+# Bibliothèque silencieuse tant que l'application ne configure rien
+logging.getLogger(ROOT_LOGGER).addHandler(logging.NullHandler())
+
+
+def get_logger(name):
+    """Logger enfant de 'analyseur' (ex: get_logger('scorer') -> 'analyseur.scorer')"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def log_event(logger, level, event, message=None, *args, **fields):
+    """
+    Émet un événement structuré
+
+    Rien n'est construit si le niveau est désactivé : l'appel ne coûte qu'un test.
+    Le message est un gabarit %-style complété par args au formatage seulement,
+    comme logger.log : ne pas le construire avec une f-string.
+
+    Args:
+        logger (Logger): Logger émetteur
+        level (int): Niveau (logging.INFO, ...)
+        event (str): Nom court de l'événement (ex: 'fetch', 'score', 'search')
+        message (str): Texte lisible pour la console (par défaut le nom de l'événement)
+        *args: Arguments du gabarit message
+        **fields: Champs structurés (ticker, stage, duration_ms, outcome, ...)
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message or event, *args, extra={'event': event, 'fields': fields})
+
+
+class HumanFormatter(logging.Formatter):
+    """Affiche le message lisible tel quel (sortie de la console interactive)"""
+
+    def format(self, record):
+        return record.getMessage()
+
+
+def _quote(value):
+    """Valeur telle quelle, ou entre guillemets (\\, " et retours à la ligne échappés) si nécessaire"""
+    if value and not any(c in value for c in ' "=\\\n'):
+        return value
+    return '"' + value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') + '"'
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Une ligne 'clé=valeur' par événement, facile à filtrer et à agréger"""
+
+    def format(self, record):
+        parts = [f"ts={self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}",
+                 f"level={record.levelname}", f"logger={record.name}",
+                 f"event={getattr(record, 'event', 'message')}"]
+        for key, value in getattr(record, 'fields', {}).items():
+            if value is None:
+                continue
+            if isinstance(value, float):
+                value = f'{value:.2f}'
+            parts.append(f'{key}={_quote(str(value))}')
+        if not hasattr(record, 'event'):
+            parts.append(f'msg={_quote(record.getMessage())}')
+        if record.exc_info:
+            parts.append(f'exc={_quote(self.formatException(record.exc_info))}')
+        return ' '.join(parts)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Ne garde qu'un événement sur N en dessous d'un niveau (les avertissements et
+    erreurs passent toujours)
+    """
+
+    def __init__(self, rate=1.0, always_level=logging.WARNING):
+        """
+        Args:
+            rate (float): Proportion des événements conservés (0 < rate <= 1)
+            always_level (int): Niveau à partir duquel tout est conservé
+        """
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.always_level = always_level
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= self.always_level:
+            return True
+        if not self.every:
+            return False
+        return next(self._counter) % self.every == 0
+
+
+def _configure(handler, level):
+    logger = logging.getLogger(ROOT_LOGGER)
+    for existing in [h for h in logger.handlers if not isinstance(h, logging.NullHandler)]:
+        logger.removeHandler(existing)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def configure_cli_logging(level=logging.INFO, stream=None):
+    """Sortie console lisible (mode interactif d'Algorithmev1)"""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(HumanFormatter())
+    return _configure(handler, level)
+
+
+def configure_structured_logging(level=logging.INFO, stream=None, sample_rate=1.0):
+    """Sortie clé=valeur pour les lots et le service, avec échantillonnage optionnel"""
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(KeyValueFormatter())
+    if sample_rate < 1.0:
+        handler.addFilter(SamplingFilter(sample_rate))
+    return _configure(handler, level)
@@ -0,0 +1,310 @@
+"""
+Métriques au format Prometheus
+Compteurs et histogrammes en mémoire (cache, appels Yahoo, limiteur de débit, rendu des pages),
+exposés en texte Prometheus via un petit serveur HTTP local ou un fichier lu par un sidecar
+
+Exposition (variables d'environnement, lues par start_exporters_from_env):
+    METRICS_PORT=9464                 -> http://127.0.0.1:9464/metrics
+    METRICS_TEXTFILE=/var/lib/node_exporter/analyseur.prom  (réécrit toutes les 15 s)
+
+Un incrément de compteur ne prend que le verrou de sa combinaison de labels (quelques centaines
+de nanosecondes au plus, recherche des labels comprise) ; garder une référence à metric.labels(...)
+évite même la recherche. Les histogrammes prennent de même le verrou de leur combinaison de labels.
+"""
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _CounterValue:
+    """Valeur d'un compteur pour une combinaison de labels (verrou propre, rarement disputé)"""
+
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        with self._lock:
+            return self._value
+
+
+class _Timer:
+    """Mesure la durée d'un bloc 'with' dans un histogramme"""
+
+    __slots__ = ('_child', '_t0')
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._t0)
+        return False
+
+
+class _HistogramValue:
+    """Répartition des observations d'un histogramme pour une combinaison de labels"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Metric:
+    """Métrique nommée, déclinée par valeurs de labels"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Valeur associée à une combinaison de labels (créée au premier appel)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: labels attendus {self.labelnames}, reçus {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_text(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in pairs)
+        return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in sorted(children):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}{self._label_text(values)} {_format_value(child.value)}']
+
+
+class Histogram(_Metric):
+    """Histogramme à seaux fixes (durées en secondes)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            cumulative += n
+            le = '+Inf' if bound == float('inf') else f'{bound:g}'
+            lines.append(f'{self.name}_bucket{self._label_text(values, [("le", le)])} {cumulative}')
+        lines.append(f'{self.name}_sum{self._label_text(values)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{self._label_text(values)} {count}')
+        return lines
+
+
+class Registry:
+    """Ensemble des métriques d'un processus"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Toutes les métriques au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return '\n'.join(line for m in metrics for line in m.render()) + '\n'
+
+
+# Registre unique du processus : les modules importés survivent aux reruns Streamlit
+REGISTRY = Registry()
+
+CACHE_HITS = REGISTRY.counter('analyseur_cache_hits_total', "Lectures du cache servies", ['dataset'])
+CACHE_MISSES = REGISTRY.counter('analyseur_cache_misses_total', "Lectures du cache absentes ou expirées", ['dataset'])
+CACHE_EVICTIONS = REGISTRY.counter('analyseur_cache_evictions_total', "Entrées évincées par la limite de taille (LRU)",
+                                   ['dataset'])
+UPSTREAM_CALLS = REGISTRY.counter('analyseur_upstream_calls_total', "Appels au fournisseur de données",
+                                  ['method', 'outcome'])
+UPSTREAM_LATENCY = REGISTRY.histogram('analyseur_upstream_latency_seconds',
+                                      "Durée des appels au fournisseur (attente du limiteur exclue)", ['method'])
+UPSTREAM_RETRIES = REGISTRY.counter('analyseur_upstream_retries_total', "Nouvelles tentatives après une erreur transitoire",
+                                    ['method'])
+CIRCUIT_TRANSITIONS = REGISTRY.counter('analyseur_circuit_transitions_total', "Changements d'état des disjoncteurs",
+                                       ['host', 'state'])
+CIRCUIT_REJECTED = REGISTRY.counter('analyseur_circuit_rejected_total', "Appels refusés par un disjoncteur ouvert", ['host'])
+STALE_SERVED = REGISTRY.counter('analyseur_stale_served_total', "Valeurs périmées servies faute de source disponible",
+                                ['dataset'])
+REVALIDATIONS = REGISTRY.counter('analyseur_revalidations_total', "Rechargements en arrière-plan", ['dataset', 'outcome'])
+RATE_LIMIT_WAIT = REGISTRY.histogram('analyseur_rate_limiter_wait_seconds', "Attente d'un jeton du limiteur de débit",
+                                     buckets=(0.0001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+SCHEDULER_WAIT = REGISTRY.histogram('analyseur_scheduler_wait_seconds',
+                                    "Attente d'un appel Yahoo dans l'ordonnanceur (file et jeton)", ['priority'],
+                                    buckets=(0.0001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+SCHEDULER_GRANTS = REGISTRY.counter('analyseur_scheduler_grants_total', "Appels Yahoo autorisés par l'ordonnanceur",
+                                    ['priority'])
+PAGE_RENDER = REGISTRY.histogram('analyseur_page_render_seconds', "Durée de rendu d'un onglet Streamlit",
+                                 ['page', 'tab'])
+RANKING_LATE = REGISTRY.counter('analyseur_ranking_late_tickers_total',
+                               "Tickers non chargés à l'échéance d'un classement (terminés en arrière-plan)", ['page'])
+RENDER_BUDGET_CALLS = REGISTRY.histogram('analyseur_render_budget_calls', "Appels Yahoo consommés par affichage d'une page",
+                                         ['page'], buckets=(0, 5, 10, 20, 40, 60, 100, 200, 400))
+RENDER_BUDGET_EXHAUSTED = REGISTRY.counter('analyseur_render_budget_exhausted_total',
+                                           "Affichages ayant épuisé leur budget d'appels ou de temps", ['page', 'reason'])
+RENDER_DEGRADED_ROWS = REGISTRY.counter('analyseur_render_degraded_rows_total',
+                                        "Lignes servies périmées ou absentes faute de budget", ['page', 'kind'])
+
+
+def render_timer(page, tab):
+    """Context manager mesurant le rendu d'un onglet : with tab1, render_timer('classements', 'top100'):"""
+    return PAGE_RENDER.labels(page, tab).time()
+
+
+# ---------------------------------------------------------
+# EXPOSITION
+# ---------------------------------------------------------
+def write_textfile(path, registry=REGISTRY):
+    """Écrit les métriques dans un fichier (renommage atomique, pour le textfile collector)"""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='127.0.0.1', registry=REGISTRY):
+    """Sert /metrics dans un thread démon ; renvoie le serveur (port=0 pour un port libre)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def start_textfile_writer(path, interval=15.0, registry=REGISTRY):
+    """Réécrit le fichier de métriques toutes les interval secondes dans un thread démon"""
+    def loop():
+        while True:
+            try:
+                write_textfile(path, registry)
+            except OSError:
+                pass
+            time.sleep(interval)
+    thread = threading.Thread(target=loop, name='metrics-textfile', daemon=True)
+    thread.start()
+    return thread
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters_from_env():
+    """Démarre une seule fois par processus les expositions demandées par METRICS_PORT / METRICS_TEXTFILE"""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if os.environ.get('METRICS_PORT'):
+            start_http_server(int(os.environ['METRICS_PORT']), os.environ.get('METRICS_HOST', '127.0.0.1'))
+        if os.environ.get('METRICS_TEXTFILE'):
+            start_textfile_writer(os.environ['METRICS_TEXTFILE'], float(os.environ.get('METRICS_INTERVAL', 15)))
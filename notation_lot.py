@@ -0,0 +1,295 @@
+"""
+Notation par lots (non interactive)
+Lit une liste de tickers, les note en parallèle et écrit les résultats au fil de l'eau
+
+Exemples:
+    python notation_lot.py -i univers.txt --horizon court --horizon long -o scores.csv
+    cat tickers.txt | python notation_lot.py --format jsonl --workers 16 --cache-dir .cache
+    python notation_lot.py -i univers.txt --format parquet -o scores_parquet/
+"""
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from Algorithmev1 import StockScorer, TimingsAggregate
+from cache_donnees import DataCache, DiskCache
+from journalisation import configure_structured_logging, get_logger, log_event
+from ordonnanceur import BATCH, set_default_priority
+
+logger = get_logger('lot')
+
+COLUMNS = ['ticker', 'horizon', 'status', 'score', 'name', 'sector', 'industry',
+           'scores', 'error', 'started_at', 'elapsed_s', 'fetch_s', 'score_s', 'cache_hits', 'cache_misses']
+
+
+def read_tickers(stream):
+    """
+    Lit les tickers d'un fichier (un par ligne ou séparés par des virgules)
+    Les lignes vides et les commentaires (#) sont ignorés, les doublons supprimés
+    """
+    tickers = []
+    seen = set()
+    for line in stream:
+        line = line.split('#', 1)[0]
+        for ticker in line.replace(',', ' ').split():
+            ticker = ticker.strip().upper()
+            if ticker and ticker not in seen:
+                seen.add(ticker)
+                tickers.append(ticker)
+    return tickers
+
+
+def score_one(ticker, horizon, cache, aggregate=None):
+    """
+    Note un ticker pour un horizon
+
+    Args:
+        aggregate (TimingsAggregate): Collecte optionnelle des mesures du scorer
+
+    Returns:
+        dict: Ligne de résultat (statut 'ok', 'not_found' ou 'error', durée en secondes)
+    """
+    started = time.time()
+    t0 = time.perf_counter()
+    row = {'ticker': ticker, 'horizon': horizon, 'status': 'ok', 'score': None, 'name': None,
+           'sector': None, 'industry': None, 'scores': None, 'error': None,
+           'started_at': datetime.fromtimestamp(started).isoformat(timespec='seconds')}
+    scorer = None
+    try:
+        scorer = StockScorer(ticker, horizon, cache=cache)
+        score = scorer.calculate_score()
+        if score is None and scorer.fetch_error is not None:
+            e = scorer.fetch_error
+            row.update(status='error', error=f"{type(e).__name__}: {e}")
+        elif score is None:
+            row['status'] = 'not_found'
+        else:
+            row.update(score=score, name=scorer.info.get('longName'), sector=scorer.sector,
+                       industry=scorer.industry, scores=json.dumps(scorer.scores, ensure_ascii=False))
+    except Exception as e:
+        row.update(status='error', error=f"{type(e).__name__}: {e}")
+    row['elapsed_s'] = round(time.perf_counter() - t0, 3)
+    log_event(logger, logging.ERROR if row['status'] == 'error' else logging.INFO, 'score',
+              ticker=ticker, horizon=horizon, stage='score_one', duration_ms=row['elapsed_s'] * 1000,
+              outcome=row['status'], error=row['error'])
+    if scorer is not None:
+        counts = scorer.timings.cache_counts()
+        row.update(fetch_s=round(scorer.timings.total('fetch'), 3), score_s=round(scorer.timings.total('score'), 3),
+                   cache_hits=counts['hit'] + counts['memo'], cache_misses=counts['miss'])
+        if aggregate is not None:
+            aggregate.add(scorer.timings)
+    return row
+
+
+# ---------------------------------------------------------
+# SORTIES (CSV, JSON Lines, Parquet)
+# ---------------------------------------------------------
+def _truncate_partial_line(path):
+    """Supprime une éventuelle dernière ligne incomplète (écriture interrompue par un crash)"""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+class CsvSink:
+    """Sortie CSV, une ligne écrite et vidée par résultat"""
+
+    def __init__(self, path):
+        self.path = path
+        resume = path != '-' and os.path.exists(path) and os.path.getsize(path) > 0
+        if resume:
+            _truncate_partial_line(path)
+        self._file = sys.stdout if path == '-' else open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+        if not resume:
+            self._writer.writeheader()
+
+    def existing(self):
+        """Lignes déjà présentes dans le fichier de sortie"""
+        if self.path == '-' or not os.path.exists(self.path):
+            return []
+        with open(self.path, newline='', encoding='utf-8') as f:
+            return [r for r in csv.DictReader(f) if r.get('status')]
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class JsonlSink:
+    """Sortie JSON Lines, un objet par ligne"""
+
+    def __init__(self, path):
+        self.path = path
+        if path != '-' and os.path.exists(path):
+            _truncate_partial_line(path)
+        self._file = sys.stdout if path == '-' else open(path, 'a', encoding='utf-8')
+
+    def existing(self):
+        if self.path == '-' or not os.path.exists(self.path):
+            return []
+        rows = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue
+        return rows
+
+    def write(self, row):
+        self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetSink:
+    """
+    Sortie Parquet : un dossier de fichiers part-NNNNN.parquet
+
+    Un fichier Parquet n'est lisible qu'une fois son pied de page écrit ; on
+    écrit donc des fragments complets (renommage atomique) tous les rows_per_part
+    résultats. Un crash ne perd que le fragment en cours.
+    """
+
+    def __init__(self, path, rows_per_part=500):
+        if path == '-':
+            raise ValueError("La sortie Parquet nécessite un dossier (-o DOSSIER)")
+        import pandas as pd
+        self._pd = pd
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+        self._part = len(glob.glob(os.path.join(path, 'part-*.parquet')))
+
+    def existing(self):
+        parts = sorted(glob.glob(os.path.join(self.path, 'part-*.parquet')))
+        if not parts:
+            return []
+        return self._pd.concat([self._pd.read_parquet(p) for p in parts]).to_dict('records')
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        target = os.path.join(self.path, f'part-{self._part:05d}.parquet')
+        tmp = target + '.tmp'
+        self._pd.DataFrame(self._buffer, columns=COLUMNS).to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+        self._part += 1
+        self._buffer = []
+
+    def write(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.rows_per_part:
+            self._flush()
+
+    def close(self):
+        self._flush()
+
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonlSink, 'parquet': ParquetSink}
+
+
+def print_timings(aggregate, stream=sys.stderr):
+    """Tableau des durées agrégées par étape, la plus coûteuse d'abord"""
+    cache = aggregate.cache_counts()
+    print(f"Cache: {cache['hit']} hit, {cache['memo']} memo, {cache['miss']} miss", file=stream)
+    print(f"{'Étape':<28}{'Type':<7}{'N':>7}{'Total s':>10}{'Moy. ms':>10}{'p95 ms':>10}{'Max ms':>10}", file=stream)
+    for r in aggregate.summary():
+        print(f"{r['stage']:<28}{r['kind']:<7}{r['count']:>7}{r['total_s']:>10.3f}{r['mean_ms']:>10.2f}"
+              f"{r['p95_ms']:>10.2f}{r['max_ms']:>10.2f}", file=stream)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='notation_lot',
+        description="Notation par lots des actions (Algorithmev1.StockScorer)")
+    parser.add_argument('-i', '--input', default='-',
+                        help="Fichier de tickers (un par ligne), '-' pour l'entrée standard (défaut)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="Fichier (ou dossier pour parquet) de sortie, '-' pour la sortie standard (défaut)")
+    parser.add_argument('-f', '--format', choices=sorted(SINKS), default='csv',
+                        help="Format de sortie (défaut: csv)")
+    parser.add_argument('--horizon', action='append', choices=['court', 'long'],
+                        help="Horizon(s) de notation, répétable (défaut: long)")
+    parser.add_argument('-w', '--workers', type=int, default=8,
+                        help="Nombre de tickers notés en parallèle (défaut: 8)")
+    parser.add_argument('--cache-dir',
+                        help="Dossier de cache disque des données Yahoo (défaut: cache mémoire)")
+    parser.add_argument('--cache-ttl', type=float, default=86400,
+                        help="Durée de validité du cache disque en secondes (défaut: 86400)")
+    parser.add_argument('--timings', action='store_true',
+                        help="Affiche en fin de traitement les durées agrégées par étape (sur la sortie d'erreur)")
+    parser.add_argument('--retry-errors', action='store_true',
+                        help="À la reprise, renote les tickers en statut 'error' (la nouvelle ligne s'ajoute à la suite)")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="Niveau des journaux clé=valeur sur la sortie d'erreur (défaut: WARNING)")
+    parser.add_argument('--log-sample', type=float, default=1.0,
+                        help="Proportion des événements INFO/DEBUG journalisés, ex: 0.01 (défaut: 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Point d'entrée de la notation par lots ; renvoie le code de sortie"""
+    args = parse_args(argv)
+    configure_structured_logging(getattr(logging, args.log_level), sample_rate=args.log_sample)
+    set_default_priority(BATCH)
+    horizons = args.horizon or ['long']
+
+    if args.input == '-':
+        tickers = read_tickers(sys.stdin)
+    else:
+        with open(args.input, encoding='utf-8') as f:
+            tickers = read_tickers(f)
+
+    sink = SINKS[args.format](args.output)
+
+    # Reprise : on saute les couples (ticker, horizon) déjà écrits
+    done = {(r['ticker'], r['horizon']) for r in sink.existing()
+            if not (args.retry_errors and r['status'] == 'error')}
+    jobs = [(t, h) for t in tickers for h in horizons if (t, h) not in done]
+    if done:
+        print(f"Reprise: {len(done)} résultats déjà présents, {len(jobs)} restants", file=sys.stderr)
+
+    cache = DiskCache(args.cache_dir, ttl=args.cache_ttl) if args.cache_dir else DataCache(max_entries=50000)
+    counts = {'ok': 0, 'not_found': 0, 'error': 0}
+    aggregate = TimingsAggregate()
+    t0 = time.perf_counter()
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(score_one, t, h, cache, aggregate) for t, h in jobs]
+            for future in as_completed(futures):
+                row = future.result()
+                sink.write(row)
+                counts[row['status']] += 1
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - t0
+    print(f"Terminé en {elapsed:.1f} s: {counts['ok']} ok, {counts['not_found']} introuvables, "
+          f"{counts['error']} erreurs", file=sys.stderr)
+    if args.timings:
+        print_timings(aggregate)
+    return 1 if counts['error'] and not counts['ok'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Ordonnanceur des appels vers Yahoo Finance
+Tous les appels du processus partagent le même débit (chargement_concurrent.upstream_limiter) :
+sans ordre de passage, un clic sur "Lancer l'analyse" attendrait derrière des centaines de
+chargements de masse. L'ordonnanceur distribue les jetons du limiteur par classe de priorité :
+
+    INTERACTIVE   analyse demandée par un utilisateur (StockScorer, /score)
+    VISIBLE       classement affiché à l'écran
+    PREFETCH      arrière-plan : revalidations, compléments de classement (défaut)
+    BATCH         traitements de masse (notation_lot, snapshot_univers, /batch_score)
+
+- À priorité égale, les sessions sont servies à tour de rôle (la moins récemment servie
+  d'abord), puis chaque session dans l'ordre d'arrivée
+- Vieillissement : une demande gagne une classe toutes les FETCH_AGING_SECONDS (5 s par
+  défaut) d'attente, un traitement de masse n'est donc jamais affamé
+
+La priorité et la session sont portées par une variable de contexte, comme le budget
+d'affichage : elles suivent les chargements lancés par iter_batches.
+"""
+
+import contextvars
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from chargement_concurrent import upstream_limiter
+from metriques import SCHEDULER_GRANTS, SCHEDULER_WAIT
+
+INTERACTIVE, VISIBLE, PREFETCH, BATCH = 0, 1, 2, 3
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', VISIBLE: 'visible', PREFETCH: 'prefetch', BATCH: 'batch'}
+
+# Priorité des threads sans contexte (revalidations) ; set_default_priority pour un processus de masse
+_default_priority = PREFETCH
+_request = contextvars.ContextVar('fetch_request', default=None)
+
+
+def set_default_priority(priority):
+    """Priorité des appels hors de tout contexte (à appeler dans le main d'un traitement de masse)"""
+    global _default_priority
+    _default_priority = priority
+
+
+def set_fetch_priority(priority, session=None):
+    """Priorité et session de l'exécution en cours (à appeler en haut du script d'une page)"""
+    _request.set((priority, session))
+
+
+@contextmanager
+def fetch_priority(priority, session=None):
+    """
+    Priorité des appels lancés dans le bloc
+
+    Args:
+        priority (int): INTERACTIVE, VISIBLE, PREFETCH ou BATCH
+        session (str): Session demandeuse (None = celle du contexte courant)
+    """
+    token = _request.set((priority, session if session is not None else current_session()))
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def current_priority():
+    request = _request.get()
+    return _default_priority if request is None else request[0]
+
+
+def current_session():
+    request = _request.get()
+    return None if request is None else request[1]
+
+
+class FetchScheduler:
+    """File d'attente à priorités devant un limiteur de débit (même interface wait() que RateLimiter)"""
+
+    def __init__(self, limiter, aging_seconds=5.0, max_sessions=1000):
+        """
+        Args:
+            limiter (RateLimiter): Seau à jetons partagé
+            aging_seconds (float): Attente après laquelle une demande gagne une classe
+            max_sessions (int): Nombre de sessions dont le dernier passage est mémorisé
+        """
+        self.limiter = limiter
+        self.aging_seconds = aging_seconds
+        self.max_sessions = max_sessions
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._last_grant = {}
+        self._seq = itertools.count()
+
+    def _rank(self, ticket, now):
+        priority, session, enqueued, seq = ticket
+        promoted = max(INTERACTIVE, priority - int((now - enqueued) / self.aging_seconds))
+        return promoted, self._last_grant.get(session, 0.0), seq
+
+    def _head(self):
+        now = time.monotonic()
+        return min(self._waiting, key=lambda ticket: self._rank(ticket, now))
+
+    def wait(self):
+        """Bloque jusqu'à ce que la demande soit en tête de file et qu'un jeton soit disponible"""
+        priority, session = current_priority(), current_session()
+        t0 = time.perf_counter()
+        with self._cond:
+            ticket = (priority, session, time.monotonic(), next(self._seq))
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    if self._head() is ticket:
+                        delay = self.limiter.try_acquire()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        # Réveil à chaque jeton distribué, et périodiquement pour le vieillissement
+                        self._cond.wait(self.aging_seconds)
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+            self._last_grant[session] = time.monotonic()
+            if len(self._last_grant) > self.max_sessions:
+                oldest = min(self._last_grant, key=self._last_grant.get)
+                del self._last_grant[oldest]
+        name = PRIORITY_NAMES[priority]
+        SCHEDULER_GRANTS.labels(name).inc()
+        SCHEDULER_WAIT.labels(name).observe(time.perf_counter() - t0)
+
+    def queued(self):
+        """Nombre de demandes en attente par classe de priorité"""
+        with self._cond:
+            counts = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+            for ticket in self._waiting:
+                counts[PRIORITY_NAMES[ticket[0]]] += 1
+            return counts
+
+
+# Ordonnanceur unique du processus devant le limiteur de débit Yahoo
+upstream_scheduler = FetchScheduler(upstream_limiter, float(os.environ.get('FETCH_AGING_SECONDS', 5)))
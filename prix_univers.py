@@ -0,0 +1,351 @@
+"""
+Matrice de prix partagée de l'univers
+Un seul index de séances (dates) pour tous les tickers et des matrices denses float32
+dates x tickers pour la clôture et le volume, au lieu d'un DataFrame float64 par ticker,
+par période et par entrée de cache. Les calendriers différents (bourses, jours fériés)
+sont complétés par NaN.
+
+- Ajouts en place : de nouvelles séances en fin d'index ou de nouveaux tickers remplissent
+  la capacité réservée (doublée quand elle est atteinte), sans recopier les données
+- Lectures sans copie : colonnes, fenêtres de dates et séries pandas sont des vues
+- Stockage fichier optionnel (np.memmap) : PRICE_STORE_DIR=/chemin partage la matrice entre
+  processus et redémarrages ; l'index et la liste des tickers sont écrits au plus toutes les
+  flush_interval secondes et par close() (appelé à la sortie du processus)
+- Au-delà de max_tickers (PRICE_STORE_MAX_TICKERS, 2048 par défaut), les tickers les moins
+  récemment lus ou chargés sont retirés par lots (un quart de la capacité) : la mémoire reste
+  bornée à séances x max_tickers x 4 octets par champ
+
+Une vue obtenue avant un agrandissement (capacité dépassée ou séance insérée au milieu de
+l'index, tickers retirés) reste lisible mais ne voit plus les ajouts suivants : relire la vue
+après un ajout.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('close', 'volume')
+_SOURCE_COLUMNS = {'close': 'Close', 'volume': 'Volume'}
+_META_FILE = 'meta.json'
+_DATES_FILE = 'dates.npy'
+
+
+def to_days(index):
+    """Index de dates (éventuellement avec fuseau et heure) -> tableau datetime64[D]"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[D]')
+
+
+class PriceStore:
+    """Clôtures et volumes de l'univers en matrices float32 dates x tickers"""
+
+    def __init__(self, path=None, date_capacity=512, ticker_capacity=256, max_tickers=2048, flush_interval=30.0):
+        """
+        Args:
+            path (str): Dossier des fichiers mappés en mémoire (None = en mémoire)
+            date_capacity (int): Nombre de séances réservées
+            ticker_capacity (int): Nombre de tickers réservés
+            max_tickers (int): Nombre de tickers conservés avant éviction des moins récemment utilisés
+            flush_interval (float): Délai minimal entre deux écritures de l'index (stockage fichier)
+        """
+        self.path = path
+        self.max_tickers = max_tickers
+        self.flush_interval = flush_interval
+        self._flushed_at = time.monotonic()
+        self._dirty = False
+        self._used_at = {}
+        self._lock = threading.RLock()
+        self._dates = np.empty(0, dtype='datetime64[D]')
+        self._tickers = []
+        self._columns = {}
+        self._loaded_at = {}
+        self._index_cache = None
+        self._arrays = {}
+        meta = self._read_meta() if path else None
+        if meta:
+            self._open(meta)
+        else:
+            self._n_dates = 0
+            self._allocate(date_capacity, ticker_capacity)
+
+    # ---------------------------------------------------------
+    # STOCKAGE
+    # ---------------------------------------------------------
+    def _file(self, field, generation):
+        return os.path.join(self.path, f'{field}-{generation}.f32')
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.path, _META_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _open(self, meta):
+        self._generation = meta['generation']
+        self._n_dates = meta['n_dates']
+        shape = tuple(meta['shape'])
+        self._arrays = {f: np.memmap(self._file(f, self._generation), dtype=np.float32, mode='r+', shape=shape)
+                        for f in FIELDS}
+        dates = np.load(os.path.join(self.path, _DATES_FILE))
+        self._dates = np.full(shape[0], np.datetime64('NaT'), dtype='datetime64[D]')
+        self._dates[:len(dates)] = dates
+        self._tickers = list(meta['tickers'])
+        self._columns = {t: j for j, t in enumerate(self._tickers)}
+
+    def _new_array(self, field, shape):
+        if self.path is None:
+            return np.full(shape, np.nan, dtype=np.float32)
+        os.makedirs(self.path, exist_ok=True)
+        array = np.memmap(self._file(field, self._generation), dtype=np.float32, mode='w+', shape=shape)
+        array[:] = np.nan
+        return array
+
+    def _allocate(self, date_capacity, ticker_capacity, row_map=None, columns=None):
+        """
+        Nouvelles matrices de la capacité demandée, avec recopie des données existantes
+
+        Args:
+            row_map (np.ndarray): Ligne de destination de chaque séance existante
+                (insertion de séances au milieu de l'index) ; None = mêmes lignes
+            columns (np.ndarray): Anciennes colonnes à recopier, dans l'ordre des tickers
+                (éviction) ; None = les len(tickers) premières
+        """
+        old = self._arrays
+        old_files = [self._file(f, self._generation) for f in FIELDS] if self.path and old else []
+        self._generation = getattr(self, '_generation', -1) + 1
+        n, m = self._n_dates, len(self._tickers)
+        arrays = {}
+        for field in FIELDS:
+            array = self._new_array(field, (date_capacity, ticker_capacity))
+            if field in old and n:
+                rows = slice(0, n) if row_map is None else row_map
+                array[rows, :m] = old[field][:n, :m] if columns is None else old[field][:n][:, columns]
+            arrays[field] = array
+        self._arrays = arrays
+        dates = np.full(date_capacity, np.datetime64('NaT'), dtype='datetime64[D]')
+        dates[:len(self._dates)] = self._dates[:date_capacity]
+        self._dates = dates
+        if old_files:
+            self.flush()
+            # Les vues encore ouvertes gardent l'ancien fichier mappé jusqu'à leur libération
+            for file in old_files:
+                os.remove(file)
+
+    def flush(self):
+        """Écrit les matrices, l'index des séances et les tickers (stockage fichier)"""
+        if self.path is None:
+            return
+        with self._lock:
+            self._flushed_at = time.monotonic()
+            self._dirty = False
+            for array in self._arrays.values():
+                array.flush()
+            np.save(os.path.join(self.path, _DATES_FILE), self._dates[:self._n_dates])
+            meta = {'generation': self._generation, 'n_dates': self._n_dates,
+                    'shape': list(self._arrays['close'].shape), 'tickers': self._tickers}
+            tmp = os.path.join(self.path, f'{_META_FILE}.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(tmp, os.path.join(self.path, _META_FILE))
+
+    def close(self):
+        """Écrit les ajouts pas encore publiés (stockage fichier)"""
+        with self._lock:
+            if self._dirty:
+                self.flush()
+
+    # ---------------------------------------------------------
+    # AJOUTS
+    # ---------------------------------------------------------
+    def _evict(self, count, keep=()):
+        """Retire les count tickers les moins récemment utilisés (hors keep), colonnes restantes recopiées"""
+        keep = set(keep)
+        candidates = sorted((t for t in self._tickers if t not in keep), key=lambda t: self._used_at.get(t, 0.0))
+        victims = set(candidates[:count])
+        if not victims:
+            return
+        columns = np.array([j for j, t in enumerate(self._tickers) if t not in victims], dtype=np.int64)
+        self._tickers = [t for t in self._tickers if t not in victims]
+        self._columns = {t: j for j, t in enumerate(self._tickers)}
+        for ticker in victims:
+            self._loaded_at.pop(ticker, None)
+            self._used_at.pop(ticker, None)
+        self._allocate(*self._arrays['close'].shape, columns=columns)
+
+    def _ensure_tickers(self, tickers):
+        new = [t for t in dict.fromkeys(tickers) if t not in self._columns]
+        if not new:
+            return
+        if self.max_tickers and len(self._tickers) + len(new) > self.max_tickers:
+            # Éviction par lots : la recopie des colonnes restantes est amortie sur un quart de la capacité
+            target = max(0, min(self.max_tickers - len(new), self.max_tickers * 3 // 4))
+            self._evict(len(self._tickers) - target, keep=tickers)
+        capacity = self._arrays['close'].shape[1]
+        needed = len(self._tickers) + len(new)
+        if needed > capacity:
+            grown = 2 * capacity if not self.max_tickers else min(2 * capacity, self.max_tickers)
+            self._allocate(self._arrays['close'].shape[0], max(needed, grown))
+        for ticker in new:
+            self._columns[ticker] = len(self._tickers)
+            self._tickers.append(ticker)
+
+    def _ensure_dates(self, days):
+        """Ajoute les séances absentes de l'index (en place si elles sont toutes postérieures)"""
+        n = self._n_dates
+        current = self._dates[:n]
+        new = np.setdiff1d(days, current)
+        if not len(new):
+            return
+        capacity, tickers = self._arrays['close'].shape
+        needed = n + len(new)
+        if n == 0 or new[0] > current[-1]:
+            if needed > capacity:
+                self._allocate(max(needed, 2 * capacity), tickers)
+            self._dates[n:needed] = new
+        else:
+            merged = np.union1d(current, new)
+            row_map = np.searchsorted(merged, current)
+            self._allocate(capacity if needed <= capacity else max(needed, 2 * capacity), tickers, row_map=row_map)
+            self._dates[:needed] = merged
+        self._n_dates = needed
+        self._index_cache = None
+
+    def add_histories(self, histories):
+        """
+        Ajoute ou met à jour les historiques de plusieurs tickers
+
+        Args:
+            histories (dict): {ticker: DataFrame indexé par date avec 'Close' et 'Volume'}
+        """
+        frames = {t: h for t, h in histories.items() if h is not None and not h.empty}
+        if not frames:
+            return
+        days = {t: to_days(h.index) for t, h in frames.items()}
+        with self._lock:
+            self._ensure_tickers(list(frames))
+            self._ensure_dates(np.unique(np.concatenate(list(days.values()))))
+            dates = self._dates[:self._n_dates]
+            now = time.monotonic()
+            for ticker, hist in frames.items():
+                rows = np.searchsorted(dates, days[ticker])
+                j = self._columns[ticker]
+                for field, source in _SOURCE_COLUMNS.items():
+                    if source in hist:
+                        self._arrays[field][rows, j] = hist[source].to_numpy(dtype=np.float32, na_value=np.nan)
+                self._loaded_at[ticker] = self._used_at[ticker] = now
+            self._dirty = True
+            # Première écriture publiée tout de suite : un autre processus ouvre alors ces fichiers
+            # au lieu d'en créer de nouveaux par-dessus
+            if self.path is not None and (now - self._flushed_at >= self.flush_interval
+                                          or not os.path.exists(os.path.join(self.path, _META_FILE))):
+                self.flush()
+
+    def add_history(self, ticker, hist):
+        """Ajoute ou met à jour l'historique d'un ticker"""
+        self.add_histories({ticker: hist})
+
+    def append_day(self, day, closes, volumes=None):
+        """
+        Ajoute une séance (mise à jour quotidienne), en place
+
+        Args:
+            day: Date de la séance
+            closes (dict): {ticker: clôture}
+            volumes (dict): {ticker: volume}
+        """
+        frames = {t: pd.DataFrame({'Close': [c], 'Volume': [(volumes or {}).get(t, np.nan)]},
+                                  index=pd.DatetimeIndex([day])) for t, c in closes.items()}
+        self.add_histories(frames)
+
+    # ---------------------------------------------------------
+    # LECTURES (vues)
+    # ---------------------------------------------------------
+    @property
+    def tickers(self):
+        return list(self._tickers)
+
+    @property
+    def dates(self):
+        """Index des séances (datetime64[D], vue)"""
+        return self._dates[:self._n_dates]
+
+    def __contains__(self, ticker):
+        return ticker in self._columns
+
+    def __len__(self):
+        return len(self._tickers)
+
+    def loaded_at(self, ticker):
+        """Instant (time.monotonic) du dernier ajout de l'historique du ticker, ou None"""
+        return self._loaded_at.get(ticker)
+
+    def column_index(self, ticker):
+        return self._columns[ticker]
+
+    def matrix(self, field='close'):
+        """Matrice complète séances x tickers (vue)"""
+        return self._arrays[field][:self._n_dates, :len(self._tickers)]
+
+    def rows(self, start=None, end=None):
+        """Tranche de lignes des séances comprises entre start et end (inclus)"""
+        dates = self.dates
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'D')))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'D'),
+                                                               side='right'))
+        return slice(lo, hi)
+
+    def window(self, start=None, end=None, field='close'):
+        """Fenêtre séances x tickers entre deux dates (vue)"""
+        return self.matrix(field)[self.rows(start, end)]
+
+    def column(self, ticker, field='close'):
+        """Série d'un ticker sur toutes les séances (vue, NaN aux séances sans cotation)"""
+        j = self._columns[ticker]
+        self._used_at[ticker] = time.monotonic()
+        return self._arrays[field][:self._n_dates, j]
+
+    def date_index(self):
+        """Index des séances en DatetimeIndex (construit une fois par version de l'index)"""
+        index = self._index_cache
+        if index is None or len(index) != self._n_dates:
+            index = self._index_cache = pd.DatetimeIndex(self.dates)
+        return index
+
+    def series(self, ticker, field='close', dropna=True):
+        """
+        Série pandas d'un ticker indexée par date
+
+        Args:
+            dropna (bool): Retire les séances sans cotation du ticker (autres calendriers) ;
+                False renvoie une vue sans copie
+        """
+        values = self.column(ticker, field)
+        series = pd.Series(values, index=self.date_index(), name=ticker, copy=False)
+        return series[~np.isnan(values)] if dropna else series
+
+    @property
+    def nbytes(self):
+        return sum(a[:self._n_dates, :len(self._tickers)].nbytes for a in self._arrays.values())
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def price_store():
+    """Matrice partagée du processus (fichier si PRICE_STORE_DIR est défini)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore(os.environ.get('PRICE_STORE_DIR') or None,
+                                max_tickers=int(os.environ.get('PRICE_STORE_MAX_TICKERS', 2048)))
+            atexit.register(_store.close)
+        return _store
@@ -0,0 +1,113 @@
+"""
+Profilage à la demande des pages Streamlit
+Réservé aux administrateurs (variable PROFILING_ENABLED=1) ; s'active pour un affichage avec
+?profile=1 dans l'URL ou l'interrupteur de la barre latérale
+
+Usage dans une page:
+    profiler = start_profiling('classements')   # tout en haut du script
+    ...
+    finish_profiling(profiler)                  # tout en bas du script
+
+Désactivé, le coût se limite à la lecture d'une variable d'environnement.
+Seul le thread du script est profilé : le temps passé à attendre les threads
+de chargement (iter_batches) apparaît dans wait() / as_completed().
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+
+import pandas as pd
+import streamlit as st
+
+DEFAULT_TOP_N = 30
+
+# Profileur actif par thread de script : un st.rerun() / st.stop() interrompt le script
+# avant finish_profiling, le profileur orphelin est arrêté à l'affichage suivant
+_active = {}
+
+
+def profiling_allowed():
+    """Le profilage est-il autorisé par l'administrateur ?"""
+    return os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+
+
+def start_profiling(page):
+    """
+    Démarre le profilage de l'affichage en cours s'il est autorisé et demandé
+
+    Args:
+        page (str): Nom de la page (clé de l'interrupteur et nom du fichier téléchargé)
+
+    Returns:
+        cProfile.Profile: Profileur actif, ou None
+    """
+    if not profiling_allowed():
+        return None
+    orphan = _active.pop(threading.get_ident(), None)
+    if orphan is not None:
+        orphan.disable()
+    if not (st.query_params.get('profile') == '1'
+            or st.sidebar.toggle("🧪 Profiler cet affichage", key=f'profile_{page}')):
+        return None
+    profiler = cProfile.Profile()
+    profiler.page = page
+    _active[threading.get_ident()] = profiler
+    profiler.enable()
+    return profiler
+
+
+def hot_functions(stats, top_n=DEFAULT_TOP_N, sort='cumulative'):
+    """
+    Fonctions les plus coûteuses d'un profil
+
+    Args:
+        stats (pstats.Stats): Statistiques du profil
+        top_n (int): Nombre de lignes
+        sort (str): 'cumulative' (temps inclusif) ou 'tottime' (temps propre)
+
+    Returns:
+        DataFrame: Une ligne par fonction, la plus coûteuse d'abord
+    """
+    rows = []
+    for (filename, line, name), (primitive, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({'Fonction': name, 'Fichier': f'{os.path.basename(filename)}:{line}' if line else '(intégrée)',
+                     'Appels': calls, 'Temps propre (s)': tottime, 'Temps cumulé (s)': cumtime,
+                     'Par appel (ms)': cumtime / calls * 1000 if calls else 0.0})
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    column = 'Temps cumulé (s)' if sort == 'cumulative' else 'Temps propre (s)'
+    return df.sort_values(column, ascending=False).head(top_n).reset_index(drop=True)
+
+
+def _dump(profiler):
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def finish_profiling(profiler, top_n=DEFAULT_TOP_N):
+    """Arrête le profileur et affiche le tableau des fonctions coûteuses et le profil téléchargeable"""
+    if profiler is None:
+        return
+    profiler.disable()
+    _active.pop(threading.get_ident(), None)
+    stats = pstats.Stats(profiler)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(top_n)
+
+    with st.expander(f"🧪 Profil de cet affichage ({stats.total_tt:.2f} s)", expanded=True):
+        tab_cum, tab_own = st.tabs(["Temps cumulé", "Temps propre"])
+        with tab_cum:
+            st.dataframe(hot_functions(stats, top_n, 'cumulative'), hide_index=True, use_container_width=True)
+        with tab_own:
+            st.dataframe(hot_functions(stats, top_n, 'tottime'), hide_index=True, use_container_width=True)
+        c1, c2 = st.columns(2)
+        # Format pstats (marshal), lisible par snakeviz ou python -m pstats
+        c1.download_button("⬇️ Profil (.prof)", data=_dump(profiler), file_name=f'{profiler.page}.prof',
+                           mime='application/octet-stream', key=f'profile_dl_{profiler.page}')
+        c2.download_button("⬇️ Résumé (.txt)", data=text.getvalue(), file_name=f'{profiler.page}.txt',
+                           mime='text/plain', key=f'profile_txt_{profiler.page}')
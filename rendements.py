@@ -0,0 +1,168 @@
+"""
+Performances sur fenêtres glissantes (1 jour, 7 jours, 30 jours, YTD, 1 an, 3 ans, 5 ans)
+Calcul unique pour les pages et les traitements : un passage NumPy sur une matrice
+séances x tickers (prix_univers) ou sur l'historique d'un seul ticker.
+
+Conventions (calendrier de cotation de chaque ticker) :
+- perf_1d : dernière clôture contre la séance de cotation précédente du ticker
+- autres fenêtres : dernière clôture contre la première séance du ticker à partir de la date
+  cible (dernière séance - durée calendaire, ou 1er janvier pour YTD), à condition qu'elle
+  tombe à moins de MAX_GAP_DAYS de la cible ; sinon NaN (historique trop court)
+
+Les dates cibles dépendent de la dernière séance, propre à chaque place (Tokyo clôture avant
+New York) : elles sont calculées une fois par dernière séance distincte, c'est-à-dire
+une fois par place, puis réparties sur ses tickers.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from prix_univers import to_days
+
+# Fenêtre -> décalage calendaire depuis la dernière séance (None : séance précédente)
+WINDOWS = {
+    'perf_1d': None,
+    'perf_7d': pd.DateOffset(days=7),
+    'perf_30d': pd.DateOffset(days=30),
+    'perf_ytd': 'ytd',
+    'perf_1y': pd.DateOffset(years=1),
+    'perf_3y': pd.DateOffset(years=3),
+    'perf_5y': pd.DateOffset(years=5),
+}
+
+# Écart maximal entre la date cible et la première séance trouvée (week-ends, fériés, suspensions)
+MAX_GAP_DAYS = 7
+# Nombre de lignes examinées autour d'une ligne cible (index commun à plusieurs calendriers)
+_PROBE_ROWS = 16
+
+
+@lru_cache(maxsize=256)
+def window_targets(last_day):
+    """
+    Dates cibles de chaque fenêtre pour une dernière séance donnée
+
+    Args:
+        last_day (np.datetime64): Dernière séance (jour)
+
+    Returns:
+        dict: {fenêtre: np.datetime64[D]} (fenêtres calendaires uniquement)
+    """
+    last = pd.Timestamp(last_day)
+    targets = {}
+    for name, offset in WINDOWS.items():
+        if offset is None:
+            continue
+        start = last.replace(month=1, day=1) if offset == 'ytd' else last - offset
+        targets[name] = np.datetime64(start, 'D')
+    return targets
+
+
+def _probe(values, rows, cols, step):
+    """
+    Première ligne cotée à partir de rows (vers le bas si step=1, vers le haut si step=-1)
+
+    Returns:
+        np.ndarray: Indice de ligne par colonne, -1 si rien dans la fenêtre examinée
+    """
+    n = values.shape[0]
+    offsets = np.arange(_PROBE_ROWS) * step
+    candidates = rows[None, :] + offsets[:, None]
+    inside = (candidates >= 0) & (candidates < n)
+    clipped = np.clip(candidates, 0, n - 1)
+    valid = inside & ~np.isnan(values[clipped, cols[None, :]])
+    found = valid.any(axis=0)
+    first = valid.argmax(axis=0)
+    return np.where(found, clipped[first, np.arange(len(cols))], -1)
+
+
+def compute_returns(dates, values, windows=WINDOWS):
+    """
+    Performances en % de chaque colonne d'une matrice de prix
+
+    Args:
+        dates (np.ndarray): Séances triées (datetime64[D]), une par ligne
+        values (np.ndarray): Clôtures séances x tickers, NaN aux séances non cotées
+        windows (iterable): Noms des fenêtres à calculer (clés de WINDOWS)
+
+    Returns:
+        dict: {'price', 'last_date', fenêtre...: np.ndarray (une valeur par colonne)}
+    """
+    n, m = values.shape
+    cols = np.arange(m)
+    result = {'price': np.full(m, np.nan), 'last_date': np.full(m, np.datetime64('NaT'), dtype='datetime64[D]')}
+    result.update({w: np.full(m, np.nan) for w in windows})
+    if not n or not m:
+        return result
+
+    # Dernière séance cotée de chaque ticker
+    valid = ~np.isnan(values)
+    has_data = valid.any(axis=0)
+    last = np.where(has_data, n - 1 - valid[::-1].argmax(axis=0), -1)
+    cols, last = cols[has_data], last[has_data]
+    last_price = values[last, cols].astype(np.float64)
+    last_day = dates[last]
+    result['price'][cols] = last_price
+    result['last_date'][cols] = last_day
+
+    def performance(start_rows, mask):
+        out = np.full(len(cols), np.nan)
+        ok = mask & (start_rows >= 0)
+        base = values[start_rows[ok], cols[ok]].astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[ok] = (last_price[ok] / base - 1) * 100
+        return out
+
+    if 'perf_1d' in windows:
+        previous = _probe(values, last - 1, cols, -1)
+        result['perf_1d'][cols] = performance(previous, np.ones(len(cols), dtype=bool))
+
+    calendar = [w for w in windows if WINDOWS[w] is not None]
+    if calendar:
+        # Dates cibles par dernière séance distincte (une par place de cotation)
+        days, inverse = np.unique(last_day, return_inverse=True)
+        targets = [window_targets(d) for d in days]
+        for w in calendar:
+            target = np.array([t[w] for t in targets], dtype='datetime64[D]')[inverse]
+            start = _probe(values, np.searchsorted(dates, target), cols, 1)
+            found = dates[np.maximum(start, 0)]
+            close_enough = (start >= 0) & (start < last) & (found - target <= np.timedelta64(MAX_GAP_DAYS, 'D'))
+            result[w][cols] = performance(start, close_enough)
+    return result
+
+
+def universe_returns(store, tickers=None, windows=WINDOWS):
+    """
+    Performances de tous les tickers d'une matrice partagée, en un passage
+
+    Args:
+        store (PriceStore): Matrice de prix de l'univers
+        tickers (list): Sous-ensemble de tickers (None = tous)
+
+    Returns:
+        DataFrame: Une ligne par ticker (price, last_date, fenêtres)
+    """
+    values = store.matrix('close')
+    names = store.tickers
+    if tickers is not None:
+        names = [t for t in tickers if t in store]
+        values = values[:, [store.column_index(t) for t in names]]
+    return pd.DataFrame(compute_returns(store.dates, values, windows), index=pd.Index(names, name='ticker'))
+
+
+def ticker_returns(hist, windows=WINDOWS):
+    """
+    Performances d'un ticker depuis son historique (même calcul que universe_returns)
+
+    Args:
+        hist (DataFrame): Historique indexé par date avec une colonne 'Close'
+
+    Returns:
+        dict: {fenêtre: performance en % ou NaN}, plus 'price' (dernière clôture)
+    """
+    if hist is None or hist.empty:
+        return dict({w: np.nan for w in windows}, price=np.nan, last_date=np.datetime64('NaT'))
+    close = hist['Close'].to_numpy(dtype=np.float64, na_value=np.nan)
+    result = compute_returns(to_days(hist.index), close[:, None], windows)
+    return {k: v[0].item() if k != 'last_date' else v[0] for k, v in result.items()}
@@ -0,0 +1,313 @@
+"""
+Résilience des appels vers les sources de données (Yahoo Finance, service de notation)
+- Nouvelles tentatives avec attente exponentielle et gigue (full jitter) sur les erreurs
+  transitoires (réseau, délai dépassé, limitation de débit, HTTP 5xx / 429)
+- Disjoncteur par hôte : après une série d'échecs, les appels échouent immédiatement
+  (CircuitOpen) au lieu d'attendre chacun leur délai ; un appel d'essai est laissé passer
+  après reset_timeout secondes
+- Revalidation en arrière-plan : l'appelant est servi avec la dernière valeur connue
+  (marquée périmée) pendant qu'un thread retente le chargement
+
+Réglage par variables d'environnement:
+    UPSTREAM_RETRIES=3              tentatives par appel
+    CIRCUIT_FAILURE_THRESHOLD=5     échecs consécutifs avant ouverture du disjoncteur
+    CIRCUIT_RESET_SECONDS=30        durée d'ouverture avant un appel d'essai
+    UPSTREAM_TIMEOUT_SECONDS=8      délai maximal d'un appel (réduit au temps restant de l'affichage)
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from journalisation import get_logger, log_event
+from metriques import CIRCUIT_REJECTED, CIRCUIT_TRANSITIONS, REVALIDATIONS, UPSTREAM_RETRIES
+
+logger = get_logger('resilience')
+
+# Exceptions transitoires des bibliothèques HTTP (reconnues par nom : requests et curl_cffi
+# sont des dépendances optionnelles de yfinance)
+TRANSIENT_ERROR_NAMES = {'YFRateLimitError', 'RequestException', 'RequestsError', 'CurlError',
+                         'Timeout', 'ConnectionError'}
+
+
+class UpstreamUnavailable(RuntimeError):
+    """Source indisponible : tentatives épuisées sur des erreurs transitoires"""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Disjoncteur ouvert : l'appel n'a pas été tenté"""
+
+
+class CallSlotsExhausted(UpstreamUnavailable):
+    """Tous les threads d'appel sont occupés (appels abandonnés encore en cours) : l'appel n'a pas été tenté"""
+
+
+class CallTimeout(TimeoutError):
+    """Appel sans réponse dans le délai imparti (erreur transitoire)"""
+
+
+# Erreurs réseau de la bibliothèque standard (socket.timeout est un alias de TimeoutError) ;
+# les autres OSError (fichier absent, permission refusée...) ne valent pas une nouvelle tentative
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, socket.gaierror)
+
+
+def is_transient(error):
+    """L'erreur vaut-elle une nouvelle tentative ?"""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and 400 <= code < 600:
+        # Réponse HTTP (urllib.error.HTTPError) : 5xx et 429 seulement
+        return code >= 500 or code == 429
+    reason = getattr(error, 'reason', None)
+    if isinstance(reason, BaseException):
+        # urllib.error.URLError : transitoire selon l'erreur réseau enveloppée
+        return is_transient(reason)
+    return isinstance(error, TRANSIENT_ERRORS) or any(
+        cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class RetryPolicy:
+    """Nombre de tentatives et attente exponentielle avec gigue entre elles"""
+
+    def __init__(self, attempts=3, base_delay=0.25, max_delay=4.0):
+        """
+        Args:
+            attempts (int): Nombre total de tentatives
+            base_delay (float): Attente maximale avant la 2e tentative (secondes), doublée ensuite
+            max_delay (float): Plafond de l'attente
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """Attente avant la tentative attempt + 1 : tirage uniforme dans [0, base * 2^attempt]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+DEFAULT_POLICY = RetryPolicy(int(os.environ.get('UPSTREAM_RETRIES', 3)))
+
+
+class CircuitBreaker:
+    """Disjoncteur d'un hôte : fermé -> ouvert après N échecs -> semi-ouvert (un essai) -> fermé"""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        self.state = state
+        CIRCUIT_TRANSITIONS.labels(self.host, state).inc()
+        log_event(logger, logging.WARNING if state == self.OPEN else logging.INFO, 'circuit',
+                  host=self.host, state=state, failures=self.failures)
+
+    def before_call(self):
+        """Autorise l'appel ou lève CircuitOpen"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN)
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+        CIRCUIT_REJECTED.labels(self.host).inc()
+        raise CircuitOpen(f"{self.host} indisponible (disjoncteur ouvert)")
+
+    def release(self):
+        """Libère l'appel d'essai sans conclure (appel abandonné avant d'atteindre l'hôte)"""
+        with self._lock:
+            self._probing = False
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(host):
+    """Disjoncteur partagé d'un hôte (créé au premier appel)"""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(
+                host, int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5)),
+                float(os.environ.get('CIRCUIT_RESET_SECONDS', 30)))
+        return breaker
+
+
+def call_with_retry(fetch, breaker=None, policy=DEFAULT_POLICY, before_attempt=None, label='call'):
+    """
+    Appelle fetch() avec nouvelles tentatives et disjoncteur
+
+    Args:
+        fetch (callable): Appel vers la source
+        breaker (CircuitBreaker): Disjoncteur de l'hôte (None = aucun)
+        policy (RetryPolicy): Tentatives et attentes
+        before_attempt (callable): Appelé avant chaque tentative (budget, limiteur de débit) ;
+            ses exceptions sont propagées telles quelles
+        label (str): Nom de l'appel (label des métriques)
+
+    Returns:
+        Valeur renvoyée par fetch()
+
+    Raises:
+        CircuitOpen: Disjoncteur ouvert
+        UpstreamUnavailable: Dernière tentative en erreur transitoire
+        Exception: Erreur non transitoire de fetch(), propagée sans nouvelle tentative
+    """
+    for attempt in range(policy.attempts):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            if before_attempt is not None:
+                before_attempt()
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        try:
+            value = fetch()
+        except CallSlotsExhausted:
+            # Saturation locale, pas une panne de l'hôte : ni échec ni succès pour le disjoncteur
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                # L'hôte a répondu : erreur de donnée, pas de panne
+                if breaker is not None:
+                    breaker.on_success()
+                raise
+            if breaker is not None:
+                breaker.on_failure()
+            if attempt == policy.attempts - 1:
+                raise UpstreamUnavailable(f"{label}: {type(e).__name__}: {e}") from e
+            UPSTREAM_RETRIES.labels(label).inc()
+            time.sleep(policy.delay(attempt))
+            continue
+        if breaker is not None:
+            breaker.on_success()
+        return value
+
+
+# ---------------------------------------------------------
+# DÉLAI PAR APPEL
+# ---------------------------------------------------------
+DEFAULT_TIMEOUT = float(os.environ.get('UPSTREAM_TIMEOUT_SECONDS', 8))
+
+# Les bibliothèques HTTP de yfinance n'exposent pas de délai pour tous les appels (.info) :
+# l'appel part dans un thread dédié et l'appelant cesse de l'attendre à l'échéance
+CALL_THREADS = int(os.environ.get('UPSTREAM_CALL_THREADS', 32))
+_call_executor = ThreadPoolExecutor(max_workers=CALL_THREADS, thread_name_prefix='upstream-call')
+# Une place par thread, rendue à la fin réelle de l'appel (même abandonné) : un appel n'est
+# soumis que si un thread est libre, il ne patiente jamais dans la file de l'exécuteur
+_call_slots = threading.BoundedSemaphore(CALL_THREADS)
+
+
+def run_with_timeout(fetch, timeout):
+    """
+    Exécute fetch() en abandonnant l'attente après timeout secondes
+
+    Un appel abandonné se termine en arrière-plan, son résultat est ignoré ; il garde son
+    thread jusque-là. L'attente d'un thread libre est décomptée du même délai mais ne vaut
+    pas échec de la source : CallSlotsExhausted, ignorée par le disjoncteur.
+
+    Raises:
+        CallTimeout: Pas de réponse dans le délai
+        CallSlotsExhausted: Aucun thread libéré dans le délai
+    """
+    if not timeout:
+        return fetch()
+    t0 = time.monotonic()
+    if not _call_slots.acquire(timeout=timeout):
+        raise CallSlotsExhausted(f"{CALL_THREADS} appels en cours depuis plus de {timeout:.1f} s")
+
+    def run():
+        try:
+            return fetch()
+        finally:
+            _call_slots.release()
+    future = _call_executor.submit(run)
+    done, _ = wait([future], timeout=max(0.0, timeout - (time.monotonic() - t0)))
+    if not done:
+        if future.cancel():
+            _call_slots.release()
+        raise CallTimeout(f"pas de réponse en {timeout:.1f} s")
+    return future.result()
+
+
+# ---------------------------------------------------------
+# REVALIDATION EN ARRIÈRE-PLAN
+# ---------------------------------------------------------
+REVALIDATE_POLICY = RetryPolicy(attempts=4, base_delay=2.0, max_delay=30.0)
+MAX_PENDING_REVALIDATIONS = 500
+
+# Threads sans contexte d'affichage : les rechargements ne consomment pas le budget d'une page
+_revalidator = ThreadPoolExecutor(max_workers=int(os.environ.get('REVALIDATE_THREADS', 4)),
+                                  thread_name_prefix='revalidate')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _revalidate(key, refresh, policy):
+    outcome = 'failed'
+    try:
+        for attempt in range(policy.attempts):
+            try:
+                refresh()
+                outcome = 'ok'
+                break
+            except UpstreamUnavailable:
+                time.sleep(policy.delay(attempt))
+            except Exception:
+                outcome = 'error'
+                break
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
+        REVALIDATIONS.labels(str(key[0]), outcome).inc()
+
+
+def revalidate(key, refresh, policy=REVALIDATE_POLICY):
+    """
+    Planifie un rechargement en arrière-plan (un seul à la fois par clé)
+
+    Args:
+        key (tuple): Identifiant du rechargement, premier élément = jeu de données (label des métriques)
+        refresh (callable): Recharge la donnée et met le cache à jour
+
+    Returns:
+        bool: True si un rechargement a été planifié
+    """
+    with _pending_lock:
+        if key in _pending or len(_pending) >= MAX_PENDING_REVALIDATIONS:
+            return False
+        _pending.add(key)
+    _revalidator.submit(_revalidate, key, refresh, policy)
+    return True
@@ -0,0 +1,111 @@
+"""
+Schéma des informations de ticker (yf.Ticker(ticker).info)
+Yahoo renvoie plus d'une centaine de clés par ticker alors que la notation et les pages n'en lisent
+qu'une trentaine : les fournisseurs projettent chaque réponse sur INFO_SCHEMA dès sa réception,
+en normalisant les types (nombres numpy ou chaînes -> float / int, 'Infinity' et NaN écartés).
+Tout ce qui est mis en cache (mémoire, disque, enregistrements) est donc déjà réduit.
+
+Une clé absente de la réponse reste absente : info.get('marketCap', 0) garde son défaut.
+
+Mode strict (INFO_SCHEMA_STRICT=1, pour les tests et le développement) : lire une clé hors du
+schéma lève UnknownInfoField au lieu de renvoyer silencieusement le défaut. Une clé nouvellement
+utilisée doit d'abord être déclarée ici.
+"""
+
+import math
+import os
+
+# Champ -> type normalisé
+INFO_SCHEMA = {
+    # Identité
+    'symbol': str, 'longName': str, 'sector': str, 'industry': str, 'country': str,
+    # Prix et volumes
+    'currentPrice': float, 'regularMarketPrice': float, 'previousClose': float,
+    'fiftyTwoWeekHigh': float, 'fiftyTwoWeekLow': float,
+    'marketCap': int, 'averageVolume': int, 'beta': float,
+    # Valorisation
+    'trailingPE': float, 'forwardPE': float, 'pegRatio': float, 'priceToBook': float, 'dividendYield': float,
+    # Rentabilité et croissance
+    'returnOnEquity': float, 'returnOnAssets': float, 'profitMargins': float, 'operatingMargins': float,
+    'revenueGrowth': float,
+    # Bilan et trésorerie
+    'debtToEquity': float, 'currentRatio': float, 'freeCashflow': int, 'totalDebt': int, 'totalAssets': int,
+}
+
+# Au moins un de ces champs : une cotation existe (ETF et indices n'ont souvent pas currentPrice)
+PRICE_FIELDS = ('currentPrice', 'regularMarketPrice', 'previousClose')
+
+
+class UnknownInfoField(KeyError):
+    """Lecture d'un champ d'info non déclaré dans INFO_SCHEMA (mode strict)"""
+
+
+class StrictInfo(dict):
+    """Info projetée dont la lecture d'un champ hors schéma échoue bruyamment"""
+
+    __slots__ = ()
+
+    @staticmethod
+    def _check(key):
+        if key not in INFO_SCHEMA:
+            raise UnknownInfoField(f"Champ d'info '{key}' absent de INFO_SCHEMA (schema_info.py)")
+
+    def __getitem__(self, key):
+        self._check(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        self._check(key)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        self._check(key)
+        return dict.__contains__(self, key)
+
+    def __reduce__(self):
+        return (StrictInfo, (dict(self),))
+
+
+def strict_mode():
+    return os.environ.get('INFO_SCHEMA_STRICT', '').lower() in ('1', 'true', 'yes')
+
+
+def _normalize(kind, value):
+    """Valeur convertie au type du schéma, ou None si elle est manquante ou invalide"""
+    if value is None or isinstance(value, bool):
+        return None
+    if kind is str:
+        value = str(value).strip()
+        return value or None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number):
+        return None
+    return int(round(number)) if kind is int else number
+
+
+def project_info(raw):
+    """
+    Projette une réponse .info sur INFO_SCHEMA
+
+    Args:
+        raw (dict): Réponse brute du fournisseur (éventuellement None ou vide)
+
+    Returns:
+        dict: Champs du schéma présents et valides, aux types normalisés
+            (StrictInfo en mode strict)
+    """
+    info = {}
+    if raw:
+        for key, kind in INFO_SCHEMA.items():
+            value = _normalize(kind, raw.get(key))
+            if value is not None:
+                info[key] = value
+    return StrictInfo(info) if strict_mode() else info
+
+
+def is_quoted(info):
+    """L'info projetée décrit-elle un titre coté ? (symbole et au moins un prix)"""
+    return bool(info) and 'symbol' in info and any(f in info for f in PRICE_FIELDS)
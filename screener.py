@@ -0,0 +1,386 @@
+"""
+Screener sur le snapshot de l'univers
+Filtre exprimé comme une condition Python, évalué en masques booléens NumPy sur les
+colonnes du snapshot (aucune boucle par ticker, aucun appel Yahoo) :
+
+    pe < 15 and roe > 20% and debt_equity < 50 and region == 'Europe'
+
+- Champs : colonnes du snapshot (trailingPE, perf_1y, score_long...) ou leurs alias (ALIASES)
+- Opérateurs : < <= > >= == != (comparaisons enchaînées acceptées), in / not in [liste],
+  and / or / not, + - * / entre champs numériques ; 20% vaut 0.20
+- Texte (ticker, name, sector, industry, country, region) : égalité sans tenir compte de la casse
+- Valeur manquante : la comparaison n'est ni vraie ni fausse, y compris sous not, != ou not in
+  (l'action est écartée)
+
+L'expression est analysée avec ast et seuls les nœuds ci-dessus sont acceptés (pas d'appel,
+d'attribut ni d'indice) : elle n'est jamais exécutée par eval. Les tris des champs courants
+(SORTED_FIELDS) sont précalculés ; les autres passent par argpartition sur les lignes retenues.
+"""
+
+import ast
+import io
+import operator
+import time
+import tokenize
+from functools import lru_cache, reduce
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from cache_donnees import cached
+from snapshot_univers import SNAPSHOT_DIR, latest_snapshot_path, open_snapshot
+
+# Alias -> colonne du snapshot
+ALIASES = {
+    'pe': 'trailingPE', 'forward_pe': 'forwardPE', 'peg': 'pegRatio', 'pb': 'priceToBook',
+    'roe': 'returnOnEquity', 'roa': 'returnOnAssets', 'margin': 'profitMargins', 'op_margin': 'operatingMargins',
+    'growth': 'revenueGrowth', 'debt_equity': 'debtToEquity', 'current_ratio': 'currentRatio',
+    'fcf': 'freeCashflow', 'div_yield': 'dividendYield', 'cap': 'market_cap', 'avg_volume': 'averageVolume',
+    'high_52w': 'fiftyTwoWeekHigh', 'low_52w': 'fiftyTwoWeekLow', 'score': 'score_long',
+}
+
+STRING_COLUMNS = ('ticker', 'name', 'sector', 'industry', 'country', 'region')
+
+# Tris précalculés à la construction de l'index
+SORTED_FIELDS = ('score_long', 'score_court', 'market_cap', 'perf_1y', 'trailingPE', 'returnOnEquity',
+                 'dividendYield')
+
+# Région : pays du snapshot, à défaut suffixe de place du ticker (sans suffixe : cotation américaine)
+REGIONS = {
+    'Amérique du Nord': ('United States', 'Canada', 'Mexico'),
+    'Europe': ('France', 'Germany', 'Netherlands', 'United Kingdom', 'Switzerland', 'Italy', 'Spain',
+               'Belgium', 'Sweden', 'Denmark', 'Norway', 'Finland', 'Ireland', 'Portugal', 'Austria',
+               'Luxembourg', 'Poland'),
+    'Asie-Pacifique': ('Japan', 'China', 'Hong Kong', 'Taiwan', 'South Korea', 'Singapore', 'India',
+                       'Australia', 'New Zealand', 'Indonesia', 'Thailand', 'Malaysia'),
+}
+SUFFIX_REGIONS = {
+    'PA': 'Europe', 'DE': 'Europe', 'F': 'Europe', 'AS': 'Europe', 'L': 'Europe', 'MI': 'Europe', 'MC': 'Europe',
+    'SW': 'Europe', 'BR': 'Europe', 'ST': 'Europe', 'CO': 'Europe', 'OL': 'Europe', 'HE': 'Europe',
+    'LS': 'Europe', 'VI': 'Europe', 'IR': 'Europe',
+    'T': 'Asie-Pacifique', 'HK': 'Asie-Pacifique', 'KS': 'Asie-Pacifique', 'KQ': 'Asie-Pacifique',
+    'TW': 'Asie-Pacifique', 'SS': 'Asie-Pacifique', 'SZ': 'Asie-Pacifique', 'NS': 'Asie-Pacifique',
+    'BO': 'Asie-Pacifique', 'AX': 'Asie-Pacifique', 'SI': 'Asie-Pacifique',
+    'TO': 'Amérique du Nord', 'V': 'Amérique du Nord', 'MX': 'Amérique du Nord',
+}
+_COUNTRY_REGIONS = {country.lower(): region for region, countries in REGIONS.items() for country in countries}
+
+_COMPARE = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+            ast.Eq: operator.eq, ast.NotEq: operator.ne}
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+class ScreenerError(ValueError):
+    """Expression de filtre invalide (message affichable tel quel)"""
+
+
+def region_of(ticker, country):
+    """Région d'une action depuis son pays, à défaut depuis le suffixe de son ticker"""
+    region = _COUNTRY_REGIONS.get((country or '').lower())
+    if region:
+        return region
+    _, dot, suffix = (ticker or '').rpartition('.')
+    return SUFFIX_REGIONS.get(suffix.upper(), 'Autre') if dot else 'Amérique du Nord'
+
+
+class ScreenerIndex:
+    """Colonnes du snapshot prêtes à filtrer : float64 pour les nombres, codes entiers pour le texte"""
+
+    def __init__(self, table):
+        """
+        Args:
+            table (pyarrow.Table): Snapshot de l'univers (snapshot_univers.SCHEMA)
+        """
+        self.size = table.num_rows
+        self.numeric = {}
+        self.strings = {}
+        for name in table.column_names:
+            column = table[name]
+            if name in STRING_COLUMNS:
+                self._encode(name, pc.fill_null(column, '').to_pylist())
+            else:
+                self.numeric[name] = column.to_numpy().astype(np.float64)
+        self._encode('region', [region_of(t, c) for t, c in zip(self.column_values('ticker'),
+                                                               self.column_values('country'))])
+        self._orders = {}
+        for name in SORTED_FIELDS:
+            if name in self.numeric:
+                self.order(name, ascending=False)
+
+    def _encode(self, name, values):
+        """Encodage dictionnaire : codes int32 + valeurs distinctes (comparaisons sur les codes)"""
+        categories, codes = np.unique(np.array(values, dtype=object).astype(str), return_inverse=True)
+        lookup = {}
+        for i, value in enumerate(categories.tolist()):
+            lookup.setdefault(value.lower(), []).append(i)
+        self.strings[name] = (codes.astype(np.int32), categories, lookup)
+
+    def column_values(self, name):
+        """Valeurs d'une colonne texte (tableau de chaînes), vide si la colonne est absente"""
+        if name not in self.strings:
+            return np.full(self.size, '', dtype=object)
+        codes, categories, _ = self.strings[name]
+        return categories[codes]
+
+    @property
+    def fields(self):
+        return sorted(self.numeric) + [c for c in STRING_COLUMNS if c in self.strings]
+
+    def resolve(self, name):
+        """Nom de colonne d'un champ ou d'un alias"""
+        column = ALIASES.get(name, name)
+        if column not in self.numeric and column not in self.strings:
+            raise ScreenerError(f"Champ inconnu : '{name}'")
+        return column
+
+    def order(self, column, ascending=False):
+        """Indices des lignes triées sur une colonne numérique (valeurs manquantes en dernier), mis en cache"""
+        key = (column, ascending)
+        order = self._orders.get(key)
+        if order is None:
+            values = self.numeric[column]
+            order = self._orders[key] = np.argsort(values if ascending else -values, kind='stable')
+        return order
+
+    def top(self, mask, column, k, ascending=False):
+        """
+        Indices des k meilleures lignes retenues par mask, triées sur column
+
+        Tri précalculé s'il existe (parcours dans l'ordre), sinon argpartition sur les lignes retenues.
+        """
+        if (column, ascending) in self._orders:
+            order = self._orders[(column, ascending)]
+            return order[mask[order]][:k]
+        rows = np.flatnonzero(mask)
+        values = self.numeric[column][rows]
+        key = values if ascending else -values
+        key = np.where(np.isnan(key), np.inf, key)
+        if k < len(rows):
+            part = np.argpartition(key, k)[:k]
+            rows, key = rows[part], key[part]
+        return rows[np.argsort(key, kind='stable')]
+
+
+# ---------------------------------------------------------
+# COMPILATION DES EXPRESSIONS
+# ---------------------------------------------------------
+class _Text:
+    """Colonne texte dans une expression (seules == / != / in sont permises)"""
+
+    def __init__(self, column):
+        self.column = column
+
+
+class _Truth:
+    """
+    Condition à trois valeurs : masques des lignes où elle est vraie et où elle est fausse
+
+    Les lignes absentes des deux ont une valeur manquante : not les laisse indéterminées
+    au lieu de les retenir, et seules les lignes vraies passent le filtre.
+    """
+
+    def __init__(self, true, false):
+        self.true = true
+        self.false = false
+
+    def __invert__(self):
+        return _Truth(self.false, self.true)
+
+    def __and__(self, other):
+        return _Truth(self.true & other.true, self.false | other.false)
+
+    def __or__(self, other):
+        return _Truth(self.true | other.true, self.false & other.false)
+
+
+def _known(mask):
+    """Condition définie sur toutes les lignes (texte : la chaîne vide est une valeur)"""
+    return _Truth(mask, ~mask)
+
+
+def _percent_literals(text):
+    """Réécrit les nombres suivis de % (20% -> (20/100)), jamais à l'intérieur d'un texte entre guillemets"""
+    tokens = []
+    for token in tokenize.generate_tokens(io.StringIO(text).readline):
+        if token.type == tokenize.OP and token.string == '%' and tokens and tokens[-1][0] == tokenize.NUMBER:
+            number = tokens.pop()[1]
+            tokens += [(tokenize.OP, '('), (tokenize.NUMBER, number), (tokenize.OP, '/'),
+                       (tokenize.NUMBER, '100'), (tokenize.OP, ')')]
+        else:
+            tokens.append((token.type, token.string))
+    return tokenize.untokenize(tokens)
+
+
+def _constant(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _constant(node.operand)
+        if isinstance(value, (int, float)):
+            return -value
+    raise ScreenerError("Les listes ne peuvent contenir que des nombres ou du texte entre guillemets")
+
+
+class Query:
+    """Expression de filtre compilée, évaluable sur n'importe quel ScreenerIndex"""
+
+    def __init__(self, text):
+        self.text = text.strip()
+        try:
+            self.tree = ast.parse(_percent_literals(self.text), mode='eval').body if self.text else None
+        except SyntaxError as e:
+            raise ScreenerError(f"Expression invalide : {e.msg}") from None
+        except tokenize.TokenError as e:
+            raise ScreenerError(f"Expression invalide : {e.args[0]}") from None
+        self.names = sorted({n.id for n in ast.walk(self.tree) if isinstance(n, ast.Name)}) if self.tree else []
+
+    def columns(self, index):
+        """Colonnes lues par l'expression"""
+        return [index.resolve(name) for name in self.names]
+
+    def mask(self, index):
+        """Masque booléen des lignes retenues"""
+        if self.tree is None:
+            return np.ones(index.size, dtype=bool)
+        result = self._eval(self.tree, index)
+        if not isinstance(result, _Truth):
+            raise ScreenerError("L'expression doit être une condition (ex: pe < 15)")
+        return result.true
+
+    def _eval(self, node, index):
+        if isinstance(node, ast.BoolOp):
+            conditions = [self._condition(v, index) for v in node.values]
+            combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+            return reduce(combine, conditions)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~self._condition(node.operand, index)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -self._number(node.operand, index)
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return _ARITHMETIC[type(node.op)](self._number(node.left, index), self._number(node.right, index))
+        if isinstance(node, ast.Compare):
+            return self._compare(node, index)
+        if isinstance(node, ast.Name):
+            column = index.resolve(node.id)
+            return _Text(column) if column in index.strings else index.numeric[column]
+        if (isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str))
+                and not isinstance(node.value, bool)):
+            return node.value
+        raise ScreenerError(f"Élément non autorisé dans un filtre : {ast.unparse(node)}")
+
+    def _condition(self, node, index):
+        value = self._eval(node, index)
+        if not isinstance(value, _Truth):
+            raise ScreenerError(f"Condition attendue : {ast.unparse(node)}")
+        return value
+
+    def _number(self, node, index):
+        value = self._eval(node, index)
+        if isinstance(value, (_Text, _Truth, str)):
+            raise ScreenerError(f"Valeur numérique attendue : {ast.unparse(node)}")
+        return value
+
+    def _compare(self, node, index):
+        mask = None
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            step = self._compare_pair(left, op, right, index)
+            mask = step if mask is None else mask & step
+            left = right
+        return mask
+
+    def _compare_pair(self, left, op, right, index):
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                raise ScreenerError("'in' attend une liste, ex: sector in ['Technology', 'Healthcare']")
+            values = [_constant(v) for v in right.elts]
+            subject = self._eval(left, index)
+            if isinstance(subject, _Text):
+                result = _known(self._text_in(subject, [str(v) for v in values], index))
+            else:
+                number = self._number(left, index)
+                mask = np.isin(number, [float(v) for v in values if not isinstance(v, str)])
+                result = self._truth(mask, [number], index)
+            return ~result if isinstance(op, ast.NotIn) else result
+        if type(op) not in _COMPARE:
+            raise ScreenerError(f"Comparaison non autorisée : {type(op).__name__}")
+        a, b = self._eval(left, index), self._eval(right, index)
+        if isinstance(a, _Text) or isinstance(b, _Text):
+            text, other = (a, b) if isinstance(a, _Text) else (b, a)
+            if not isinstance(other, str) or type(op) not in (ast.Eq, ast.NotEq):
+                raise ScreenerError("Un champ texte se compare avec == ou != à un texte entre guillemets")
+            result = _known(self._text_in(text, [other], index))
+            return ~result if isinstance(op, ast.NotEq) else result
+        if isinstance(a, str) or isinstance(b, str):
+            raise ScreenerError("Texte comparé à un champ numérique")
+        a, b = self._number(left, index), self._number(right, index)
+        with np.errstate(invalid='ignore'):
+            result = _COMPARE[type(op)](a, b)
+        return self._truth(result, [a, b], index)
+
+    @staticmethod
+    def _truth(mask, operands, index):
+        """Comparaison numérique : ni vraie ni fausse là où un opérande est manquant (NaN)"""
+        missing = reduce(np.logical_or, [np.isnan(v) for v in operands])
+        mask = np.broadcast_to(mask, (index.size,))
+        known = ~np.broadcast_to(missing, (index.size,))
+        return _Truth(mask & known, ~mask & known)
+
+    @staticmethod
+    def _text_in(text, values, index):
+        codes, _, lookup = index.strings[text.column]
+        wanted = [c for v in values for c in lookup.get(v.strip().lower(), [])]
+        return np.isin(codes, wanted)
+
+
+@lru_cache(maxsize=256)
+def compile_query(text):
+    """Expression compilée (mise en cache par texte)"""
+    return Query(text)
+
+
+def screen(index, expression, sort_by='score_long', k=50, ascending=False):
+    """
+    Actions du snapshot vérifiant l'expression, triées
+
+    Args:
+        index (ScreenerIndex): Snapshot indexé
+        expression (str): Filtre (vide = toutes les actions)
+        sort_by (str): Champ de tri (colonne ou alias)
+        k (int): Nombre maximal de lignes renvoyées
+        ascending (bool): Ordre croissant
+
+    Returns:
+        tuple: (DataFrame des k premières lignes, nombre total de lignes retenues, durée en secondes)
+
+    Raises:
+        ScreenerError: Expression ou champ de tri invalide
+    """
+    t0 = time.perf_counter()
+    query = compile_query(expression)
+    column = index.resolve(sort_by)
+    if column not in index.numeric:
+        raise ScreenerError(f"Tri impossible sur un champ texte : '{sort_by}'")
+    mask = query.mask(index)
+    rows = index.top(mask, column, k, ascending)
+    elapsed = time.perf_counter() - t0
+
+    columns = list(dict.fromkeys(['score_long', column] + [c for c in query.columns(index) if c in index.numeric]))
+    frame = pd.DataFrame({name: index.column_values(name)[rows] for name in ('ticker', 'name', 'sector', 'region')})
+    for name in columns:
+        frame[name] = index.numeric[name][rows]
+    frame.index = np.arange(1, len(frame) + 1)
+    return frame, int(mask.sum()), elapsed
+
+
+@cached('screener', ttl=None)
+def _index_for(path):
+    return ScreenerIndex(open_snapshot(path))
+
+
+def load_screener(directory=SNAPSHOT_DIR):
+    """Index du dernier snapshot publié (construit une fois par version), ou None"""
+    path = latest_snapshot_path(directory)
+    return None if path is None else _index_for(path)
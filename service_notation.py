@@ -0,0 +1,356 @@
+"""
+Service HTTP/JSON de notation
+Un seul processus note les actions pour toutes les répliques Streamlit (cache partagé,
+regroupement des requêtes identiques, concurrence bornée)
+
+Lancement:
+    python service_notation.py --port 8765
+
+Endpoints:
+    GET  /score?ticker=AAPL&horizon=long
+    POST /batch_score      {"tickers": ["AAPL", "MSFT"], "horizons": ["court", "long"]}
+    GET  /snapshot?tickers=AAPL,MSFT
+    GET  /health
+    GET  /metrics          (format texte Prometheus)
+
+Priorité des appels Yahoo (ordonnanceur) : /score interactive, /snapshot visible, /batch_score
+de masse ; l'en-tête X-Fetch-Session identifie la session Streamlit demandeuse.
+
+Côté Streamlit, définir SCORING_SERVICE_URL=http://hote:8765 pour passer par le service.
+"""
+
+import argparse
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Algorithmev1 import StockScorer
+from cache_donnees import DataCache
+from donnees_marche import fetch_stock_row
+from journalisation import configure_structured_logging
+from metriques import REGISTRY, STALE_SERVED
+from ordonnanceur import BATCH, INTERACTIVE, VISIBLE, current_priority, current_session, fetch_priority
+from resilience import DEFAULT_POLICY, UpstreamUnavailable, breaker_for, call_with_retry, revalidate
+
+
+class BadRequest(ValueError):
+    """Requête invalide (paramètre manquant, horizon inconnu) : réponse HTTP 400"""
+
+
+class _ScoreFailed(Exception):
+    """Notation en erreur : le résultat est renvoyé à l'appelant mais pas mis en cache"""
+
+    def __init__(self, result):
+        super().__init__(result.get('error'))
+        self.result = result
+
+
+def _required(mapping, key):
+    """Valeur d'un paramètre obligatoire de la requête (BadRequest s'il manque)"""
+    value = mapping.get(key)
+    if not value:
+        raise BadRequest(f"Paramètre manquant: {key}")
+    return value
+
+
+def _json_default(value):
+    """Sérialise les scalaires numpy/pandas (int64, float32, Timestamp...)"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class ScoringService:
+    """
+    Logique du service, indépendante du transport HTTP
+
+    Le fournisseur (ou scorer_factory / row_fetcher) est injectable pour tester
+    le service avec des données factices ou rejouées (fournisseurs.ReplayProvider).
+    """
+
+    def __init__(self, scorer_factory=StockScorer, row_fetcher=fetch_stock_row,
+                 cache=None, max_concurrency=8, ttl=300, provider=None, interactive_reserve=2):
+        """
+        Args:
+            scorer_factory (callable): Construit un scorer (ticker, horizon, cache=, provider=)
+            row_fetcher (callable): Construit une ligne de classement (ticker, provider)
+            cache (DataCache): Cache partagé (données Yahoo et résultats)
+            max_concurrency (int): Nombre maximal de calculs simultanés vers Yahoo
+            interactive_reserve (int): Places de max_concurrency que les traitements de masse
+                laissent toujours libres pour les analyses interactives (/score)
+            ttl (float): Durée de validité des données et des résultats en secondes
+            provider (MarketDataProvider): Fournisseur de données (par défaut celui du processus)
+        """
+        self.provider = provider
+        self.scorer_factory = scorer_factory
+        self.row_fetcher = row_fetcher
+        self.ttl = ttl
+        self.cache = cache or DataCache(max_entries=20000, default_ttl=ttl)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bulk_slots = threading.BoundedSemaphore(max(1, max_concurrency - interactive_reserve))
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def _bounded(self, func, *args):
+        # Tous les calculs restent limités à max_concurrency ; les traitements de masse n'en
+        # occupent qu'une partie, pour qu'une analyse interactive n'attende pas derrière eux
+        # (l'ordonnanceur la fait ensuite passer devant pour les appels Yahoo)
+        bulk = current_priority() != INTERACTIVE
+        if bulk:
+            self._bulk_slots.acquire()
+        try:
+            with self._slots:
+                return func(*args)
+        finally:
+            if bulk:
+                self._bulk_slots.release()
+
+    def _compute_score(self, ticker, horizon):
+        t0 = time.perf_counter()
+        scorer = self.scorer_factory(ticker, horizon, cache=self.cache, provider=self.provider)
+        score = scorer.calculate_score()
+        result = {'ticker': ticker, 'horizon': horizon, 'status': 'ok' if score is not None else 'not_found',
+                  'score': score, 'name': None, 'sector': scorer.sector, 'industry': scorer.industry,
+                  'scores': scorer.scores, 'info': scorer.info or {}}
+        if score is None and scorer.fetch_error is not None:
+            result.update(status='error', error=f"{type(scorer.fetch_error).__name__}: {scorer.fetch_error}")
+        elif score is not None:
+            result['name'] = scorer.info.get('longName')
+        result['elapsed_s'] = round(time.perf_counter() - t0, 3)
+        if result['status'] == 'error':
+            # Erreur souvent transitoire (Yahoo indisponible) : la prochaine requête retente
+            raise _ScoreFailed(result)
+        return result
+
+    def score(self, ticker, horizon='long'):
+        """Note un ticker (résultat partagé et mis en cache, sauf s'il est en erreur)"""
+        ticker = ticker.strip().upper()
+        horizon = horizon.lower()
+        if horizon not in ('court', 'long'):
+            raise BadRequest(f"Horizon inconnu: {horizon}")
+        try:
+            return self.cache.get_or_fetch('service_score', (ticker, horizon),
+                                           lambda: self._bounded(self._compute_score, ticker, horizon), self.ttl)
+        except _ScoreFailed as e:
+            return e.result
+
+    def batch_score(self, tickers, horizons=('long',)):
+        """Note plusieurs tickers en parallèle"""
+        futures = [self._executor.submit(contextvars.copy_context().run, self.score, t, h)
+                   for t in tickers for h in horizons]
+        return [f.result() for f in futures]
+
+    def snapshot(self, tickers):
+        """
+        Lignes de classement (prix, capitalisation, performances) ; None pour les tickers indisponibles
+
+        Yahoo indisponible : dernière ligne connue marquée 'stale', rechargée en arrière-plan
+        """
+        def fetch(ticker):
+            return self.cache.get_or_fetch('service_snapshot', (ticker,),
+                                           lambda: self._bounded(self.row_fetcher, ticker, self.provider), self.ttl)
+
+        def row(ticker):
+            try:
+                return fetch(ticker)
+            except UpstreamUnavailable:
+                revalidate(('service_snapshot', ticker), lambda: fetch(ticker))
+                found, value, _ = self.cache.get_stale('service_snapshot', (ticker,))
+                if not found or value is None:
+                    return None
+                STALE_SERVED.labels('service_snapshot').inc()
+                return dict(value, stale=True)
+        # Chaque tâche garde la priorité et la session de la requête
+        futures = [self._executor.submit(contextvars.copy_context().run, row, t.strip().upper()) for t in tickers]
+        return [f.result() for f in futures]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routage HTTP vers ScoringService"""
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, default=_json_default, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, func, priority=INTERACTIVE):
+        try:
+            with fetch_priority(priority, self.headers.get('X-Fetch-Session') or self.client_address[0]):
+                result = func()
+            self._send(200, result)
+        except BadRequest as e:
+            self._send(400, {'error': str(e)})
+        except UpstreamUnavailable as e:
+            self._send(503, {'error': f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            self._send(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        service = self.server.service
+        if url.path == '/score':
+            self._handle(lambda: service.score(_required(query, 'ticker')[0], query.get('horizon', ['long'])[0]))
+        elif url.path == '/snapshot':
+            tickers = [t for t in query.get('tickers', [''])[0].split(',') if t]
+            self._handle(lambda: {'rows': service.snapshot(tickers)}, VISIBLE)
+        elif url.path == '/metrics':
+            body = REGISTRY.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif url.path == '/health':
+            self._send(200, {'status': 'ok', 'cache_entries': len(service.cache)})
+        else:
+            self._send(404, {'error': f"Endpoint inconnu: {url.path}"})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        service = self.server.service
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'error': "Corps JSON invalide"})
+            return
+        if not isinstance(body, dict):
+            self._send(400, {'error': "Corps JSON invalide: objet attendu"})
+            return
+        if url.path == '/batch_score':
+            self._handle(lambda: {'results': service.batch_score(_required(body, 'tickers'), body.get('horizons', ['long']))}, BATCH)
+        elif url.path == '/snapshot':
+            self._handle(lambda: {'rows': service.snapshot(_required(body, 'tickers'))}, VISIBLE)
+        else:
+            self._send(404, {'error': f"Endpoint inconnu: {url.path}"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(service, host='127.0.0.1', port=8765):
+    """Crée le serveur HTTP (port=0 pour un port libre, utile en test)"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+# ---------------------------------------------------------
+# CLIENT (utilisé par les pages Streamlit)
+# ---------------------------------------------------------
+class RemoteScorer:
+    """
+    Équivalent distant de StockScorer : mêmes attributs et mêmes méthodes
+    fetch_data() / calculate_score(), alimentés par le service
+    """
+
+    def __init__(self, client, ticker, horizon='long'):
+        self.client = client
+        self.ticker = ticker.upper()
+        self.horizon = horizon.lower()
+        self.info = None
+        self.sector = None
+        self.industry = None
+        self.scores = {}
+        self.final_score = 0
+        self._result = None
+
+    def fetch_data(self):
+        self._result = self.client.score(self.ticker, self.horizon)
+        self.info = self._result.get('info') or {}
+        self.sector = self._result.get('sector')
+        self.industry = self._result.get('industry')
+        return self._result['status'] == 'ok'
+
+    def calculate_score(self):
+        if self._result is None and not self.fetch_data():
+            return None
+        if self._result['status'] != 'ok':
+            return None
+        self.scores = self._result['scores']
+        self.final_score = self._result['score']
+        return self.final_score
+
+
+class ScoringClient:
+    """Client HTTP minimal (bibliothèque standard uniquement), avec nouvelles tentatives et disjoncteur"""
+
+    def __init__(self, base_url, timeout=30, policy=DEFAULT_POLICY):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.policy = policy
+        self.breaker = breaker_for(urllib.parse.urlparse(self.base_url).netloc)
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if current_session():
+            headers['X-Fetch-Session'] = current_session()
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+
+        def call():
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        return call_with_retry(call, self.breaker, self.policy, label='scoring_service')
+
+    def score(self, ticker, horizon='long'):
+        query = urllib.parse.urlencode({'ticker': ticker, 'horizon': horizon})
+        return self._request(f'/score?{query}')
+
+    def batch_score(self, tickers, horizons=('long',)):
+        return self._request('/batch_score', {'tickers': list(tickers), 'horizons': list(horizons)})['results']
+
+    def snapshot(self, tickers):
+        return self._request('/snapshot', {'tickers': list(tickers)})['rows']
+
+    def scorer(self, ticker, horizon='long'):
+        return RemoteScorer(self, ticker, horizon)
+
+
+def get_client():
+    """Client configuré par la variable SCORING_SERVICE_URL, ou None (appels Yahoo directs)"""
+    url = os.environ.get('SCORING_SERVICE_URL')
+    return ScoringClient(url) if url else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='service_notation', description="Service HTTP de notation des actions")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-concurrency', type=int, default=8,
+                        help="Nombre maximal de calculs simultanés (défaut: 8)")
+    parser.add_argument('--ttl', type=float, default=300,
+                        help="Durée de validité du cache en secondes (défaut: 300)")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="Niveau des journaux clé=valeur (défaut: INFO)")
+    parser.add_argument('--log-sample', type=float, default=1.0,
+                        help="Proportion des événements INFO/DEBUG journalisés (défaut: 1)")
+    args = parser.parse_args(argv)
+    configure_structured_logging(getattr(logging, args.log_level), sample_rate=args.log_sample)
+
+    service = ScoringService(max_concurrency=args.max_concurrency, ttl=args.ttl)
+    server = make_server(service, args.host, args.port)
+    print(f"Service de notation sur http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Session HTTP partagée du processus pour tout le trafic Yahoo Finance
+Sans session fournie, chaque objet yfinance peut ouvrir ses propres connexions et repayer
+la poignée de main TLS. Tous les yf.Ticker / yf.download du projet reçoivent la même
+session : connexions maintenues ouvertes (keep-alive), cookies et crumb Yahoo partagés.
+
+- curl_cffi (dépendance de yfinance, empreinte TLS d'un navigateur) : une poignée curl par
+  thread, qui garde ses connexions ouvertes. Les appels Yahoo partent des threads persistants
+  de resilience.run_with_timeout (UPSTREAM_CALL_THREADS) : le pool compte donc autant de
+  connexions que d'appels simultanés
+- requests (repli si curl_cffi est absent ou YF_DISABLE_CURL_CFFI=1) : un pool de
+  HTTP_POOL_SIZE connexions par hôte, partagé par tous les threads
+
+Réglage par variables d'environnement:
+    HTTP_POOL_SIZE=32               connexions conservées par hôte (défaut : UPSTREAM_CALL_THREADS)
+    HTTP_MAX_CACHED_CONNECTIONS=4   connexions conservées par poignée curl (hôtes Yahoo distincts)
+"""
+
+import os
+import threading
+
+POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', os.environ.get('UPSTREAM_CALL_THREADS', 32)))
+MAX_CACHED_CONNECTIONS = int(os.environ.get('HTTP_MAX_CACHED_CONNECTIONS', 4))
+
+_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+               "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36")
+
+
+def _curl_session():
+    """Session curl_cffi, ou None si la bibliothèque est absente ou désactivée"""
+    if os.environ.get('YF_DISABLE_CURL_CFFI', '').lower() in ('1', 'true', 'yes'):
+        return None
+    try:
+        from curl_cffi import CurlOpt
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        return None
+    return curl_requests.Session(impersonate='chrome',
+                                 curl_options={CurlOpt.MAXCONNECTS: MAX_CACHED_CONNECTIONS})
+
+
+def _requests_session(pool_size):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    # Nouvelles tentatives gérées par resilience.call_with_retry
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = _USER_AGENT
+    return session
+
+
+def new_session(pool_size=POOL_SIZE):
+    """Nouvelle session avec pool de connexions (curl_cffi si disponible, sinon requests)"""
+    return _curl_session() or _requests_session(pool_size)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """Session partagée du processus (créée au premier appel)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
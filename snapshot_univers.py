@@ -0,0 +1,225 @@
+"""
+Snapshot nocturne de l'univers
+Fondamentaux, performances et scores (court et long terme) de toutes les actions suivies,
+écrits dans un fichier Arrow IPC versionné que les pages mappent en mémoire au démarrage
+
+Tâche planifiée (cron), par exemple chaque nuit à 2h:
+    0 2 * * * cd /chemin/du/projet && python snapshot_univers.py --keep 7
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from Algorithmev1 import StockScorer
+from cache_donnees import DataCache, cached
+from donnees_marche import fetch_stock_row
+from enregistrements import FLOAT_FIELDS, INT_FIELDS, RECORD_DTYPE, STRING_FIELDS, RankingTable, strings
+from historique_prix import load_universe_prices
+from ordonnanceur import BATCH, set_default_priority
+from rendements import universe_returns
+from resilience import UpstreamUnavailable
+from univers import all_tickers
+
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots'))
+SNAPSHOT_PREFIX = 'univers-'
+SNAPSHOT_SUFFIX = '.arrow'
+LATEST_POINTER = 'LATEST'
+
+# Champs de StockScorer.info conservés dans le snapshot
+FUNDAMENTAL_FIELDS = [
+    'trailingPE', 'forwardPE', 'pegRatio', 'priceToBook', 'returnOnEquity', 'returnOnAssets',
+    'profitMargins', 'operatingMargins', 'revenueGrowth', 'debtToEquity', 'currentRatio',
+    'freeCashflow', 'dividendYield', 'beta', 'averageVolume', 'fiftyTwoWeekHigh', 'fiftyTwoWeekLow',
+]
+
+# Colonnes des lignes de classement (donnees_marche.fetch_stock_row)
+RANKING_FIELDS = ['price', 'market_cap', 'volume', 'perf_1d', 'perf_7d', 'perf_30d', 'perf_1y',
+                  'pe_ratio', 'dividend_yield']
+
+# Fenêtres longues calculées en un passage sur la matrice de prix de l'univers
+LONG_WINDOWS = ['perf_ytd', 'perf_3y', 'perf_5y']
+
+SCHEMA = pa.schema(
+    [('ticker', pa.string()), ('name', pa.string()), ('sector', pa.string()),
+     ('industry', pa.string()), ('country', pa.string())]
+    + [(f, pa.float64()) for f in RANKING_FIELDS]
+    + [(f, pa.float64()) for f in LONG_WINDOWS]
+    + [(f, pa.float64()) for f in FUNDAMENTAL_FIELDS]
+    + [('score_court', pa.float64()), ('score_long', pa.float64())]
+)
+
+
+def _number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def build_row(ticker, cache):
+    """
+    Construit la ligne de snapshot d'un ticker
+
+    Returns:
+        dict: Ligne conforme à SCHEMA, ou None si aucune donnée n'est disponible
+    """
+    try:
+        ranking = fetch_stock_row(ticker) or {}
+    except UpstreamUnavailable:
+        ranking = {}
+    row = {'ticker': ticker, 'name': ranking.get('name'), 'sector': ranking.get('sector')}
+    row.update({f: _number(ranking.get(f)) for f in RANKING_FIELDS})
+
+    info = {}
+    for horizon in ('court', 'long'):
+        scorer = StockScorer(ticker, horizon, cache=cache)
+        row[f'score_{horizon}'] = _number(scorer.calculate_score())
+        info = scorer.info or info
+
+    if not ranking and not info:
+        return None
+    row['name'] = row['name'] or info.get('longName', ticker)
+    row['sector'] = info.get('sector') or row['sector'] or 'N/A'
+    row['industry'] = info.get('industry')
+    row['country'] = info.get('country')
+    row.update({f: _number(info.get(f)) for f in FUNDAMENTAL_FIELDS})
+    return row
+
+
+def build_snapshot(tickers, workers=8):
+    """Construit la table Arrow de l'univers (tickers notés en parallèle)"""
+    cache = DataCache(max_entries=len(tickers) * 8 + 100)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        rows = [r for r in executor.map(lambda t: build_row(t, cache), tickers) if r]
+    names = [r['ticker'] for r in rows]
+    perf = universe_returns(load_universe_prices(names, period='5y'), names, LONG_WINDOWS).to_dict('index')
+    for row in rows:
+        row.update({w: perf.get(row['ticker'], {}).get(w) for w in LONG_WINDOWS})
+    return pa.Table.from_pylist(rows, schema=SCHEMA)
+
+
+def write_snapshot(table, directory=SNAPSHOT_DIR, keep=7):
+    """
+    Écrit une nouvelle version du snapshot
+
+    Le fichier est écrit sous un nom temporaire puis renommé (os.replace est
+    atomique) ; le pointeur LATEST est mis à jour de la même façon. Un lecteur
+    ne voit donc jamais de fichier partiel.
+
+    Returns:
+        str: Chemin du snapshot écrit
+    """
+    os.makedirs(directory, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    name = f'{SNAPSHOT_PREFIX}{version}{SNAPSHOT_SUFFIX}'
+    path = os.path.join(directory, name)
+
+    tmp = path + '.tmp'
+    # Pas de compression : le fichier peut être mappé en mémoire sans copie
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+    pointer_tmp = os.path.join(directory, LATEST_POINTER + '.tmp')
+    with open(pointer_tmp, 'w') as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(directory, LATEST_POINTER))
+
+    versions = sorted(f for f in os.listdir(directory)
+                      if f.startswith(SNAPSHOT_PREFIX) and f.endswith(SNAPSHOT_SUFFIX))
+    for old in versions[:-keep] if keep else []:
+        os.remove(os.path.join(directory, old))
+    return path
+
+
+def latest_snapshot_path(directory=SNAPSHOT_DIR):
+    """Chemin du dernier snapshot publié, ou None"""
+    try:
+        with open(os.path.join(directory, LATEST_POINTER)) as f:
+            path = os.path.join(directory, f.read().strip())
+        return path if os.path.exists(path) else None
+    except OSError:
+        return None
+
+
+@cached('snapshot_univers', ttl=None)
+def open_snapshot(path):
+    """Mappe un snapshot en mémoire (lecture sans copie, mise en cache par chemin)"""
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def load_latest_snapshot(directory=SNAPSHOT_DIR, max_age=36 * 3600):
+    """
+    Dernier snapshot disponible
+
+    Args:
+        directory (str): Dossier des snapshots
+        max_age (float): Âge maximal accepté en secondes (None = pas de limite)
+
+    Returns:
+        pyarrow.Table: Table mappée en mémoire, ou None si absent ou trop ancien
+    """
+    path = latest_snapshot_path(directory)
+    if path is None:
+        return None
+    if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+        return None
+    return open_snapshot(path)
+
+
+def snapshot_ranking(table, tickers):
+    """
+    Classement d'un snapshot pour une liste de tickers, sans passer par pandas
+
+    Returns:
+        RankingTable: Une ligne par ticker présent dans le snapshot
+    """
+    mask = pc.is_in(table['ticker'], value_set=pa.array(list(tickers), pa.string()))
+    rows = table.filter(mask)
+    data = np.zeros(rows.num_rows, dtype=RECORD_DTYPE)
+    for f in STRING_FIELDS:
+        encoded = pc.fill_null(rows[f], '').combine_chunks().dictionary_encode()
+        codes = np.array([strings.code(s) for s in encoded.dictionary.to_pylist()] or [0], dtype=np.int32)
+        data[f] = codes[encoded.indices.to_numpy(zero_copy_only=False)]
+    for f in FLOAT_FIELDS:
+        data[f] = rows[f].to_numpy()
+    for f in INT_FIELDS:
+        data[f] = np.nan_to_num(pc.fill_null(rows[f], 0).to_numpy())
+    return RankingTable(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='snapshot_univers', description="Construit le snapshot nocturne de l'univers")
+    parser.add_argument('-i', '--input', help="Fichier de tickers (défaut: univers des pages)")
+    parser.add_argument('-d', '--output-dir', default=SNAPSHOT_DIR, help=f"Dossier des snapshots (défaut: {SNAPSHOT_DIR})")
+    parser.add_argument('-w', '--workers', type=int, default=8, help="Nombre de tickers traités en parallèle")
+    parser.add_argument('--keep', type=int, default=7, help="Nombre de versions conservées (défaut: 7)")
+    args = parser.parse_args(argv)
+    set_default_priority(BATCH)
+
+    if args.input:
+        from notation_lot import read_tickers
+        with open(args.input, encoding='utf-8') as f:
+            tickers = read_tickers(f)
+    else:
+        tickers = all_tickers()
+
+    t0 = time.perf_counter()
+    table = build_snapshot(tickers, workers=args.workers)
+    path = write_snapshot(table, args.output_dir, keep=args.keep)
+    print(f"Snapshot écrit: {path} ({table.num_rows}/{len(tickers)} tickers, {time.perf_counter() - t0:.1f} s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
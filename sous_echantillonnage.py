@@ -0,0 +1,77 @@
+"""
+Sous-échantillonnage des séries de prix pour l'affichage
+Largest-Triangle-Three-Buckets (LTTB) : réduit le nombre de points en conservant l'allure de la
+courbe ; le premier et le dernier point ainsi que le minimum et le maximum globaux sont toujours
+conservés (plage de l'axe y et performance de la période inchangées)
+"""
+
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Sélectionne les indices à conserver selon l'algorithme LTTB
+
+    Args:
+        x (array): Abscisses croissantes (numériques, ex: dates en int64)
+        y (array): Ordonnées
+        n_out (int): Nombre de points souhaités
+
+    Returns:
+        ndarray: Indices croissants des points conservés (premier, dernier, minimum et maximum
+            globaux toujours inclus ; un point de plus si ces deux extrêmes tombent dans le même seau)
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+
+    for i in range(n_out - 2):
+        # Moyenne du seau suivant (troisième sommet du triangle)
+        avg_start = int(np.floor((i + 1) * every)) + 1
+        avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        # Point du seau courant qui forme le plus grand triangle
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.nanargmax(area)) if not np.all(np.isnan(area)) else start
+        indices[i + 1] = a
+
+    indices[-1] = n - 1
+
+    # LTTB ne garde qu'un point par seau : les extrêmes globaux remplacent le point de leur seau
+    if np.all(np.isnan(y)):
+        return indices
+    starts = np.floor(np.arange(n_out - 2) * every).astype(np.int64) + 1
+    extremes = {int(np.nanargmin(y)), int(np.nanargmax(y))} - {0, n - 1}
+    buckets = {}
+    for e in sorted(extremes):
+        buckets.setdefault(int(np.searchsorted(starts, e, side='right')), []).append(e)
+    extra = []
+    for bucket, points in buckets.items():
+        indices[bucket] = points[0]
+        extra += points[1:]
+    return np.union1d(indices, extra).astype(np.int64) if extra else indices
+
+
+def downsample_series(series, n_out):
+    """
+    Sous-échantillonne une série pandas indexée par date
+
+    Returns:
+        Series: Série réduite à n_out points au plus
+    """
+    if len(series) <= n_out:
+        return series
+    x = series.index.asi8 if hasattr(series.index, 'asi8') else np.arange(len(series))
+    return series.iloc[lttb_indices(x, series.to_numpy(), n_out)]
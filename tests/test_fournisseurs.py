@@ -0,0 +1,113 @@
+"""
+Enregistrement puis rejeu hors ligne des réponses d'un fournisseur
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fournisseurs
+from fournisseurs import (MissingRecording, RecordingProvider, ReplayError, ReplayProvider, SyntheticProvider,
+                          YFinanceProvider)
+from resilience import UpstreamUnavailable
+
+
+class DownSource(SyntheticProvider):
+    """Source dont info() est indisponible et dividends() en erreur"""
+
+    def info(self, ticker):
+        raise UpstreamUnavailable("info: Yahoo indisponible")
+
+    def dividends(self, ticker):
+        raise ValueError("réponse illisible")
+
+
+def test_download_is_recorded_and_replayed(tmp_path):
+    tickers = ['AAPL', 'MSFT', 'SAP.DE']
+    recorded = RecordingProvider(SyntheticProvider(), tmp_path).download(tickers, period='1y')
+    replay = ReplayProvider(tmp_path)
+    replayed = replay.download(tickers, period='1y')
+    assert list(replayed) == tickers
+    for t in tickers:
+        assert replayed[t].equals(recorded[t])
+    # Pas de rejeu par ticker : le téléchargement groupé a été enregistré comme tel
+    with pytest.raises(MissingRecording):
+        replay.download(['AAPL'], period='1y')
+
+
+def test_known_errors_replay_with_their_type(tmp_path):
+    recorder = RecordingProvider(DownSource(), tmp_path)
+    with pytest.raises(UpstreamUnavailable):
+        recorder.info('AAPL')
+    with pytest.raises(ValueError):
+        recorder.dividends('AAPL')
+    replay = ReplayProvider(tmp_path)
+    with pytest.raises(UpstreamUnavailable, match="Yahoo indisponible"):
+        replay.info('AAPL')
+    with pytest.raises(ReplayError, match="ValueError"):
+        replay.dividends('AAPL')
+
+
+class _NoLimit:
+    def wait(self):
+        pass
+
+
+class _FakeTicker:
+    """yf.Ticker factice : compte les lectures simultanées de .info sur un même objet"""
+
+    created = []
+
+    def __init__(self, ticker, session=None):
+        self.ticker = ticker
+        self.readers = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        _FakeTicker.created.append(self)
+
+    @property
+    def info(self):
+        with self._lock:
+            self.readers += 1
+            self.peak = max(self.peak, self.readers)
+        time.sleep(0.05)
+        with self._lock:
+            self.readers -= 1
+        return {'symbol': self.ticker, 'longName': 'Test', 'currentPrice': 1.0}
+
+
+def test_pooled_ticker_is_never_shared_between_threads(monkeypatch):
+    monkeypatch.setattr(fournisseurs.yf, 'Ticker', _FakeTicker)
+    provider = YFinanceProvider(limiter=_NoLimit(), session=object())
+    threads = [threading.Thread(target=provider.info, args=('AAPL',)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(t.peak for t in _FakeTicker.created) == 1
+    # Objet du pool libre : réutilisé, pas recréé
+    created = len(_FakeTicker.created)
+    provider.info('AAPL')
+    assert len(_FakeTicker.created) == created
+
+
+
+class SparseInfo(SyntheticProvider):
+    """Titre coté dont .info ne contient que trois champs du schéma"""
+
+    def info(self, ticker):
+        return fournisseurs.project_info({'symbol': ticker, 'sector': 'Financial Services',
+                                          'regularMarketPrice': 412.0, 'shortName': ticker})
+
+
+def test_sparse_quoted_info_is_not_reported_missing():
+    from Algorithmev1 import StockScorer
+    from schema_info import is_quoted
+    assert StockScorer('SPY', provider=SparseInfo()).fetch_data()
+    assert is_quoted({'symbol': '^GSPC', 'previousClose': 5800.0})
+    assert not is_quoted({'symbol': 'GONE', 'longName': 'Delisted', 'sector': 'Tech', 'industry': 'Software',
+                          'country': 'US', 'beta': 1.0})
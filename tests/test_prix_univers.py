@@ -0,0 +1,44 @@
+"""
+Matrice de prix partagée : éviction des tickers les moins utilisés, écriture groupée de l'index
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prix_univers import PriceStore
+
+
+def history(seed, days=30):
+    index = pd.bdate_range('2024-01-01', periods=days)
+    close = 100 + np.cumsum(np.random.default_rng(seed).normal(size=days))
+    return pd.DataFrame({'Close': close, 'Volume': np.full(days, 1000.0)}, index=index)
+
+
+def test_least_recently_used_tickers_are_evicted():
+    store = PriceStore(ticker_capacity=4, max_tickers=8)
+    for i in range(8):
+        store.add_history(f'T{i}', history(i))
+    store.series('T0')  # T0 relu : le plus récemment utilisé
+    store.add_history('NEW', history(99))
+    assert len(store) <= 8 and store.matrix().shape[1] == len(store)
+    assert 'T0' in store and 'NEW' in store and 'T1' not in store
+    # Les colonnes restantes ont gardé leurs données
+    for ticker, seed in (('T0', 0), ('T7', 7), ('NEW', 99)):
+        np.testing.assert_allclose(store.series(ticker).to_numpy(), history(seed)['Close'], rtol=1e-6)
+    assert store._arrays['close'].shape[1] <= 8
+
+
+def test_index_is_flushed_in_batches_and_on_close(tmp_path):
+    store = PriceStore(str(tmp_path), flush_interval=3600)
+    store.add_history('AAPL', history(1))
+    assert PriceStore(str(tmp_path)).tickers == ['AAPL']  # première écriture publiée
+    store.add_history('MSFT', history(2))
+    assert PriceStore(str(tmp_path)).tickers == ['AAPL']
+    store.close()
+    reopened = PriceStore(str(tmp_path))
+    assert reopened.tickers == ['AAPL', 'MSFT']
+    np.testing.assert_allclose(reopened.series('MSFT').to_numpy(), history(2)['Close'], rtol=1e-6)
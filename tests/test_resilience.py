@@ -0,0 +1,58 @@
+"""
+Délai par appel : les appels abandonnés ne font pas ouvrir le disjoncteur
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import resilience
+from resilience import CallSlotsExhausted, CallTimeout, CircuitBreaker, RetryPolicy, call_with_retry, run_with_timeout
+
+
+@pytest.fixture
+def two_threads(monkeypatch):
+    monkeypatch.setattr(resilience, '_call_slots', threading.BoundedSemaphore(2))
+    monkeypatch.setattr(resilience, 'CALL_THREADS', 2)
+
+
+def test_saturated_call_threads_do_not_trip_the_breaker(two_threads):
+    hang = threading.Event()
+    breaker = CircuitBreaker('test', failure_threshold=2)
+    policy = RetryPolicy(attempts=1)
+    try:
+        for _ in range(2):
+            with pytest.raises(resilience.UpstreamUnavailable) as raised:
+                call_with_retry(lambda: run_with_timeout(hang.wait, 0.05), breaker, policy)
+            assert isinstance(raised.value.__cause__, CallTimeout)
+        breaker.on_success()
+
+        # Les deux threads tiennent encore leur appel abandonné : rien n'est tenté
+        for _ in range(5):
+            with pytest.raises(CallSlotsExhausted):
+                call_with_retry(lambda: run_with_timeout(lambda: 'ok', 0.05), breaker, policy)
+        assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    finally:
+        hang.set()
+
+    # Les appels abandonnés terminés rendent leur thread
+    assert call_with_retry(lambda: run_with_timeout(lambda: 'ok', 1.0), breaker, policy) == 'ok'
+
+
+def test_half_open_probe_is_released_when_no_thread_is_free(two_threads):
+    hang = threading.Event()
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.0)
+    breaker.on_failure()
+    try:
+        for _ in range(2):
+            with pytest.raises(CallTimeout):
+                run_with_timeout(hang.wait, 0.05)
+        with pytest.raises(CallSlotsExhausted):
+            call_with_retry(lambda: run_with_timeout(lambda: 'ok', 0.05), breaker, RetryPolicy(attempts=1))
+        # L'essai n'a pas été consommé : le suivant peut passer
+        breaker.before_call()
+    finally:
+        hang.set()
@@ -0,0 +1,56 @@
+"""
+Filtres du screener sur un petit snapshot : valeurs manquantes écartées sous toutes les formes
+"""
+
+import os
+import sys
+
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from screener import ScreenerError, ScreenerIndex, compile_query
+
+
+@pytest.fixture(scope='module')
+def index():
+    return ScreenerIndex(pa.table({
+        'ticker': ['A', 'B', 'C', 'D.PA'],
+        'name': ['a', 'b', 'c', 'd'],
+        'sector': ['Technology', '', 'Technology', 'Energy'],
+        'country': ['United States', None, 'United States', 'France'],
+        'trailingPE': [5.0, None, 25.0, 10.0],
+        'returnOnEquity': [0.30, 0.10, None, 0.20],
+    }))
+
+
+def tickers(index, expression):
+    return index.column_values('ticker')[compile_query(expression).mask(index)].tolist()
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ("pe < 15", ['A', 'D.PA']),
+    ("not (pe > 20)", ['A', 'D.PA']),
+    ("pe != 10", ['A', 'C']),
+    ("pe not in [10]", ['A', 'C']),
+    ("not pe in [10]", ['A', 'C']),
+    ("pe + 1 != 11", ['A', 'C']),
+    ("5 < pe < 30", ['C', 'D.PA']),
+    ("pe > 20 or not roe > 15%", ['B', 'C']),
+    ("not (pe > 20 and roe > 15%)", ['A', 'B', 'D.PA']),
+    ("sector != 'technology' and region == 'Europe'", ['D.PA']),
+])
+def test_missing_values_never_match(index, expression, expected):
+    assert tickers(index, expression) == expected
+
+
+def test_percent_only_outside_text(index):
+    assert tickers(index, "roe >= 20%") == ['A', 'D.PA']
+    assert compile_query("name == '10%' or roe > 1").tree.values[0].comparators[0].value == '10%'
+
+
+@pytest.mark.parametrize('expression', ["pe", "not pe", "pe and roe > 1", "sector > 'A'", "pe == 'x'",
+                                        "pe < None", "pe < b'x'", "pe < 1j", "name == 'abc"])
+def test_invalid_expressions(index, expression):
+    with pytest.raises(ScreenerError):
+        compile_query(expression).mask(index)
@@ -0,0 +1,151 @@
+"""
+Service de notation de bout en bout (HTTP) contre le fournisseur synthétique, sans réseau
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fournisseurs import SyntheticProvider
+from resilience import UpstreamUnavailable
+from service_notation import ScoringService, make_server
+
+
+class FlakyProvider(SyntheticProvider):
+    """Fournisseur synthétique dont le premier appel info() échoue (Yahoo indisponible)"""
+
+    def __init__(self):
+        super().__init__(seed=1)
+        self.info_calls = 0
+
+    def info(self, ticker):
+        self.info_calls += 1
+        if self.info_calls == 1:
+            raise UpstreamUnavailable("info: panne simulée")
+        return super().info(ticker)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(service):
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}'
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def request(url, payload=None):
+    """(statut HTTP, corps JSON) d'une requête GET, ou POST si payload est fourni"""
+    data = None if payload is None else json.dumps(payload).encode('utf-8')
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_score_batch_and_snapshot(serve):
+    url = serve(ScoringService(provider=SyntheticProvider()))
+
+    status, body = request(f'{url}/score?ticker=aapl&horizon=court')
+    assert status == 200
+    assert body['status'] == 'ok' and body['ticker'] == 'AAPL' and body['horizon'] == 'court'
+    assert 0 <= body['score'] <= 100
+
+    status, body = request(f'{url}/batch_score', {'tickers': ['AAPL', 'MSFT'], 'horizons': ['court', 'long']})
+    assert status == 200
+    assert [(r['ticker'], r['horizon']) for r in body['results']] == [
+        ('AAPL', 'court'), ('AAPL', 'long'), ('MSFT', 'court'), ('MSFT', 'long')]
+
+    status, body = request(f'{url}/snapshot', {'tickers': ['AAPL', 'SAP.DE']})
+    assert status == 200
+    assert [r['ticker'] for r in body['rows']] == ['AAPL', 'SAP.DE']
+
+    status, body = request(f'{url}/health')
+    assert status == 200 and body['cache_entries'] > 0
+
+
+def test_request_validation_is_400(serve):
+    url = serve(ScoringService(provider=SyntheticProvider()))
+    assert request(f'{url}/score')[0] == 400
+    assert request(f'{url}/score?ticker=AAPL&horizon=moyen')[0] == 400
+    assert request(f'{url}/batch_score', {'horizons': ['long']})[0] == 400
+    assert request(f'{url}/snapshot', ['AAPL'])[0] == 400
+    assert request(f'{url}/inconnu')[0] == 404
+
+
+def test_internal_errors_are_not_400(serve):
+    def broken_row(ticker, provider):
+        raise KeyError('Close')
+
+    def unavailable_row(ticker, provider):
+        raise UpstreamUnavailable("download: panne simulée")
+
+    status, body = request(f"{serve(ScoringService(provider=SyntheticProvider(), row_fetcher=broken_row))}/snapshot",
+                           {'tickers': ['AAPL']})
+    assert status == 500 and body['error'].startswith('KeyError')
+
+    service = ScoringService(provider=SyntheticProvider())
+    service.score = lambda ticker, horizon='long': unavailable_row(ticker, None)
+    assert request(f'{serve(service)}/score?ticker=AAPL')[0] == 503
+
+
+def test_error_results_are_not_cached(serve):
+    provider = FlakyProvider()
+    url = serve(ScoringService(provider=provider))
+
+    status, body = request(f'{url}/score?ticker=AAPL')
+    assert status == 200 and body['status'] == 'error'
+
+    status, body = request(f'{url}/score?ticker=AAPL')
+    assert status == 200 and body['status'] == 'ok'
+    assert provider.info_calls == 2
+
+
+class _SlowScorer:
+    """Scorer factice qui mesure le nombre de calculs simultanés"""
+
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def __init__(self, ticker, horizon, cache=None, provider=None):
+        self.sector = self.industry = 'Test'
+        self.scores, self.info, self.fetch_error = {}, {'longName': ticker}, None
+
+    def calculate_score(self):
+        cls = type(self)
+        with cls.lock:
+            cls.running += 1
+            cls.peak = max(cls.peak, cls.running)
+        time.sleep(0.1)
+        with cls.lock:
+            cls.running -= 1
+        return 50.0
+
+
+def test_score_concurrency_is_bounded(serve):
+    url = serve(ScoringService(scorer_factory=_SlowScorer, max_concurrency=2))
+    statuses = []
+    threads = [threading.Thread(target=lambda t=t: statuses.append(request(f'{url}/score?ticker=T{t}')[0]))
+               for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 8
+    assert _SlowScorer.peak == 2
@@ -0,0 +1,26 @@
+"""
+Sous-échantillonnage LTTB : bornes de la période et extrêmes globaux toujours conservés
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sous_echantillonnage import lttb_indices
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_global_extremes_are_kept(seed):
+    y = np.cumsum(np.random.default_rng(seed).normal(size=12000))
+    idx = lttb_indices(np.arange(len(y)), y, 1000)
+    assert idx[0] == 0 and idx[-1] == len(y) - 1 and np.all(np.diff(idx) > 0)
+    assert len(idx) <= 1001
+    assert y[idx].min() == y.min() and y[idx].max() == y.max()
+
+
+def test_extremes_in_the_same_bucket():
+    y = np.array([0, 5, -5, 1, 2, 3, 4, 2, 1, 0.])
+    assert lttb_indices(np.arange(len(y)), y, 4).tolist() == [0, 1, 2, 6, 9]
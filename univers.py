@@ -0,0 +1,44 @@
+"""
+Univers des actions suivies par les pages et les traitements par lots
+"""
+
+# Liste des principales actions par marché (page des classements)
+MARKETS = {
+    "🇺🇸 Tech US": ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "NFLX", "AMD", "INTC",
+                     "ADBE", "CRM", "ORCL", "CSCO", "AVGO", "QCOM", "TXN", "INTU", "NOW", "SNOW"],
+    
+    "🇺🇸 Finance & Industrie": ["JPM", "BAC", "WFC", "GS", "MS", "V", "MA", "AXP", "C", "BLK",
+                                  "UNH", "JNJ", "PFE", "LLY", "ABBV", "MRK", "TMO", "ABT", "DHR", "BMY"],
+    
+    "🇺🇸 Consommation": ["WMT", "HD", "MCD", "NKE", "SBUX", "DIS", "COST", "TGT", "LOW", "TJX",
+                          "PG", "KO", "PEP", "PM", "MO", "CL", "KMB", "GIS", "K", "CAG"],
+    
+    "🇪🇺 Europe": ["ASML", "SAP", "LVMH.PA", "OR.PA", "SAN.PA", "AIR.PA", "MC.PA", "SU.PA", "TTE.PA", "BN.PA",
+                    "SIE.DE", "VOW3.DE", "BAS.DE", "ALV.DE", "DTE.DE"],
+    
+    "🇯🇵 Japon": ["7203.T", "6758.T", "9984.T", "6861.T", "8306.T", "7974.T", "9433.T", "4063.T", "6902.T", "8035.T"],
+    
+    "🌏 Asie-Pacifique": ["TSM", "BABA", "TCEHY", "005930.KS", "000660.KS", "2330.TW", "1810.HK", "0700.HK"]
+}
+
+# Grandes capitalisations des classements de l'analyseur
+TOP_STOCKS = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "NFLX", "AMD", "INTC",
+    "ADBE", "CRM", "ORCL", "CSCO", "AVGO", "QCOM", "TXN", "INTU", "NOW", "SNOW",
+    "PLTR", "UBER", "ABNB", "CRWD", "PANW", "JPM", "BAC", "WFC", "GS", "MS",
+    "V", "MA", "AXP", "C", "BLK", "UNH", "JNJ", "LLY", "ABBV", "MRK",
+    "TMO", "ABT", "DHR", "PFE", "BMY", "WMT", "HD", "MCD", "NKE", "SBUX",
+    "DIS", "COST", "TGT", "LOW", "PG", "KO", "PEP", "XOM", "CVX", "COP",
+    "BA", "CAT", "GE", "HON", "UPS", "T", "VZ", "TMUS", "TSM", "ASML"
+]
+
+
+def all_tickers():
+    """Union ordonnée et sans doublons de tous les tickers suivis"""
+    tickers = []
+    seen = set()
+    for ticker in TOP_STOCKS + [t for stocks in MARKETS.values() for t in stocks]:
+        if ticker not in seen:
+            seen.add(ticker)
+            tickers.append(ticker)
+    return tickers